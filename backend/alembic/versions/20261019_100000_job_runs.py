@@ -0,0 +1,39 @@
+"""Add job_runs table for background job run logs (membership expiry, sweepers)."""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20261019_100000"
+down_revision = "20260521_130000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("job_name", sa.String(length=60), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="running"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=True),
+        sa.Column("stats", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_job_run_name_started", "job_runs", ["job_name", "started_at"])
+    # Expiry job scans ACTIVE rows with a past end_date across all gyms.
+    op.create_index(
+        "idx_membership_active_end_date",
+        "memberships",
+        ["end_date"],
+        postgresql_where=sa.text("status = 'ACTIVE'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_membership_active_end_date", table_name="memberships")
+    op.drop_index("idx_job_run_name_started", table_name="job_runs")
+    op.drop_table("job_runs")
@@ -0,0 +1,60 @@
+"""Add attendance_hourly_rollups and backfill from existing attendance."""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20261019_110000"
+down_revision = "20261019_100000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "attendance_hourly_rollups",
+        sa.Column("gym_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("hour", sa.SmallInteger(), nullable=False),
+        sa.Column("check_ins", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unique_members", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sessions_closed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("session_seconds", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["gym_id"], ["gyms.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("gym_id", "day", "hour"),
+    )
+    # One pass over attendance; unique_members credits each member's first
+    # check-in of the (UTC) day, matching app.attendance.rollups.
+    op.execute(
+        """
+        INSERT INTO attendance_hourly_rollups
+            (gym_id, day, hour, check_ins, unique_members, sessions_closed, session_seconds)
+        SELECT
+            gym_id,
+            day,
+            hour,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE visit_rank = 1),
+            COUNT(check_out_time),
+            COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM check_out_time - check_in_time), 0)), 0)::bigint
+        FROM (
+            SELECT
+                gym_id,
+                check_in_time,
+                check_out_time,
+                (check_in_time AT TIME ZONE 'UTC')::date AS day,
+                EXTRACT(HOUR FROM check_in_time AT TIME ZONE 'UTC')::smallint AS hour,
+                ROW_NUMBER() OVER (
+                    PARTITION BY gym_id, member_id, (check_in_time AT TIME ZONE 'UTC')::date
+                    ORDER BY check_in_time
+                ) AS visit_rank
+            FROM attendance
+        ) visits
+        GROUP BY gym_id, day, hour
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("attendance_hourly_rollups")
@@ -0,0 +1,48 @@
+"""Add revenue_daily_ledger and backfill from existing payments."""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20261019_120000"
+down_revision = "20261019_110000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revenue_daily_ledger",
+        sa.Column("gym_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "payment_mode",
+            postgresql.ENUM(name="payment_mode", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("tax_amount", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("payment_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["gym_id"], ["gyms.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("gym_id", "day", "payment_mode"),
+    )
+    op.execute(
+        """
+        INSERT INTO revenue_daily_ledger
+            (gym_id, day, payment_mode, amount, tax_amount, payment_count)
+        SELECT
+            gym_id,
+            payment_date,
+            payment_mode,
+            COALESCE(SUM(amount), 0),
+            COALESCE(SUM(tax_amount), 0),
+            COUNT(*)
+        FROM payments
+        GROUP BY gym_id, payment_date, payment_mode
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("revenue_daily_ledger")
@@ -0,0 +1,24 @@
+"""Partial index on open attendance sessions (check_out_time IS NULL)."""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_130000"
+down_revision = "20261019_120000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Check-in guard, check-out and "currently in" only look at open sessions,
+    # which are a tiny fraction of attendance rows.
+    op.create_index(
+        "idx_attendance_open",
+        "attendance",
+        ["gym_id", "member_id"],
+        postgresql_where=sa.text("check_out_time IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_attendance_open", table_name="attendance")
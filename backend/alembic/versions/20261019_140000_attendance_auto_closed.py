@@ -0,0 +1,20 @@
+"""Add attendance.auto_closed for sessions closed by the auto-checkout sweeper."""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_140000"
+down_revision = "20261019_130000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "attendance",
+        sa.Column("auto_closed", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("attendance", "auto_closed")
@@ -0,0 +1,36 @@
+"""Member search: phone_digits column and pg_trgm GIN indexes."""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_150000"
+down_revision = "20261019_140000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("members", sa.Column("phone_digits", sa.String(length=15), nullable=True))
+    op.execute(r"UPDATE members SET phone_digits = NULLIF(regexp_replace(phone, '\D', '', 'g'), '')")
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Trigram GIN serves ILIKE '%term%' (any case) and the % similarity operator.
+    for name, column in (
+        ("idx_member_name_trgm", "name"),
+        ("idx_member_phone_digits_trgm", "phone_digits"),
+        ("idx_member_code_trgm", "member_code"),
+    ):
+        op.create_index(
+            name,
+            "members",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_member_code_trgm", table_name="members")
+    op.drop_index("idx_member_phone_digits_trgm", table_name="members")
+    op.drop_index("idx_member_name_trgm", table_name="members")
+    op.drop_column("members", "phone_digits")
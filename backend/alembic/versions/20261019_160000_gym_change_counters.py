@@ -0,0 +1,27 @@
+"""Add gym_change_counters (per-gym write versions for HTTP validators)."""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20261019_160000"
+down_revision = "20261019_150000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No backfill: a missing row reads as version 0, and the first write creates it.
+    op.create_table(
+        "gym_change_counters",
+        sa.Column("gym_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("scope", sa.String(length=40), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["gym_id"], ["gyms.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("gym_id", "scope"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("gym_change_counters")
@@ -0,0 +1,47 @@
+"""Make idx_attendance_open unique: at most one open session per member."""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019_170000"
+down_revision = "20261019_160000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Close all but the latest open session of each member first, the way the
+    # auto-checkout sweeper would (auto_closed, so durations ignore them).
+    op.execute(
+        """
+        UPDATE attendance AS a
+        SET check_out_time = a.check_in_time, auto_closed = true
+        WHERE a.check_out_time IS NULL
+          AND EXISTS (
+            SELECT 1 FROM attendance AS b
+            WHERE b.gym_id = a.gym_id
+              AND b.member_id = a.member_id
+              AND b.check_out_time IS NULL
+              AND (b.check_in_time > a.check_in_time
+                   OR (b.check_in_time = a.check_in_time AND b.id > a.id))
+          )
+        """
+    )
+    op.drop_index("idx_attendance_open", table_name="attendance")
+    op.create_index(
+        "idx_attendance_open",
+        "attendance",
+        ["gym_id", "member_id"],
+        unique=True,
+        postgresql_where=sa.text("check_out_time IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_attendance_open", table_name="attendance")
+    op.create_index(
+        "idx_attendance_open",
+        "attendance",
+        ["gym_id", "member_id"],
+        postgresql_where=sa.text("check_out_time IS NULL"),
+    )
@@ -0,0 +1,68 @@
+"""Rebuild attendance_hourly_rollups in each gym's local day and hour."""
+
+from alembic import op
+
+revision = "20261019_180000"
+down_revision = "20261019_170000"
+branch_labels = None
+depends_on = None
+
+# Matches app.core.gym_time.gym_zone: gym.settings["timezone"] if valid, else the default.
+_GYM_ZONE = """
+    SELECT
+        id,
+        CASE
+            WHEN settings->>'timezone' IN (SELECT name FROM pg_timezone_names) THEN settings->>'timezone'
+            ELSE 'Asia/Kolkata'
+        END AS tz
+    FROM gyms
+"""
+
+
+def _rebuild(zone_sql: str) -> None:
+    # Same counting as app.attendance.rollups.rebuild_rollups: unique_members
+    # credits each member's first check-in of the local day; sweeper-closed
+    # sessions have no real duration.
+    op.execute("DELETE FROM attendance_hourly_rollups")
+    op.execute(
+        f"""
+        INSERT INTO attendance_hourly_rollups
+            (gym_id, day, hour, check_ins, unique_members, sessions_closed, session_seconds)
+        SELECT
+            gym_id,
+            day,
+            hour,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE visit_rank = 1),
+            COUNT(check_out_time) FILTER (WHERE NOT auto_closed),
+            COALESCE(
+                SUM(GREATEST(EXTRACT(EPOCH FROM check_out_time - check_in_time), 0))
+                    FILTER (WHERE NOT auto_closed),
+                0
+            )::bigint
+        FROM (
+            SELECT
+                a.gym_id,
+                a.check_in_time,
+                a.check_out_time,
+                a.auto_closed,
+                (a.check_in_time AT TIME ZONE z.tz)::date AS day,
+                EXTRACT(HOUR FROM a.check_in_time AT TIME ZONE z.tz)::smallint AS hour,
+                ROW_NUMBER() OVER (
+                    PARTITION BY a.gym_id, a.member_id, (a.check_in_time AT TIME ZONE z.tz)::date
+                    ORDER BY a.check_in_time
+                ) AS visit_rank
+            FROM attendance a
+            JOIN ({zone_sql}) z ON z.id = a.gym_id
+        ) visits
+        GROUP BY gym_id, day, hour
+        """
+    )
+
+
+def upgrade() -> None:
+    _rebuild(_GYM_ZONE)
+
+
+def downgrade() -> None:
+    _rebuild("SELECT id, 'UTC' AS tz FROM gyms")
@@ -0,0 +1,33 @@
+"""Member search: phone_digits without the +91 / 0 prefix (app.core.phone.national_digits)."""
+
+from alembic import op
+
+revision = "20261019_190000"
+down_revision = "20261019_180000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQL twin of national_digits: strip a +91 / 91 country code or a 0 trunk prefix.
+    op.execute(
+        r"""
+        UPDATE members m
+        SET phone_digits = NULLIF(
+            CASE
+                WHEN ltrim(m.phone) LIKE '+91%' OR (length(d.digits) > 10 AND d.digits LIKE '91%')
+                    THEN substr(d.digits, 3)
+                WHEN length(d.digits) > 10 AND d.digits LIKE '0%'
+                    THEN substr(d.digits, 2)
+                ELSE d.digits
+            END,
+            ''
+        )
+        FROM (SELECT id, regexp_replace(phone, '\D', '', 'g') AS digits FROM members) d
+        WHERE d.id = m.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(r"UPDATE members SET phone_digits = NULLIF(regexp_replace(phone, '\D', '', 'g'), '')")
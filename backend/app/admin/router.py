@@ -5,16 +5,21 @@ All endpoints require SuperAdminDep authorization.
 
 import uuid
 from fastapi import APIRouter, Query, HTTPException, status
-from app.auth.dependencies import SuperAdminDep, DbDep
-from app.admin.service import AdminService
+from app.auth.dependencies import SuperAdminDep, DbDep, ReadDbDep
+from app.admin.service import AdminService, GymSortField
 from app.core.logger import log_info
+from app.core.responses import PreEncodedJSONResponse
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
 # ============= DASHBOARD & STATS =============
 
 @router.get("/stats")
-def get_platform_stats(_: SuperAdminDep, db: DbDep):
+def get_platform_stats(
+    _: SuperAdminDep,
+    db: ReadDbDep,
+    days: int = Query(30, ge=1, le=366, description="Length of the daily series"),
+):
     """
     Get platform-wide metrics.
     Super admin only.
@@ -23,28 +28,32 @@ def get_platform_stats(_: SuperAdminDep, db: DbDep):
         - Total/active gyms and members
         - User breakdown by role
         - Revenue this month
+        - Daily signups, revenue and check-ins for the last `days` days
     """
     service = AdminService(db)
-    return service.get_platform_stats()
+    return PreEncodedJSONResponse(service.get_platform_stats_json(days))
 
 # ============= GYMS MANAGEMENT =============
 
 @router.get("/gyms")
 def list_gyms(
     _: SuperAdminDep,
-    db: DbDep,
+    db: ReadDbDep,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    sort_by: GymSortField = Query("created_at", description="Sort field"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort direction"),
 ):
     """
     List all gyms in the platform.
     Includes subscription status, member count, revenue.
+    Sortable by created_at, name, members_count, revenue_this_month or last_activity.
     """
     service = AdminService(db)
-    return service.list_all_gyms(page, page_size)
+    return service.list_all_gyms(page, page_size, sort_by=sort_by, descending=order == "desc")
 
 @router.get("/gyms/{gym_id}")
-def get_gym_detail(_: SuperAdminDep, gym_id: uuid.UUID, db: DbDep):
+def get_gym_detail(_: SuperAdminDep, gym_id: uuid.UUID, db: ReadDbDep):
     """
     Get detailed information about a specific gym.
     Includes users, members, and revenue.
@@ -90,7 +99,7 @@ def toggle_gym_status(
 @router.get("/users")
 def list_users(
     _: SuperAdminDep,
-    db: DbDep,
+    db: ReadDbDep,
     role: str = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -134,7 +143,7 @@ def toggle_user_status(
 @router.get("/demo-requests")
 def list_demo_requests(
     _: SuperAdminDep,
-    db: DbDep,
+    db: ReadDbDep,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
 ):
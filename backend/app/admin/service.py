@@ -5,12 +5,21 @@ Handles gym management, user administration, analytics, and platform metrics.
 
 import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from typing import Literal
+
+from sqlalchemy import case, func, literal, select, true, union_all
 from sqlalchemy.orm import Session
 
-from app.models import Gym, User, Member, Membership, Payment, Attendance
+from app.biometric import resolver
+from app.core.cache import cache_get_or_load
+from app.core.config import settings
+from app.core.database import ReplicaSessionLocal
+from app.core.responses import json_bytes
+from app.models import Gym, User, Member, Attendance, AttendanceHourlyRollup, RevenueDailyLedger
 from app.models.enums import UserRole
 
+GymSortField = Literal["created_at", "name", "members_count", "revenue_this_month", "last_activity"]
+
 
 class AdminService:
     """Service class for admin operations (super_admin only)."""
@@ -20,13 +29,76 @@ class AdminService:
 
     # ============= GYMS =============
 
-    def list_all_gyms(self, page: int = 1, page_size: int = 20):
-        """List all gyms with subscription status and activity metrics."""
-        query = self.db.query(Gym).order_by(Gym.created_at.desc())
-        
-        total = query.count()
-        gyms = query.offset((page - 1) * page_size).limit(page_size).all()
-        
+    def list_all_gyms(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: GymSortField = "created_at",
+        descending: bool = True,
+    ):
+        """
+        List all gyms with subscription status and activity metrics.
+
+        Each metric is a correlated subquery per gym on an indexed column
+        (members by gym_id, the revenue ledger's (gym_id, day) key, attendance
+        by (gym_id, check_in_time)), so nothing aggregates a whole table. The
+        page's gym ids are picked first; the metrics are then read for those
+        gyms only. A metric sort evaluates that metric once per gym, still by
+        index lookup.
+        """
+        revenue_since = datetime.now().date() - timedelta(days=30)
+        members_count = (
+            select(func.count()).where(Member.gym_id == Gym.id).correlate(Gym).scalar_subquery()
+        )
+        revenue = (
+            select(func.coalesce(func.sum(RevenueDailyLedger.amount), 0))
+            .where(RevenueDailyLedger.gym_id == Gym.id, RevenueDailyLedger.day >= revenue_since)
+            .correlate(Gym)
+            .scalar_subquery()
+        )
+        last_payment = (
+            select(func.max(RevenueDailyLedger.day))
+            .where(RevenueDailyLedger.gym_id == Gym.id)
+            .correlate(Gym)
+            .scalar_subquery()
+        )
+        last_checkin = (
+            select(func.max(Attendance.check_in_time))
+            .where(Attendance.gym_id == Gym.id)
+            .correlate(Gym)
+            .scalar_subquery()
+        )
+        last_activity = case(
+            (last_payment.is_(None), last_checkin),
+            (last_checkin.is_(None), last_payment),
+            (last_checkin >= last_payment, last_checkin),
+            else_=last_payment,
+        )
+        sort_columns = {
+            "created_at": Gym.created_at,
+            "name": Gym.name,
+            "members_count": members_count,
+            "revenue_this_month": revenue,
+            "last_activity": last_activity,
+        }
+        sort_column = sort_columns[sort_by]
+        ordering = sort_column.desc() if descending else sort_column.asc()
+
+        total = self.db.execute(select(func.count(Gym.id))).scalar() or 0
+        page_ids = self.db.execute(
+            select(Gym.id)
+            .order_by(sort_column.is_(None), ordering, Gym.id)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        ).scalars().all()
+        rows_by_id = {
+            row[0].id: row
+            for row in self.db.execute(
+                select(Gym, members_count, revenue, last_payment, last_checkin).where(Gym.id.in_(page_ids))
+            ).all()
+        } if page_ids else {}
+        rows = [rows_by_id[gym_id] for gym_id in page_ids if gym_id in rows_by_id]
+
         return {
             "items": [
                 {
@@ -37,12 +109,12 @@ class AdminService:
                     "subscription_status": gym.subscription_status,
                     "subscription_end": gym.subscription_end,
                     "is_active": gym.is_active,
-                    "members_count": self._count_gym_members(gym.id),
-                    "revenue_this_month": self._get_gym_revenue(gym.id, days=30),
-                    "last_activity": self._get_gym_last_activity(gym.id),
+                    "members_count": int(count),
+                    "revenue_this_month": float(gym_revenue),
+                    "last_activity": self._latest_activity(gym_last_payment, gym_last_checkin),
                     "created_at": gym.created_at.isoformat() if gym.created_at else None,
                 }
-                for gym in gyms
+                for gym, count, gym_revenue, gym_last_payment, gym_last_checkin in rows
             ],
             "page": page,
             "page_size": page_size,
@@ -55,8 +127,22 @@ class AdminService:
         if not gym:
             raise ValueError("Gym not found")
         
-        members = self.db.query(Member).filter(Member.gym_id == gym_id).all()
-        active_members = sum(1 for m in members if m.is_active)
+        total_members, active_members = self.db.execute(
+            select(
+                func.count(Member.id),
+                func.coalesce(func.sum(case((Member.is_active == True, 1), else_=0)), 0),  # noqa: E712
+            ).where(Member.gym_id == gym_id)
+        ).one()
+        
+        revenue_since = datetime.now().date() - timedelta(days=30)
+        revenue_all_time, revenue_this_month = self.db.execute(
+            select(
+                func.coalesce(func.sum(RevenueDailyLedger.amount), 0),
+                func.coalesce(
+                    func.sum(case((RevenueDailyLedger.day >= revenue_since, RevenueDailyLedger.amount))), 0
+                ),
+            ).where(RevenueDailyLedger.gym_id == gym_id)
+        ).one()
         
         # Get users for this gym
         users = self.db.query(User).filter(User.gym_id == gym_id).all()
@@ -72,10 +158,10 @@ class AdminService:
             "subscription_status": gym.subscription_status,
             "subscription_end": gym.subscription_end.isoformat() if gym.subscription_end else None,
             "is_active": gym.is_active,
-            "total_members": len(members),
-            "active_members": active_members,
-            "revenue_all_time": self._get_gym_revenue(gym_id),
-            "revenue_this_month": self._get_gym_revenue(gym_id, days=30),
+            "total_members": int(total_members),
+            "active_members": int(active_members),
+            "revenue_all_time": float(revenue_all_time),
+            "revenue_this_month": float(revenue_this_month),
             "created_at": gym.created_at.isoformat() if gym.created_at else None,
             "users": [
                 {
@@ -97,6 +183,7 @@ class AdminService:
         
         gym.is_active = is_active
         self.db.commit()
+        resolver.invalidate_gym_devices(gym_id)
         
         from app.core.logger import log_info
         log_info(
@@ -123,6 +210,7 @@ class AdminService:
         query = query.order_by(User.created_at.desc())
         total = query.count()
         users = query.offset((page - 1) * page_size).limit(page_size).all()
+        gym_names = self._gym_names({user.gym_id for user in users if user.gym_id})
         
         return {
             "items": [
@@ -131,7 +219,7 @@ class AdminService:
                     "email": user.email,
                     "name": user.name,
                     "gym_id": user.gym_id,
-                    "gym_name": self._get_gym_name(user.gym_id),
+                    "gym_name": gym_names.get(user.gym_id, "Unknown"),
                     "role": user.role,
                     "is_active": user.is_active,
                     "created_at": user.created_at.isoformat() if user.created_at else None,
@@ -168,61 +256,106 @@ class AdminService:
 
     # ============= ANALYTICS =============
 
-    def get_platform_stats(self):
-        """Get platform-wide metrics for dashboard."""
-        # Gym counts
-        total_gyms = self.db.query(func.count(Gym.id)).scalar() or 0
-        active_gyms = self.db.query(func.count(Gym.id)).filter(
-            Gym.is_active == True  # noqa: E712
-        ).scalar() or 0
-        
-        # Member counts
-        total_members = self.db.query(func.count(Member.id)).scalar() or 0
-        active_members = self.db.query(func.count(Member.id)).filter(
-            Member.is_active == True  # noqa: E712
-        ).scalar() or 0
-        
-        # User counts by role
-        total_users = self.db.query(func.count(User.id)).scalar() or 0
-        total_owners = self.db.query(func.count(User.id)).filter(
-            User.role == UserRole.OWNER
-        ).scalar() or 0
-        total_managers = self.db.query(func.count(User.id)).filter(
-            User.role == UserRole.MANAGER
-        ).scalar() or 0
-        total_staff = self.db.query(func.count(User.id)).filter(
-            User.role == UserRole.STAFF
-        ).scalar() or 0
-        
-        # Revenue this month (all gyms)
-        start_of_month = datetime.now().replace(day=1).date()
-        revenue = self.db.query(func.sum(Payment.amount)).filter(
-            Payment.payment_date >= start_of_month
-        ).scalar() or 0
+    def get_platform_stats_json(self, days: int = 30) -> bytes:
+        """
+        Get platform-wide metrics for dashboard, as encoded JSON.
+        Cached briefly (the encoded bytes); see platform_stats_* settings for TTL and stale window.
+        """
+        return cache_get_or_load(
+            f"admin:platform_stats:{days}",
+            lambda: json_bytes(self._compute_platform_stats(days)),
+            ttl_seconds=settings.platform_stats_cache_ttl_seconds,
+            stale_seconds=settings.platform_stats_stale_seconds,
+            refresher=lambda: _platform_stats_with_new_session(days),
+        )
+
+    def _compute_platform_stats(self, days: int):
+        """Counts via conditional aggregation (one statement) plus daily series (one statement)."""
+        today = datetime.now().date()
+        start_of_month = today.replace(day=1)
+        series_start = today - timedelta(days=days - 1)
+
+        gyms = select(
+            func.count(Gym.id).label("total"),
+            func.coalesce(func.sum(case((Gym.is_active == True, 1), else_=0)), 0).label("active"),  # noqa: E712
+        ).subquery()
+        members = select(
+            func.count(Member.id).label("total"),
+            func.coalesce(func.sum(case((Member.is_active == True, 1), else_=0)), 0).label("active"),  # noqa: E712
+        ).subquery()
+        users = select(
+            func.count(User.id).label("total"),
+            *(
+                func.coalesce(func.sum(case((User.role == role, 1), else_=0)), 0).label(role.value)
+                for role in (UserRole.OWNER, UserRole.MANAGER, UserRole.STAFF, UserRole.SUPER_ADMIN)
+            ),
+        ).subquery()
+        revenue = select(
+            func.coalesce(func.sum(RevenueDailyLedger.amount), 0).label("this_month"),
+        ).where(RevenueDailyLedger.day >= start_of_month).subquery()
+
+        # Single-row aggregates, cross joined into one row
+        counts = self.db.execute(
+            select(gyms, members, users, revenue).select_from(
+                gyms.join(members, true()).join(users, true()).join(revenue, true())
+            )
+        ).one()
+        (
+            total_gyms, active_gyms, total_members, active_members,
+            total_users, total_owners, total_managers, total_staff, total_super_admins,
+            revenue_this_month,
+        ) = counts
+
+        # Daily series from rollups / ledger / joined_date, one UNION ALL round trip
+        series_rows = self.db.execute(
+            union_all(
+                select(literal("signups"), Member.joined_date, func.count())
+                .where(Member.joined_date >= series_start, Member.joined_date <= today)
+                .group_by(Member.joined_date),
+                select(literal("revenue"), RevenueDailyLedger.day, func.sum(RevenueDailyLedger.amount))
+                .where(RevenueDailyLedger.day >= series_start, RevenueDailyLedger.day <= today)
+                .group_by(RevenueDailyLedger.day),
+                select(literal("check_ins"), AttendanceHourlyRollup.day, func.sum(AttendanceHourlyRollup.check_ins))
+                .where(AttendanceHourlyRollup.day >= series_start, AttendanceHourlyRollup.day <= today)
+                .group_by(AttendanceHourlyRollup.day),
+            )
+        ).all()
+        by_day: dict = {}
+        for metric, day, value in series_rows:
+            by_day.setdefault(str(day), {})[metric] = value
+        daily = []
+        for offset in range(days):
+            day = str(series_start + timedelta(days=offset))
+            values = by_day.get(day, {})
+            daily.append({
+                "date": day,
+                "signups": int(values.get("signups") or 0),
+                "revenue": float(values.get("revenue") or 0),
+                "check_ins": int(values.get("check_ins") or 0),
+            })
         
         return {
             "gyms": {
                 "total": total_gyms,
-                "active": active_gyms,
-                "inactive": total_gyms - active_gyms,
+                "active": int(active_gyms),
+                "inactive": total_gyms - int(active_gyms),
             },
             "members": {
                 "total": total_members,
-                "active": active_members,
-                "inactive": total_members - active_members,
+                "active": int(active_members),
+                "inactive": total_members - int(active_members),
             },
             "users": {
                 "total": total_users,
-                "owners": total_owners,
-                "managers": total_managers,
-                "staff": total_staff,
-                "super_admins": self.db.query(func.count(User.id)).filter(
-                    User.role == UserRole.SUPER_ADMIN
-                ).scalar() or 0,
+                "owners": int(total_owners),
+                "managers": int(total_managers),
+                "staff": int(total_staff),
+                "super_admins": int(total_super_admins),
             },
             "revenue": {
-                "this_month": float(revenue),
+                "this_month": float(revenue_this_month),
             },
+            "daily": daily,
         }
 
     # ============= DEMO REQUESTS =============
@@ -257,50 +390,24 @@ class AdminService:
 
     # ============= HELPERS =============
 
-    def _count_gym_members(self, gym_id: uuid.UUID) -> int:
-        """Count total members in a gym."""
-        return self.db.query(func.count(Member.id)).filter(
-            Member.gym_id == gym_id
-        ).scalar() or 0
+    @staticmethod
+    def _latest_activity(last_payment, last_checkin):
+        """Most recent of last payment date and last check-in, ISO formatted."""
+        if last_checkin and (not last_payment or last_checkin.date() >= last_payment):
+            return last_checkin.isoformat()
+        return last_payment.isoformat() if last_payment else None
 
-    def _get_gym_revenue(self, gym_id: uuid.UUID, days: int = None) -> float:
-        """Calculate total revenue for a gym."""
-        query = self.db.query(func.sum(Payment.amount)).filter(
-            Payment.membership_id.in_(
-                self.db.query(Membership.id).filter(
-                    Membership.gym_id == gym_id
-                )
-            )
-        )
-        
-        if days:
-            start_date = datetime.now().date() - timedelta(days=days)
-            query = query.filter(Payment.payment_date >= start_date)
-        
-        total = query.scalar() or 0
-        return float(total)
+    def _gym_names(self, gym_ids: set[uuid.UUID]) -> dict[uuid.UUID, str]:
+        """Gym names by ID, in one query."""
+        if not gym_ids:
+            return {}
+        return dict(self.db.execute(select(Gym.id, Gym.name).where(Gym.id.in_(gym_ids))).all())
 
-    def _get_gym_last_activity(self, gym_id: uuid.UUID):
-        """Get the most recent activity timestamp for a gym."""
-        last_payment = self.db.query(func.max(Payment.payment_date)).filter(
-            Payment.membership_id.in_(
-                self.db.query(Membership.id).filter(
-                    Membership.gym_id == gym_id
-                )
-            )
-        ).scalar()
-        
-        last_checkin = self.db.query(func.max(Attendance.check_in_time)).filter(
-            Attendance.gym_id == gym_id
-        ).scalar()
-        
-        dates = [d for d in [last_payment, last_checkin] if d]
-        if dates:
-            last = max(dates)
-            return last.isoformat() if hasattr(last, "isoformat") else str(last)
-        return None
 
-    def _get_gym_name(self, gym_id: int) -> str:
-        """Get gym name by ID."""
-        gym = self.db.query(Gym).filter(Gym.id == gym_id).first()
-        return gym.name if gym else "Unknown"
+def _platform_stats_with_new_session(days: int):
+    """Background refresh for the stats cache (the request session is closed by then)."""
+    db = ReplicaSessionLocal()
+    try:
+        return json_bytes(AdminService(db)._compute_platform_stats(days))
+    finally:
+        db.close()
@@ -0,0 +1,171 @@
+"""
+Auto-checkout sweeper for stale open attendance.
+
+Members who never punch out leave sessions open forever; check-in guards,
+biometric CHECK_OUT inference and "currently in" all look at open sessions,
+so that set has to stay small. This job closes sessions open longer than the
+gym's cutoff (gym.settings["auto_checkout_hours"], default
+settings.attendance_auto_checkout_hours; 0 disables) in bounded batches, one
+short transaction each, rows locked with SKIP LOCKED.
+
+Closed rows get check_out_time = check_in_time + cutoff and auto_closed=True.
+They are not counted as closed sessions in the rollups, so average durations
+only reflect real check-outs. Call from cron (see
+app.automation.cron_runner.run_all_automation or /automation/run-attendance-sweep).
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import and_, select, true, update
+from sqlalchemy.orm import Session
+
+from app.core.change_counters import mark_changed
+from app.core.config import settings
+from app.core.job_runs import MAX_BATCHES, job_run
+from app.models import Attendance, Gym
+
+JOB_NAME = "attendance_auto_checkout"
+SETTINGS_KEY = "auto_checkout_hours"
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC.
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def gym_cutoff_hours(gym_settings: dict | None) -> float:
+    """Cutoff for one gym; 0 means the gym opted out of auto-checkout."""
+    value = (gym_settings or {}).get(SETTINGS_KEY)
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        return float(settings.attendance_auto_checkout_hours)
+    return max(hours, 0.0)
+
+
+def close_stale_sessions(
+    db: Session,
+    gym_id: uuid.UUID,
+    member_ids: list[uuid.UUID],
+    before: datetime,
+) -> int:
+    """
+    Close these members' open sessions that started before `before` (the gym's
+    local midnight at check-in) with zero duration and auto_closed=True, so a
+    forgotten session from an earlier day never blocks today's check-in under
+    idx_attendance_open. Returns the number closed; caller commits.
+    """
+    closed = db.execute(
+        update(Attendance)
+        .where(
+            Attendance.gym_id == gym_id,
+            Attendance.member_id.in_(member_ids),
+            Attendance.check_out_time.is_(None),
+            Attendance.check_in_time < before,
+        )
+        .values(check_out_time=Attendance.check_in_time, auto_closed=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if closed:
+        mark_changed(db, gym_id, "attendance")
+    return closed
+
+
+def _cutoff_groups(db: Session, gym_id: uuid.UUID | None) -> tuple[dict[float, list[uuid.UUID]], list[uuid.UUID]]:
+    """
+    ({cutoff_hours: gym_ids} for gyms with their own cutoff, all such gym ids).
+    Gyms without an override share the default cutoff and are swept together.
+    """
+    query = select(Gym.id, Gym.settings)
+    if gym_id is not None:
+        query = query.where(Gym.id == gym_id)
+    default = float(settings.attendance_auto_checkout_hours)
+    groups: dict[float, list[uuid.UUID]] = defaultdict(list)
+    overridden: list[uuid.UUID] = []
+    for row_gym_id, gym_settings in db.execute(query).all():
+        hours = gym_cutoff_hours(gym_settings)
+        if hours != default:
+            overridden.append(row_gym_id)
+            if hours > 0:
+                groups[hours].append(row_gym_id)
+    return groups, overridden
+
+
+def _close_batch(
+    db: Session,
+    *,
+    gym_filter,
+    cutoff_hours: float,
+    now: datetime,
+    batch_size: int,
+) -> list[uuid.UUID]:
+    """Close up to batch_size stale sessions matching gym_filter. Returns their gym ids."""
+    cutoff = timedelta(hours=cutoff_hours)
+    rows = db.execute(
+        select(Attendance.id, Attendance.gym_id, Attendance.check_in_time)
+        .where(
+            and_(
+                gym_filter,
+                Attendance.check_out_time.is_(None),
+                Attendance.check_in_time < now - cutoff,
+            )
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if rows:
+        # Bulk UPDATE by primary key: one executemany for the whole batch.
+        db.execute(
+            update(Attendance),
+            [
+                {"id": row.id, "check_out_time": _as_utc(row.check_in_time) + cutoff, "auto_closed": True}
+                for row in rows
+            ],
+        )
+        for row_gym_id in {row.gym_id for row in rows}:
+            mark_changed(db, row_gym_id, "attendance")
+    db.commit()
+    return [row.gym_id for row in rows]
+
+
+def run_attendance_auto_checkout(
+    db: Session,
+    *,
+    gym_id: uuid.UUID | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """
+    Close stale open sessions across all gyms (or one gym if gym_id is given).
+    A JobRun row records counts and duration.
+    Returns: run_id, closed, batches, gyms_affected, duration_ms.
+    """
+    now = now or datetime.now(timezone.utc)
+    batch_size = batch_size or settings.attendance_auto_checkout_batch_size
+
+    with job_run(db, JOB_NAME, gym_id=gym_id, counter="closed") as progress:
+        groups, overridden = _cutoff_groups(db, gym_id)
+        passes = [(hours, Attendance.gym_id.in_(ids)) for hours, ids in groups.items()]
+        default = float(settings.attendance_auto_checkout_hours)
+        if default > 0:
+            if gym_id is not None:
+                default_filter = Attendance.gym_id == gym_id if gym_id not in overridden else None
+            else:
+                default_filter = Attendance.gym_id.not_in(overridden) if overridden else true()
+            if default_filter is not None:
+                passes.append((default, default_filter))
+
+        for cutoff_hours, gym_filter in passes:
+            while progress.batches < MAX_BATCHES:
+                gym_ids = _close_batch(
+                    db, gym_filter=gym_filter, cutoff_hours=cutoff_hours, now=now, batch_size=batch_size
+                )
+                if not gym_ids:
+                    break
+                progress.add_batch(len(gym_ids), gym_ids)
+                if len(gym_ids) < batch_size:
+                    break
+    return progress.summary
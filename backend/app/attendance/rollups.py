@@ -0,0 +1,224 @@
+"""
+Incremental attendance rollups (per gym, per local day, per local hour).
+
+Buckets use the gym's timezone (gym_zone), so "peak hour" and day
+boundaries match the front desk's clock; Asia/Kolkata's half-hour offset
+means UTC buckets could not be remapped afterwards.
+
+Writers call record_check_in / record_check_out in the same transaction as
+the attendance change (caller commits). rebuild_rollups recomputes a date
+range from the attendance table, e.g. after a historical import or a change
+of the gym's timezone.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.core.gym_time import gym_zone
+from app.models import Attendance, AttendanceHourlyRollup
+
+_COUNTERS = ("check_ins", "unique_members", "sessions_closed", "session_seconds")
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC.
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _bucket(ts: datetime, zone: ZoneInfo) -> tuple[date, int]:
+    local = _as_utc(ts).astimezone(zone)
+    return local.date(), local.hour
+
+
+def rollup_day(ts: datetime, zone: ZoneInfo) -> date:
+    """Local day bucket a timestamp is counted under."""
+    return _bucket(ts, zone)[0]
+
+
+def _day_bounds(day: date, zone: ZoneInfo) -> tuple[datetime, datetime]:
+    """UTC instants of the local day's start and the next day's start."""
+    start = datetime.combine(day, time.min, tzinfo=zone).astimezone(timezone.utc)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=zone).astimezone(timezone.utc)
+    return start, end
+
+
+def _bump(db: Session, gym_id: uuid.UUID, day: date, hour: int, **deltas: int) -> None:
+    """Add deltas to one bucket (INSERT ... ON CONFLICT DO UPDATE)."""
+    insert = dialect_insert(db)
+    values = {name: 0 for name in _COUNTERS}
+    values.update(deltas)
+    stmt = insert(AttendanceHourlyRollup).values(gym_id=gym_id, day=day, hour=hour, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["gym_id", "day", "hour"],
+        set_={
+            name: getattr(AttendanceHourlyRollup, name) + stmt.excluded[name]
+            for name in deltas
+        } | {"updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def record_check_in(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    member_id: uuid.UUID,
+    check_in_time: datetime,
+) -> None:
+    """
+    Count a new check-in. Safe to call before or after the attendance row is flushed.
+    If the member already has an earlier check-in that day, only check_ins moves;
+    an out-of-order (earlier) punch moves the unique-member credit to its hour.
+    """
+    zone = gym_zone(db, gym_id)
+    day, hour = _bucket(check_in_time, zone)
+    day_start, day_end = _day_bounds(day, zone)
+    earliest_other = db.execute(
+        select(func.min(Attendance.check_in_time)).where(
+            and_(
+                Attendance.gym_id == gym_id,
+                Attendance.member_id == member_id,
+                Attendance.check_in_time >= day_start,
+                Attendance.check_in_time < day_end,
+                Attendance.check_in_time != check_in_time,
+            )
+        )
+    ).scalar()
+
+    if earliest_other is None:
+        _bump(db, gym_id, day, hour, check_ins=1, unique_members=1)
+    elif _as_utc(earliest_other) > _as_utc(check_in_time):
+        _, old_hour = _bucket(earliest_other, zone)
+        _bump(db, gym_id, day, old_hour, unique_members=-1)
+        _bump(db, gym_id, day, hour, check_ins=1, unique_members=1)
+    else:
+        _bump(db, gym_id, day, hour, check_ins=1)
+
+
+def record_check_out(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    check_in_time: datetime,
+    check_out_time: datetime,
+) -> None:
+    """Count a closed session against its check-in hour."""
+    day, hour = _bucket(check_in_time, gym_zone(db, gym_id))
+    seconds = int((_as_utc(check_out_time) - _as_utc(check_in_time)).total_seconds())
+    _bump(db, gym_id, day, hour, sessions_closed=1, session_seconds=max(seconds, 0))
+
+
+def rebuild_rollups(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+) -> int:
+    """
+    Recompute rollups for [from_date, to_date] from attendance. Caller commits.
+    Returns number of hourly buckets written.
+    """
+    zone = gym_zone(db, gym_id)
+    range_start, _ = _day_bounds(from_date, zone)
+    _, range_end = _day_bounds(to_date, zone)
+
+    rows = db.execute(
+        select(
+            Attendance.member_id,
+            Attendance.check_in_time,
+            Attendance.check_out_time,
+            Attendance.auto_closed,
+        )
+        .where(
+            and_(
+                Attendance.gym_id == gym_id,
+                Attendance.check_in_time >= range_start,
+                Attendance.check_in_time < range_end,
+            )
+        )
+        .order_by(Attendance.check_in_time)
+    ).all()
+
+    buckets: dict[tuple[date, int], dict[str, int]] = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+    seen_today: set[tuple[date, uuid.UUID]] = set()
+    for member_id, check_in_time, check_out_time, auto_closed in rows:
+        day, hour = _bucket(check_in_time, zone)
+        counters = buckets[(day, hour)]
+        counters["check_ins"] += 1
+        if (day, member_id) not in seen_today:
+            seen_today.add((day, member_id))
+            counters["unique_members"] += 1
+        # Sweeper-closed sessions have no real duration.
+        if check_out_time is not None and not auto_closed:
+            seconds = int((_as_utc(check_out_time) - _as_utc(check_in_time)).total_seconds())
+            counters["sessions_closed"] += 1
+            counters["session_seconds"] += max(seconds, 0)
+
+    db.execute(
+        delete(AttendanceHourlyRollup).where(
+            and_(
+                AttendanceHourlyRollup.gym_id == gym_id,
+                AttendanceHourlyRollup.day >= from_date,
+                AttendanceHourlyRollup.day <= to_date,
+            )
+        )
+    )
+    if buckets:
+        db.execute(
+            AttendanceHourlyRollup.__table__.insert(),
+            [
+                {"gym_id": gym_id, "day": day, "hour": hour, **counters}
+                for (day, hour), counters in sorted(buckets.items())
+            ],
+        )
+    return len(buckets)
+
+
+def get_hourly_rollups(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+) -> list[AttendanceHourlyRollup]:
+    """Rollup rows for a date range, ordered by day and hour."""
+    return list(
+        db.execute(
+            select(AttendanceHourlyRollup)
+            .where(
+                and_(
+                    AttendanceHourlyRollup.gym_id == gym_id,
+                    AttendanceHourlyRollup.day >= from_date,
+                    AttendanceHourlyRollup.day <= to_date,
+                )
+            )
+            .order_by(AttendanceHourlyRollup.day, AttendanceHourlyRollup.hour)
+        ).scalars().all()
+    )
+
+
+def get_day_totals(db: Session, *, gym_id: uuid.UUID, day: date) -> tuple[int, int, int, int]:
+    """(check_ins, unique_members, sessions_closed, session_seconds) for one day."""
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(AttendanceHourlyRollup.check_ins), 0),
+            func.coalesce(func.sum(AttendanceHourlyRollup.unique_members), 0),
+            func.coalesce(func.sum(AttendanceHourlyRollup.sessions_closed), 0),
+            func.coalesce(func.sum(AttendanceHourlyRollup.session_seconds), 0),
+        ).where(
+            and_(
+                AttendanceHourlyRollup.gym_id == gym_id,
+                AttendanceHourlyRollup.day == day,
+            )
+        )
+    ).first()
+    return tuple(int(v or 0) for v in row)  # type: ignore[return-value]
@@ -5,20 +5,27 @@ Attendance management API endpoints.
 import uuid
 from datetime import date
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-from app.auth.dependencies import TenantDep, DbDep
+from app.auth.dependencies import AsyncDbDep, AsyncTenantDep, TenantDep, DbDep, require_manager_or_above
 from app.attendance.schemas import (
+    BatchCheckInRequest,
+    BatchCheckInResponse,
     CheckInRequest,
     AttendanceResponse,
     AttendanceListResponse,
     DailyAttendanceSummary,
+    AttendanceHeatmap,
+    RollupRebuildResult,
 )
 from app.attendance.service import AttendanceService
+from app.core.http_cache import CachePolicy, load_validators_async
 
 
 router = APIRouter()
 
+TODAY_CACHE = CachePolicy("attendance_today", scopes=("attendance",), daily=True)
+
 
 @router.post("/check-in", response_model=AttendanceResponse, status_code=status.HTTP_201_CREATED)
 def check_in_member(
@@ -49,6 +56,25 @@ def check_in_member(
     return service._build_response(attendance)
 
 
+@router.post("/check-in/batch", response_model=BatchCheckInResponse)
+def check_in_members_batch(
+    request: BatchCheckInRequest,
+    tenant: TenantDep,
+    db: DbDep,
+):
+    """
+    Check in up to 50 members at once (kiosk/QR scanners).
+
+    Each member gets its own status; one rejected member does not fail the batch.
+    """
+    service = AttendanceService(db)
+    return service.check_in_batch(
+        gym_id=tenant.gym_id,
+        member_ids=request.member_ids,
+        marked_by=tenant.user_id,
+    )
+
+
 @router.post("/check-out/{member_id}", response_model=AttendanceResponse)
 def check_out_member(
     member_id: str,
@@ -109,17 +135,23 @@ def list_attendance(
 
 
 @router.get("/today", response_model=DailyAttendanceSummary)
-def get_today_summary(
-    tenant: TenantDep,
-    db: DbDep,
+async def get_today_summary(
+    request: Request,
+    response: Response,
+    tenant: AsyncTenantDep,
+    db: AsyncDbDep,
 ):
     """
     Get today's attendance summary.
     
-    Quick overview of today's check-ins.
+    Quick overview of today's check-ins. Conditional (ETag / 304) on the
+    gym's attendance writes.
     """
-    service = AttendanceService(db)
-    return service.get_daily_summary(tenant.gym_id)
+    validators = await load_validators_async(db, request, TODAY_CACHE, tenant.gym_id)
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    return await db.run_sync(lambda s: AttendanceService(s).get_daily_summary(tenant.gym_id))
 
 
 @router.get("/daily-summary", response_model=DailyAttendanceSummary)
@@ -135,6 +167,55 @@ def get_daily_summary(
     return service.get_daily_summary(tenant.gym_id, target_date)
 
 
+def _validate_range(from_date: date, to_date: date) -> None:
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must be before or equal to to_date",
+        )
+    if (to_date - from_date).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date range cannot exceed 366 days",
+        )
+
+
+@router.get("/heatmap", response_model=AttendanceHeatmap)
+def get_attendance_heatmap(
+    tenant: TenantDep,
+    db: DbDep,
+    from_date: date = Query(..., description="Start date"),
+    to_date: date = Query(..., description="End date"),
+):
+    """
+    Hourly check-in heatmap for a date range, in gym-local hours
+    (gym.settings['timezone'], default GYM_DEFAULT_TIMEZONE).
+    
+    Reads pre-aggregated rollups, so cost grows with days, not visits.
+    """
+    _validate_range(from_date, to_date)
+    service = AttendanceService(db)
+    return service.get_heatmap(tenant.gym_id, from_date, to_date)
+
+
+@router.post("/rollups/rebuild", response_model=RollupRebuildResult)
+def rebuild_attendance_rollups(
+    tenant: TenantDep,
+    db: DbDep,
+    from_date: date = Query(..., description="Start date"),
+    to_date: date = Query(..., description="End date"),
+    _: object = Depends(require_manager_or_above),
+):
+    """
+    Recompute attendance rollups for a date range from raw attendance.
+    Use after bulk imports or manual data fixes.
+    """
+    _validate_range(from_date, to_date)
+    service = AttendanceService(db)
+    written = service.rebuild_rollups(tenant.gym_id, from_date, to_date)
+    return RollupRebuildResult(from_date=from_date, to_date=to_date, buckets_written=written)
+
+
 @router.get("/currently-in", response_model=list[AttendanceResponse])
 def get_currently_checked_in(
     tenant: TenantDep,
@@ -4,7 +4,9 @@ Pydantic schemas for attendance management.
 
 import uuid
 from datetime import datetime, date
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 
 class CheckInRequest(BaseModel):
@@ -12,6 +14,25 @@ class CheckInRequest(BaseModel):
     member_id: uuid.UUID
 
 
+class BatchCheckInRequest(BaseModel):
+    """Several members at once (kiosk/QR scanners)."""
+    member_ids: list[uuid.UUID] = Field(..., min_length=1, max_length=50)
+
+
+class BatchCheckInItem(BaseModel):
+    """Per-member outcome of a batch check-in."""
+    member_id: uuid.UUID
+    status: Literal["checked_in", "already_checked_in", "not_found"]
+    attendance_id: uuid.UUID | None = None
+    check_in_time: datetime | None = None
+
+
+class BatchCheckInResponse(BaseModel):
+    """Batch check-in results, in request order (duplicates collapsed)."""
+    checked_in: int
+    results: list[BatchCheckInItem]
+
+
 class CheckOutRequest(BaseModel):
     """Schema for checking out a member."""
     pass  # Just needs authentication, member_id comes from path
@@ -25,6 +46,7 @@ class AttendanceResponse(BaseModel):
     check_in_time: datetime
     check_out_time: datetime | None
     marked_by: uuid.UUID | None
+    auto_closed: bool = False
     
     # Related info
     member_name: str | None = None
@@ -49,6 +71,36 @@ class DailyAttendanceSummary(BaseModel):
     date: date
     total_check_ins: int
     unique_members: int
+    avg_session_minutes: float | None = None
+
+
+class HourlyAttendanceCell(BaseModel):
+    """
+    One (day, hour) bucket of the attendance heatmap, in gym-local hours
+    (gym.settings['timezone'], default GYM_DEFAULT_TIMEZONE).
+    """
+    date: date
+    hour: int
+    check_ins: int
+    unique_members: int
+    avg_session_minutes: float | None = None
+
+
+class AttendanceHeatmap(BaseModel):
+    """Hourly attendance over a date range, read from rollups."""
+    from_date: date
+    to_date: date
+    total_check_ins: int
+    by_hour: list[int]  # 24 entries: check-ins per hour of day across the range
+    peak_hour: int | None
+    cells: list[HourlyAttendanceCell]
+
+
+class RollupRebuildResult(BaseModel):
+    """Result of rebuilding attendance rollups for a date range."""
+    from_date: date
+    to_date: date
+    buckets_written: int
 
 
 class AttendanceListResponse(BaseModel):
@@ -5,18 +5,33 @@ Attendance management service.
 import uuid
 from datetime import datetime, date, timezone, timedelta
 
-from sqlalchemy import select, func
+from sqlalchemy import and_, func, literal, select, union_all
 from sqlalchemy.orm import Session
 
 from app.models import Attendance, Member, User
+from app.attendance import rollups
+from app.attendance.auto_checkout import close_stale_sessions
+from app.core.change_counters import mark_changed
+from app.core.database import dialect_insert
+from app.core.gym_time import local_day_start, local_today
 from app.attendance.schemas import (
     AttendanceResponse,
     AttendanceSummary,
     DailyAttendanceSummary,
     AttendanceListResponse,
+    AttendanceHeatmap,
+    BatchCheckInItem,
+    BatchCheckInResponse,
+    HourlyAttendanceCell,
 )
 
 
+def _avg_minutes(sessions_closed: int, session_seconds: int) -> float | None:
+    if not sessions_closed:
+        return None
+    return round(session_seconds / sessions_closed / 60, 1)
+
+
 class AttendanceService:
     """Service class for attendance operations."""
     
@@ -42,24 +57,83 @@ class AttendanceService:
             check_in_time=attendance.check_in_time,
             check_out_time=attendance.check_out_time,
             marked_by=attendance.marked_by,
+            auto_closed=bool(attendance.auto_closed),
             member_name=member.name if member else None,
             member_phone=member.phone if member else None,
             marked_by_name=marker.name if marker else None,
         )
     
-    def _build_summary(self, attendance: Attendance) -> AttendanceSummary:
-        """Build summary for lists."""
-        member = self.db.execute(
-            select(Member).where(Member.id == attendance.member_id)
-        ).scalar_one_or_none()
-        
-        return AttendanceSummary(
-            id=attendance.id,
-            member_name=member.name if member else "Unknown",
-            check_in_time=attendance.check_in_time,
-            check_out_time=attendance.check_out_time,
+    def _insert_check_ins(
+        self,
+        gym_id: uuid.UUID,
+        member_ids: list[uuid.UUID],
+        marked_by: uuid.UUID | None,
+        now: datetime,
+    ) -> dict[uuid.UUID, uuid.UUID]:
+        """
+        Check in members with one INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+        Rows are only inserted for active members of the gym. The unique
+        partial index idx_attendance_open (one open session per member) is the
+        "already checked in" guard, so two concurrent check-ins cannot both
+        insert. Sessions left open from before the gym's local today are
+        closed first, so only a session opened today counts as checked in.
+        Returns {member_id: attendance_id} for the rows inserted; caller commits.
+        """
+        close_stale_sessions(self.db, gym_id, member_ids, before=local_day_start(self.db, gym_id, now))
+        id_type = Attendance.__table__.c.id.type
+        requested = [
+            select(
+                literal(uuid.uuid4(), id_type).label("id"),
+                literal(member_id, id_type).label("member_id"),
+            )
+            for member_id in member_ids
+        ]
+        req = (union_all(*requested) if len(requested) > 1 else requested[0]).subquery("req")
+
+        source = (
+            select(
+                req.c.id,
+                literal(gym_id, id_type),
+                req.c.member_id,
+                literal(now, Attendance.__table__.c.check_in_time.type),
+                literal(marked_by, id_type),
+            )
+            .join(Member, Member.id == req.c.member_id)
+            .where(
+                and_(
+                    Member.gym_id == gym_id,
+                    Member.is_active == True,  # noqa: E712
+                )
+            )
         )
-    
+        rows = self.db.execute(
+            dialect_insert(self.db)(Attendance)
+            .from_select(["id", "gym_id", "member_id", "check_in_time", "marked_by"], source)
+            .on_conflict_do_nothing(
+                index_elements=["gym_id", "member_id"],
+                index_where=Attendance.check_out_time.is_(None),
+            )
+            .returning(Attendance.member_id, Attendance.id)
+        ).all()
+        inserted = {member_id: attendance_id for member_id, attendance_id in rows}
+        if inserted:
+            mark_changed(self.db, gym_id, "attendance")
+        for member_id in inserted:
+            rollups.record_check_in(self.db, gym_id=gym_id, member_id=member_id, check_in_time=now)
+        return inserted
+
+    def _active_member_ids(self, gym_id: uuid.UUID, member_ids: list[uuid.UUID]) -> set[uuid.UUID]:
+        return set(
+            self.db.execute(
+                select(Member.id).where(
+                    Member.gym_id == gym_id,
+                    Member.id.in_(member_ids),
+                    Member.is_active == True,  # noqa: E712
+                )
+            ).scalars().all()
+        )
+
     def check_in(
         self,
         gym_id: uuid.UUID,
@@ -69,47 +143,57 @@ class AttendanceService:
         """
         Check in a member.
         
-        Creates a new attendance record with current timestamp.
+        Creates a new attendance record with current timestamp. Member validation
+        and the "already checked in" guard (an open session) run inside the INSERT itself.
         """
-        # Verify member exists and is active
-        member = self.db.execute(
-            select(Member).where(
-                Member.gym_id == gym_id,
-                Member.id == member_id,
-                Member.is_active == True,  # noqa: E712
-            )
-        ).scalar_one_or_none()
-        
-        if not member:
-            raise ValueError("Member not found or inactive")
-        
-        # Check if already checked in today (without checkout)
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        existing = self.db.execute(
-            select(Attendance).where(
-                Attendance.gym_id == gym_id,
-                Attendance.member_id == member_id,
-                Attendance.check_in_time >= today_start,
-                Attendance.check_out_time.is_(None),
-            )
-        ).scalar_one_or_none()
-        
-        if existing:
+        now = datetime.now(timezone.utc)
+        inserted = self._insert_check_ins(gym_id, [member_id], marked_by, now)
+        if not inserted:
+            # Slow path only on failure: work out which check rejected the row.
+            if not self._active_member_ids(gym_id, [member_id]):
+                raise ValueError("Member not found or inactive")
             raise ValueError("Member is already checked in. Please check out first.")
-        
-        attendance = Attendance(
+        self.db.commit()
+
+        return Attendance(
+            id=inserted[member_id],
             gym_id=gym_id,
             member_id=member_id,
-            check_in_time=datetime.now(timezone.utc),
+            check_in_time=now,
+            check_out_time=None,
             marked_by=marked_by,
+            auto_closed=False,
         )
-        
-        self.db.add(attendance)
+
+    def check_in_batch(
+        self,
+        gym_id: uuid.UUID,
+        member_ids: list[uuid.UUID],
+        marked_by: uuid.UUID | None = None,
+    ) -> BatchCheckInResponse:
+        """Check in several members (kiosk/QR scanners) in one statement and one commit."""
+        unique_ids = list(dict.fromkeys(member_ids))
+        now = datetime.now(timezone.utc)
+        inserted = self._insert_check_ins(gym_id, unique_ids, marked_by, now)
         self.db.commit()
-        self.db.refresh(attendance)
-        
-        return attendance
+
+        rejected = [m for m in unique_ids if m not in inserted]
+        active = self._active_member_ids(gym_id, rejected) if rejected else set()
+        results = []
+        for member_id in unique_ids:
+            if member_id in inserted:
+                results.append(
+                    BatchCheckInItem(
+                        member_id=member_id,
+                        status="checked_in",
+                        attendance_id=inserted[member_id],
+                        check_in_time=now,
+                    )
+                )
+            else:
+                status = "already_checked_in" if member_id in active else "not_found"
+                results.append(BatchCheckInItem(member_id=member_id, status=status))
+        return BatchCheckInResponse(checked_in=len(inserted), results=results)
     
     def check_out(
         self,
@@ -134,6 +218,12 @@ class AttendanceService:
             raise ValueError("No active check-in found for this member")
         
         attendance.check_out_time = datetime.now(timezone.utc)
+        rollups.record_check_out(
+            self.db,
+            gym_id=gym_id,
+            check_in_time=attendance.check_in_time,
+            check_out_time=attendance.check_out_time,
+        )
         self.db.commit()
         self.db.refresh(attendance)
         
@@ -185,11 +275,26 @@ class AttendanceService:
         query = query.order_by(Attendance.check_in_time.desc())
         query = query.offset(offset).limit(page_size)
         
-        result = self.db.execute(query)
-        records = result.scalars().all()
+        # Row tuples with the member name joined in, instead of entities plus a lookup per row
+        rows = self.db.execute(
+            query.with_only_columns(
+                Attendance.id,
+                Member.name,
+                Attendance.check_in_time,
+                Attendance.check_out_time,
+            ).outerjoin(Member, Member.id == Attendance.member_id)
+        ).all()
         
         return AttendanceListResponse(
-            items=[self._build_summary(r) for r in records],
+            items=[
+                AttendanceSummary(
+                    id=attendance_id,
+                    member_name=member_name or "Unknown",
+                    check_in_time=check_in_time,
+                    check_out_time=check_out_time,
+                )
+                for attendance_id, member_name, check_in_time, check_out_time in rows
+            ],
             total=total,
             page=page,
             page_size=page_size,
@@ -226,36 +331,68 @@ class AttendanceService:
         gym_id: uuid.UUID,
         target_date: date | None = None,
     ) -> DailyAttendanceSummary:
-        """Get daily attendance summary."""
-        target_date = target_date or date.today()
+        """Get daily attendance summary (from hourly rollups); defaults to the gym's today."""
+        target_date = target_date or local_today(self.db, gym_id)
         
-        day_start = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-        day_end = day_start + timedelta(days=1)
+        check_ins, unique_members, sessions_closed, session_seconds = rollups.get_day_totals(
+            self.db, gym_id=gym_id, day=target_date
+        )
         
-        # Count total check-ins
-        total_count = self.db.execute(
-            select(func.count()).where(
-                Attendance.gym_id == gym_id,
-                Attendance.check_in_time >= day_start,
-                Attendance.check_in_time < day_end,
-            )
-        ).scalar() or 0
+        return DailyAttendanceSummary(
+            date=target_date,
+            total_check_ins=check_ins,
+            unique_members=unique_members,
+            avg_session_minutes=_avg_minutes(sessions_closed, session_seconds),
+        )
+    
+    def get_heatmap(
+        self,
+        gym_id: uuid.UUID,
+        from_date: date,
+        to_date: date,
+    ) -> AttendanceHeatmap:
+        """Hourly check-in heatmap for a date range (O(days), reads rollups only)."""
+        rows = rollups.get_hourly_rollups(
+            self.db, gym_id=gym_id, from_date=from_date, to_date=to_date
+        )
         
-        # Count unique members
-        unique_count = self.db.execute(
-            select(func.count(func.distinct(Attendance.member_id))).where(
-                Attendance.gym_id == gym_id,
-                Attendance.check_in_time >= day_start,
-                Attendance.check_in_time < day_end,
+        by_hour = [0] * 24
+        cells = []
+        for row in rows:
+            by_hour[row.hour] += row.check_ins
+            cells.append(
+                HourlyAttendanceCell(
+                    date=row.day,
+                    hour=row.hour,
+                    check_ins=row.check_ins,
+                    unique_members=row.unique_members,
+                    avg_session_minutes=_avg_minutes(row.sessions_closed, row.session_seconds),
+                )
             )
-        ).scalar() or 0
         
-        return DailyAttendanceSummary(
-            date=target_date,
-            total_check_ins=total_count,
-            unique_members=unique_count,
+        total = sum(by_hour)
+        return AttendanceHeatmap(
+            from_date=from_date,
+            to_date=to_date,
+            total_check_ins=total,
+            by_hour=by_hour,
+            peak_hour=by_hour.index(max(by_hour)) if total else None,
+            cells=cells,
         )
     
+    def rebuild_rollups(
+        self,
+        gym_id: uuid.UUID,
+        from_date: date,
+        to_date: date,
+    ) -> int:
+        """Recompute hourly rollups for a date range from raw attendance."""
+        written = rollups.rebuild_rollups(
+            self.db, gym_id=gym_id, from_date=from_date, to_date=to_date
+        )
+        self.db.commit()
+        return written
+    
     def get_currently_checked_in(
         self,
         gym_id: uuid.UUID,
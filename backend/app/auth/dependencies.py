@@ -9,12 +9,14 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, Header, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import and_, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, lazyload
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_async_read_db, get_db, get_read_db
 from app.core.security import decode_token
 from app.core.exceptions import credentials_exception, permission_exception
-from app.models import User, Gym, BiometricDevice
+from app.models import User, Gym
+from app.biometric.resolver import DeviceToken, resolve_device_token
 from app.models.enums import UserRole
 from app.auth.schemas import CurrentUser
 
@@ -23,19 +25,8 @@ from app.auth.schemas import CurrentUser
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Annotated[Session, Depends(get_db)],
-) -> User:
-    """
-    Dependency to get the current authenticated user from JWT.
-    
-    Usage:
-        @app.get("/protected")
-        def protected_route(current_user: User = Depends(get_current_user)):
-            ...
-    """
-    token = credentials.credentials
+def _user_id_from_token(token: str) -> uuid.UUID:
+    """User id of a valid access token; raises 401 otherwise."""
     payload = decode_token(token)
     
     if not payload:
@@ -50,30 +41,30 @@ async def get_current_user(
         raise credentials_exception
     
     try:
-        user_uuid = uuid.UUID(user_id)
+        return uuid.UUID(user_id)
     except ValueError:
         raise credentials_exception
-    
-    # Fetch user from database
-    user = db.execute(
-        select(User).where(
+
+
+def _active_user_query(user_uuid: uuid.UUID):
+    # Fetch user and whether their gym is active in one round trip
+    return (
+        select(User, Gym.is_active)
+        .outerjoin(Gym, Gym.id == User.gym_id)
+        .where(
             User.id == user_uuid,
             User.is_active == True,  # noqa: E712
         )
-    ).scalar_one_or_none()
-    
-    if not user:
+    )
+
+
+def _checked_user(row) -> User:
+    if not row:
         raise credentials_exception
+    user, gym_active = row
     
     # Check gym is active
-    gym = db.execute(
-        select(Gym).where(
-            Gym.id == user.gym_id,
-            Gym.is_active == True,  # noqa: E712
-        )
-    ).scalar_one_or_none()
-    
-    if not gym:
+    if not gym_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Gym account is suspended or inactive",
@@ -82,6 +73,31 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[Session, Depends(get_db)],
+) -> User:
+    """
+    Dependency to get the current authenticated user from JWT.
+    
+    Usage:
+        @app.get("/protected")
+        def protected_route(current_user: User = Depends(get_current_user)):
+            ...
+    """
+    user_uuid = _user_id_from_token(credentials.credentials)
+    return _checked_user(db.execute(_active_user_query(user_uuid)).one_or_none())
+
+
+async def get_async_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+) -> User:
+    """get_current_user for routes on the async session (AsyncDbDep)."""
+    user_uuid = _user_id_from_token(credentials.credentials)
+    return _checked_user((await db.execute(_active_user_query(user_uuid))).one_or_none())
+
+
 async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
@@ -116,10 +132,23 @@ def require_role(*allowed_roles: UserRole):
     return role_checker
 
 
+def require_role_async(*allowed_roles: UserRole):
+    """require_role for routes on the async session (AsyncDbDep)."""
+    async def role_checker(
+        current_user: Annotated[User, Depends(get_async_current_user)],
+    ) -> User:
+        if current_user.role not in allowed_roles:
+            raise permission_exception
+        return current_user
+    
+    return role_checker
+
+
 # Pre-built role dependencies
 require_owner = require_role(UserRole.OWNER)
 require_manager_or_above = require_role(UserRole.OWNER, UserRole.MANAGER)
 require_staff_or_above = require_role(UserRole.OWNER, UserRole.MANAGER, UserRole.STAFF)
+require_manager_or_above_async = require_role_async(UserRole.OWNER, UserRole.MANAGER)
 
 
 class TenantContext:
@@ -146,15 +175,15 @@ class TenantContext:
 class BiometricDeviceTenantContext:
     """
     Tenant context for biometric agents that authenticate with a device token (no user JWT).
+    Built from the cached token lookup, so it carries ids rather than ORM rows.
     """
 
-    def __init__(self, gym: Gym, device: BiometricDevice):
+    def __init__(self, gym_id: uuid.UUID, device_id: uuid.UUID):
         self.user = None
-        self.gym = gym
-        self.gym_id = gym.id
+        self.gym_id = gym_id
         self.user_id = None
         self.role = None
-        self.device = device
+        self.device_id = device_id
 
 
 async def get_tenant_context(
@@ -167,10 +196,29 @@ async def get_tenant_context(
     This is the RECOMMENDED way to access gym_id in route handlers.
     It ensures proper tenant isolation.
     """
-    gym = db.execute(
-        select(Gym).where(Gym.id == current_user.gym_id)
-    ).scalar_one_or_none()
-    
+    gym = db.execute(_tenant_gym_query(current_user)).scalar_one_or_none()
+    return _tenant_context(current_user, gym)
+
+
+async def get_async_tenant_context(
+    current_user: Annotated[User, Depends(get_async_current_user)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+) -> TenantContext:
+    """get_tenant_context for routes on the async session (AsyncDbDep)."""
+    gym = (await db.execute(_tenant_gym_query(current_user))).scalar_one_or_none()
+    return _tenant_context(current_user, gym)
+
+
+def _tenant_gym_query(current_user: User):
+    # Routes use the gym row itself, not its users/plans collections
+    return (
+        select(Gym)
+        .where(Gym.id == current_user.gym_id)
+        .options(lazyload(Gym.users), lazyload(Gym.plans))
+    )
+
+
+def _tenant_context(current_user: User, gym: Gym | None) -> TenantContext:
     if not gym:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -180,6 +228,17 @@ async def get_tenant_context(
     return TenantContext(user=current_user, gym=gym)
 
 
+def lookup_biometric_device(db: Session, token: str) -> DeviceToken | None:
+    """
+    Resolve a device ingest token to its active device (cached per token hash).
+    None for an unknown/inactive token; check gym_active before accepting events.
+    """
+    import hashlib
+
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    return resolve_device_token(db, token_hash)
+
+
 async def get_biometric_device_tenant_context(
     db: Annotated[Session, Depends(get_db)],
     x_biometric_token: Annotated[str | None, Header(alias="X-Biometric-Token")] = None,
@@ -192,32 +251,30 @@ async def get_biometric_device_tenant_context(
     if not x_biometric_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing X-Biometric-Token")
 
-    import hashlib
-
-    token_hash = hashlib.sha256(x_biometric_token.encode("utf-8")).hexdigest()
-    device = db.execute(
-        select(BiometricDevice).where(
-            and_(
-                BiometricDevice.ingest_token_hash == token_hash,
-                BiometricDevice.is_active == True,  # noqa: E712
-            )
-        )
-    ).scalar_one_or_none()
+    device = lookup_biometric_device(db, x_biometric_token)
     if not device:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid biometric token")
+    if not device.gym_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Gym inactive")
 
-    gym = db.execute(
-        select(Gym).where(
-            and_(
-                Gym.id == device.gym_id,
-                Gym.is_active == True,  # noqa: E712
-            )
-        )
-    ).scalar_one_or_none()
-    if not gym:
+    return BiometricDeviceTenantContext(gym_id=device.gym_id, device_id=device.device_id)
+
+
+async def get_async_biometric_device_tenant_context(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    x_biometric_token: Annotated[str | None, Header(alias="X-Biometric-Token")] = None,
+) -> BiometricDeviceTenantContext:
+    """get_biometric_device_tenant_context for routes on the async session (AsyncDbDep)."""
+    if not x_biometric_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing X-Biometric-Token")
+
+    device = await db.run_sync(lookup_biometric_device, x_biometric_token)
+    if not device:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid biometric token")
+    if not device.gym_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Gym inactive")
 
-    return BiometricDeviceTenantContext(gym=gym, device=device)
+    return BiometricDeviceTenantContext(gym_id=device.gym_id, device_id=device.device_id)
 
 
 async def require_super_admin(
@@ -236,5 +293,15 @@ async def require_super_admin(
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
 TenantDep = Annotated[TenantContext, Depends(get_tenant_context)]
 DbDep = Annotated[Session, Depends(get_db)]
+# Report / admin / portal reads: replica when configured (see app.core.database.get_read_db)
+ReadDbDep = Annotated[Session, Depends(get_read_db)]
 SuperAdminDep = Annotated[User, Depends(require_super_admin)]
 BiometricDeviceTenantDep = Annotated[BiometricDeviceTenantContext, Depends(get_biometric_device_tenant_context)]
+
+# Async session variants (I/O-bound hot paths; see app.core.database.get_async_db)
+AsyncDbDep = Annotated[AsyncSession, Depends(get_async_db)]
+AsyncReadDbDep = Annotated[AsyncSession, Depends(get_async_read_db)]
+AsyncTenantDep = Annotated[TenantContext, Depends(get_async_tenant_context)]
+AsyncBiometricDeviceTenantDep = Annotated[
+    BiometricDeviceTenantContext, Depends(get_async_biometric_device_tenant_context)
+]
@@ -9,6 +9,7 @@ from datetime import datetime, timezone
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.biometric import resolver
 from app.core.config import settings
 from app.core.security import (
     hash_password,
@@ -455,3 +456,5 @@ class AuthService:
                 gym.is_active = False
 
         self.db.commit()
+        if user.role == UserRole.OWNER:
+            resolver.invalidate_gym_devices(user.gym_id)
@@ -12,6 +12,7 @@ from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.metrics import track_job
 from app.models import AutomationCampaign, Gym, Member, Notification
 from app.models.enums import CampaignTriggerType, MembershipStatus, NotificationType
 from app.automation.send_service import send_campaign_message, send_campaign_message_email
@@ -85,27 +86,26 @@ def ensure_default_campaign(
     return campaign
 
 
-def already_notified_today(
+def notified_today(
     db: Session,
     *,
     gym_id,
-    member_id,
     notification_type: NotificationType,
-) -> bool:
+) -> set[uuid.UUID]:
+    """Member ids that already got a notification of this type today (one query per gym)."""
     today_start = datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc)
-    return bool(
+    return set(
         db.execute(
-            select(Notification.id)
+            select(Notification.member_id)
             .where(
                 and_(
                     Notification.gym_id == gym_id,
-                    Notification.member_id == member_id,
                     Notification.notification_type == notification_type,
                     Notification.created_at >= today_start,
                 )
             )
-            .limit(1)
-        ).scalar_one_or_none()
+            .distinct()
+        ).scalars()
     )
 
 
@@ -204,17 +204,14 @@ def run_renewal_and_payment_automation(db: Session) -> dict[str, Any]:
         # Dedupe by member_id so one message per member per campaign per run
         seen_renewal: set[uuid.UUID] = set()
         seen_dues: set[uuid.UUID] = set()
+        notified_renewal = notified_today(db, gym_id=gym.id, notification_type=NotificationType.EXPIRY_REMINDER)
+        notified_dues = notified_today(db, gym_id=gym.id, notification_type=NotificationType.PAYMENT_DUE)
         for campaign in campaigns:
             if campaign.trigger_type == CampaignTriggerType.RENEWAL_REMINDER:
                 for membership, member in expiring_rows:
                     if member.id in seen_renewal:
                         continue
-                    if already_notified_today(
-                        db,
-                        gym_id=gym.id,
-                        member_id=member.id,
-                        notification_type=NotificationType.EXPIRY_REMINDER,
-                    ):
+                    if member.id in notified_renewal:
                         continue
                     seen_renewal.add(member.id)
                     days_left = (membership.end_date - today).days
@@ -240,12 +237,7 @@ def run_renewal_and_payment_automation(db: Session) -> dict[str, Any]:
                 for membership, member in dues_rows:
                     if member.id in seen_dues:
                         continue
-                    if already_notified_today(
-                        db,
-                        gym_id=gym.id,
-                        member_id=member.id,
-                        notification_type=NotificationType.PAYMENT_DUE,
-                    ):
+                    if member.id in notified_dues:
                         continue
                     amount_due = float(membership.amount_total - membership.amount_paid)
                     if amount_due <= 0:
@@ -297,7 +289,12 @@ def run_inactivity_automation(db: Session, *, inactive_days: int = 7) -> dict[st
             .where(Attendance.gym_id == gym.id)
             .group_by(Attendance.member_id)
         ).all()
-        last_seen_by_member = {mid: last_seen for mid, last_seen in latest_rows if last_seen}
+        # SQLite returns naive datetimes; check-ins are stored as UTC.
+        last_seen_by_member = {
+            mid: last_seen if last_seen.tzinfo else last_seen.replace(tzinfo=timezone.utc)
+            for mid, last_seen in latest_rows
+            if last_seen
+        }
 
         # Active members with active membership only
         active_members = db.execute(
@@ -308,6 +305,17 @@ def run_inactivity_automation(db: Session, *, inactive_days: int = 7) -> dict[st
                 )
             )
         ).scalars().all()
+        with_active_membership = set(
+            db.execute(
+                select(Membership.member_id).where(
+                    and_(
+                        Membership.gym_id == gym.id,
+                        Membership.status == MembershipStatus.ACTIVE,
+                    )
+                )
+            ).scalars()
+        )
+        notified = notified_today(db, gym_id=gym.id, notification_type=NotificationType.CUSTOM)
 
         for member in active_members:
             last_seen = last_seen_by_member.get(member.id)
@@ -317,23 +325,9 @@ def run_inactivity_automation(db: Session, *, inactive_days: int = 7) -> dict[st
                 continue
 
             # Skip if no active membership (optional safety)
-            active_membership = db.execute(
-                select(Membership).where(
-                    and_(
-                        Membership.gym_id == gym.id,
-                        Membership.member_id == member.id,
-                        Membership.status == MembershipStatus.ACTIVE,
-                    )
-                ).order_by(Membership.end_date.desc())
-            ).scalar_one_or_none()
-            if not active_membership:
+            if member.id not in with_active_membership:
                 continue
-            if already_notified_today(
-                db,
-                gym_id=gym.id,
-                member_id=member.id,
-                notification_type=NotificationType.CUSTOM,
-            ):
+            if member.id in notified:
                 continue
 
             days_inactive = int((datetime.now(timezone.utc) - last_seen).total_seconds() // 86400)
@@ -359,6 +353,19 @@ def run_inactivity_automation(db: Session, *, inactive_days: int = 7) -> dict[st
 
 
 def run_all_automation(db: Session) -> dict[str, Any]:
-    base = run_renewal_and_payment_automation(db)
-    inactivity = run_inactivity_automation(db, inactive_days=7)
-    return {"renewal_payment": base, "inactivity": inactivity}
+    from app.attendance.auto_checkout import run_attendance_auto_checkout
+    from app.memberships.expiry_job import run_membership_expiry
+
+    # Expire first so reminders and dashboards see up-to-date statuses.
+    expiry = run_membership_expiry(db)
+    auto_checkout = run_attendance_auto_checkout(db)
+    with track_job("renewal_payment_automation"):
+        base = run_renewal_and_payment_automation(db)
+    with track_job("inactivity_automation"):
+        inactivity = run_inactivity_automation(db, inactive_days=7)
+    return {
+        "membership_expiry": expiry,
+        "attendance_auto_checkout": auto_checkout,
+        "renewal_payment": base,
+        "inactivity": inactivity,
+    }
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from app.core.config import settings
 from app.auth.dependencies import TenantDep, DbDep, require_manager_or_above
+from app.attendance.auto_checkout import run_attendance_auto_checkout
 from app.automation.cron_runner import run_all_automation, run_renewal_and_payment_automation
 from app.automation.reminder_list import get_reminder_list
 from app.automation.schemas import (
@@ -100,3 +101,18 @@ def run_cron(
         raise HTTPException(status_code=403, detail="Invalid or missing cron secret")
     # Run all automation types (renewal/payment + inactivity nudges)
     return run_all_automation(db)
+
+
+@router.get("/run-attendance-sweep")
+def run_attendance_sweep(
+    db: DbDep,
+    secret: str = Query(..., description="CRON_SECRET"),
+):
+    """
+    Close stale open attendance sessions (auto-checkout).
+    Safe to call often (e.g. hourly); also runs as part of /run-cron.
+    Requires: ?secret=<CRON_SECRET>
+    """
+    if not settings.cron_secret or secret != settings.cron_secret:
+        raise HTTPException(status_code=403, detail="Invalid or missing cron secret")
+    return run_attendance_auto_checkout(db)
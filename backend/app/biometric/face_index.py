@@ -0,0 +1,349 @@
+"""
+Per-gym face template index for camera-based identification.
+
+A gym's primary BiometricFaceEncoding templates are decoded once into a
+contiguous (n, FACE_DIM) float32 matrix of L2-normalised rows, so a probe is
+matched against every member with one matrix-vector product. The matrix is
+persisted as a memory-mapped .npy file per gym (plus a JSON sidecar with row
+ids), so workers and restarts warm up without decoding templates again.
+
+Each row carries its own similarity threshold derived from
+enrollment_quality: poorer enrollments need a closer match.
+
+Indexes are immutable snapshots. Enrolling or replacing a template builds a
+new snapshot with that row changed and swaps it in (one writer per gym at a
+time, so concurrent enrolments never build on the same snapshot); searches
+in flight keep using the old one. Other workers notice the change through the DB
+fingerprint (row count + latest updated_at), checked at most every
+face_index_check_seconds, and reload.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import log_error
+from app.models import BiometricFaceEncoding, Member
+
+FACE_DIM = 512
+
+# face_template_format values holding raw little-endian floats.
+_FLOAT32_FORMATS = {"float32", "f32", "raw_f32", "unknown"}
+_FLOAT64_FORMATS = {"float64", "f64"}
+
+
+@dataclass(frozen=True)
+class FaceMatch:
+    member_id: uuid.UUID
+    encoding_id: uuid.UUID
+    similarity: float
+    threshold: float
+
+
+def decode_template(blob: bytes, template_format: str | None) -> np.ndarray | None:
+    """L2-normalised float32 vector, or None if the template is not a raw FACE_DIM vector."""
+    fmt = (template_format or "unknown").lower()
+    if fmt in _FLOAT32_FORMATS and len(blob) == FACE_DIM * 4:
+        vector = np.frombuffer(blob, dtype="<f4").astype(np.float32)
+    elif fmt in _FLOAT64_FORMATS and len(blob) == FACE_DIM * 8:
+        vector = np.frombuffer(blob, dtype="<f8").astype(np.float32)
+    else:
+        return None
+    norm = float(np.linalg.norm(vector))
+    if not np.isfinite(norm) or norm == 0.0:
+        return None
+    return vector / norm
+
+
+def match_threshold(enrollment_quality) -> float:
+    """Cosine similarity a probe needs to match a template of this enrollment quality."""
+    quality = 0.5 if enrollment_quality is None else min(max(float(enrollment_quality), 0.0), 1.0)
+    return settings.face_match_min_similarity + (1.0 - quality) * settings.face_match_quality_margin
+
+
+def _fingerprint(db: Session, gym_id: uuid.UUID) -> str:
+    count, latest = db.execute(
+        select(func.count(BiometricFaceEncoding.id), func.max(BiometricFaceEncoding.updated_at)).where(
+            and_(
+                BiometricFaceEncoding.gym_id == gym_id,
+                BiometricFaceEncoding.is_primary == True,  # noqa: E712
+            )
+        )
+    ).one()
+    return f"{count}:{latest.isoformat() if latest else ''}"
+
+
+class GymFaceIndex:
+    """Immutable snapshot of one gym's primary templates."""
+
+    def __init__(
+        self,
+        gym_id: uuid.UUID,
+        matrix: np.ndarray,
+        encoding_ids: list[uuid.UUID],
+        member_ids: list[uuid.UUID],
+        thresholds: np.ndarray,
+        fingerprint: str,
+    ):
+        self.gym_id = gym_id
+        self.matrix = matrix
+        self.encoding_ids = encoding_ids
+        self.member_ids = member_ids
+        self.thresholds = thresholds
+        self.fingerprint = fingerprint
+        self.checked_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.encoding_ids)
+
+    def search(self, probe: np.ndarray, k: int = 5) -> list[FaceMatch]:
+        """Top-k members above their row threshold, best first (one row per member)."""
+        n = len(self)
+        if n == 0 or k <= 0:
+            return []
+        scores = self.matrix @ probe
+        # Over-fetch so members with several primary templates still yield k members.
+        take = min(n, k * 4)
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top])]
+
+        matches: list[FaceMatch] = []
+        seen: set[uuid.UUID] = set()
+        for row in top:
+            score = float(scores[row])
+            threshold = float(self.thresholds[row])
+            member_id = self.member_ids[row]
+            if score < threshold or member_id in seen:
+                continue
+            seen.add(member_id)
+            matches.append(FaceMatch(member_id, self.encoding_ids[row], score, threshold))
+            if len(matches) == k:
+                break
+        return matches
+
+    def with_rows(
+        self,
+        *,
+        remove: set[uuid.UUID],
+        add: list[tuple[uuid.UUID, uuid.UUID, np.ndarray, float]],
+        fingerprint: str,
+    ) -> "GymFaceIndex":
+        """New snapshot without `remove` encodings and with `add` rows (encoding, member, vector, threshold)."""
+        add = [row for row in add if row[0] not in remove]
+        dropped = remove | {row[0] for row in add}
+        keep = [i for i, enc_id in enumerate(self.encoding_ids) if enc_id not in dropped]
+
+        parts = [self.matrix[keep]] if keep else []
+        if add:
+            parts.append(np.stack([row[2] for row in add]).astype(np.float32))
+        matrix = np.concatenate(parts) if parts else np.empty((0, FACE_DIM), dtype=np.float32)
+        return GymFaceIndex(
+            self.gym_id,
+            np.ascontiguousarray(matrix),
+            [self.encoding_ids[i] for i in keep] + [row[0] for row in add],
+            [self.member_ids[i] for i in keep] + [row[1] for row in add],
+            np.concatenate(
+                [self.thresholds[keep], np.array([row[3] for row in add], dtype=np.float32)]
+            ).astype(np.float32),
+            fingerprint,
+        )
+
+
+def _index_dir() -> str:
+    return settings.face_index_dir or os.path.join(tempfile.gettempdir(), "activehq-face-index")
+
+
+def _paths(gym_id: uuid.UUID) -> tuple[str, str]:
+    base = os.path.join(_index_dir(), str(gym_id))
+    return base + ".npy", base + ".json"
+
+
+def _save(index: GymFaceIndex) -> None:
+    matrix_path, meta_path = _paths(index.gym_id)
+    os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+    # Write-then-rename so readers never map a half-written file.
+    tmp_matrix = f"{matrix_path}.{os.getpid()}.tmp"
+    with open(tmp_matrix, "wb") as fh:
+        np.save(fh, index.matrix)
+    tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_meta, "w") as fh:
+        json.dump(
+            {
+                "fingerprint": index.fingerprint,
+                "encoding_ids": [str(v) for v in index.encoding_ids],
+                "member_ids": [str(v) for v in index.member_ids],
+                "thresholds": index.thresholds.tolist(),
+            },
+            fh,
+        )
+    os.replace(tmp_matrix, matrix_path)
+    os.replace(tmp_meta, meta_path)
+
+
+def _load_file(gym_id: uuid.UUID, fingerprint: str) -> GymFaceIndex | None:
+    matrix_path, meta_path = _paths(gym_id)
+    try:
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        matrix = np.load(matrix_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if matrix.ndim != 2 or matrix.shape != (len(meta["encoding_ids"]), FACE_DIM):
+        return None
+    return GymFaceIndex(
+        gym_id,
+        matrix,
+        [uuid.UUID(v) for v in meta["encoding_ids"]],
+        [uuid.UUID(v) for v in meta["member_ids"]],
+        np.asarray(meta["thresholds"], dtype=np.float32),
+        fingerprint,
+    )
+
+
+def _build(db: Session, gym_id: uuid.UUID, fingerprint: str) -> GymFaceIndex:
+    rows = db.execute(
+        select(
+            BiometricFaceEncoding.id,
+            BiometricFaceEncoding.member_id,
+            BiometricFaceEncoding.face_template,
+            BiometricFaceEncoding.face_template_format,
+            BiometricFaceEncoding.enrollment_quality,
+        )
+        .join(Member, Member.id == BiometricFaceEncoding.member_id)
+        .where(
+            and_(
+                BiometricFaceEncoding.gym_id == gym_id,
+                BiometricFaceEncoding.is_primary == True,  # noqa: E712
+                Member.is_active == True,  # noqa: E712
+            )
+        )
+        .order_by(BiometricFaceEncoding.id)
+    ).all()
+
+    matrix = np.empty((len(rows), FACE_DIM), dtype=np.float32)
+    encoding_ids: list[uuid.UUID] = []
+    member_ids: list[uuid.UUID] = []
+    thresholds: list[float] = []
+    for encoding_id, member_id, blob, template_format, quality in rows:
+        vector = decode_template(blob, template_format)
+        if vector is None:
+            continue
+        matrix[len(encoding_ids)] = vector
+        encoding_ids.append(encoding_id)
+        member_ids.append(member_id)
+        thresholds.append(match_threshold(quality))
+    return GymFaceIndex(
+        gym_id,
+        matrix[: len(encoding_ids)].copy(),
+        encoding_ids,
+        member_ids,
+        np.asarray(thresholds, dtype=np.float32),
+        fingerprint,
+    )
+
+
+class FaceIndexRegistry:
+    """LRU of loaded gym indexes for this process."""
+
+    def __init__(self, max_gyms: int = 64):
+        self.max_gyms = max_gyms
+        self._indexes: OrderedDict[uuid.UUID, GymFaceIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        # Serialises snapshot replacement per gym (rebuilds and apply's read-modify-write)
+        self._gym_locks: dict[uuid.UUID, threading.Lock] = {}
+
+    def _gym_lock(self, gym_id: uuid.UUID) -> threading.Lock:
+        with self._lock:
+            return self._gym_locks.setdefault(gym_id, threading.Lock())
+
+    def get(self, db: Session, gym_id: uuid.UUID) -> GymFaceIndex:
+        with self._lock:
+            index = self._indexes.get(gym_id)
+            if index is not None:
+                self._indexes.move_to_end(gym_id)
+        if index is not None and time.monotonic() - index.checked_at < settings.face_index_check_seconds:
+            return index
+
+        with self._gym_lock(gym_id):
+            with self._lock:
+                index = self._indexes.get(gym_id, index)
+            fingerprint = _fingerprint(db, gym_id)
+            if index is not None and index.fingerprint == fingerprint:
+                index.checked_at = time.monotonic()
+                return index
+
+            index = _load_file(gym_id, fingerprint)
+            if index is None:
+                index = _build(db, gym_id, fingerprint)
+                self._persist(index)
+            self._put(index)
+            return index
+
+    def apply(
+        self,
+        db: Session,
+        gym_id: uuid.UUID,
+        *,
+        remove: set[uuid.UUID],
+        add: list[BiometricFaceEncoding],
+    ) -> None:
+        """
+        Incrementally update a loaded index after encodings were committed.
+        If this process has no index for the gym, the next get() loads it.
+        """
+        rows = []
+        for encoding in add:
+            vector = decode_template(encoding.face_template, encoding.face_template_format)
+            if vector is not None and encoding.is_primary:
+                rows.append(
+                    (encoding.id, encoding.member_id, vector, match_threshold(encoding.enrollment_quality))
+                )
+            else:
+                remove = remove | {encoding.id}
+        # Held from read to swap: two enrolments must not both start from the same snapshot.
+        with self._gym_lock(gym_id):
+            with self._lock:
+                index = self._indexes.get(gym_id)
+            if index is None:
+                return
+            index = index.with_rows(remove=remove, add=rows, fingerprint=_fingerprint(db, gym_id))
+            self._persist(index)
+            self._put(index)
+
+    def invalidate(self, gym_id: uuid.UUID) -> None:
+        with self._lock:
+            self._indexes.pop(gym_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._gym_locks.clear()
+
+    def _put(self, index: GymFaceIndex) -> None:
+        with self._lock:
+            self._indexes[index.gym_id] = index
+            self._indexes.move_to_end(index.gym_id)
+            while len(self._indexes) > self.max_gyms:
+                self._indexes.popitem(last=False)
+
+    def _persist(self, index: GymFaceIndex) -> None:
+        try:
+            _save(index)
+        except OSError as exc:
+            # The in-memory index still works; only warm starts are lost.
+            log_error("Face index cache write failed", error=exc, gym_id=str(index.gym_id))
+
+
+face_indexes = FaceIndexRegistry()
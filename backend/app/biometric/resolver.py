@@ -0,0 +1,176 @@
+"""
+In-process caches for the lookups biometric ingest runs on every call/punch.
+
+- device:   (gym_id, external_device_id) -> device_id         (active devices only)
+- identity: (gym_id, device_id, person_identifier) -> member_id | None
+            (None = unknown user, cached too so repeat punches stay cheap)
+- token:    sha256(ingest token) -> DeviceToken               (active devices only)
+
+Services that change the underlying rows (device mappings, member codes,
+member activation, device tokens, gym activation) call the invalidate_*
+helpers after committing; that only reaches the worker process that made
+the change. For the others, entries expire: identities after
+biometric_resolver_ttl_seconds, device and token entries (auth decisions:
+a rotated token, a deactivated device or gym) after
+biometric_auth_cache_ttl_seconds, a few seconds.
+"""
+
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import BiometricDevice, DeviceUserMapping, Gym, Member
+
+# Per-gym cap on identity entries; a device replaying random user ids should
+# not grow the cache without bound.
+MAX_IDENTITIES_PER_GYM = 50_000
+
+
+@dataclass(frozen=True)
+class DeviceToken:
+    device_id: uuid.UUID
+    gym_id: uuid.UUID
+    gym_active: bool
+
+
+_lock = threading.Lock()
+_identities: dict[uuid.UUID, dict[tuple[uuid.UUID, str], tuple[float, uuid.UUID | None]]] = {}
+_devices: dict[uuid.UUID, dict[str, tuple[float, uuid.UUID]]] = {}
+_tokens: dict[str, tuple[float, DeviceToken]] = {}
+
+
+def _expires_at(ttl_seconds: int) -> float:
+    return time.monotonic() + ttl_seconds
+
+
+def _fresh(row: tuple | None) -> bool:
+    return row is not None and row[0] > time.monotonic()
+
+
+def resolve_device_id(db: Session, *, gym_id: uuid.UUID, external_device_id: str) -> uuid.UUID | None:
+    """Active device id for an external device id, or None."""
+    with _lock:
+        row = _devices.get(gym_id, {}).get(external_device_id)
+    if _fresh(row):
+        return row[1]
+
+    device_id = db.execute(
+        select(BiometricDevice.id).where(
+            and_(
+                BiometricDevice.gym_id == gym_id,
+                BiometricDevice.external_device_id == external_device_id,
+                BiometricDevice.is_active == True,  # noqa: E712
+            )
+        )
+    ).scalar_one_or_none()
+    if device_id is not None:
+        with _lock:
+            _devices.setdefault(gym_id, {})[external_device_id] = (
+                _expires_at(settings.biometric_auth_cache_ttl_seconds),
+                device_id,
+            )
+    return device_id
+
+
+def resolve_member_id(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    device_id: uuid.UUID,
+    person_identifier: str,
+) -> uuid.UUID | None:
+    """
+    Active member for a punch: member_code first, then the device's user mapping.
+    Returns None for unknown users (also cached).
+    """
+    key = (device_id, person_identifier)
+    with _lock:
+        row = _identities.get(gym_id, {}).get(key)
+    if _fresh(row):
+        return row[1]
+
+    member_id = db.execute(
+        select(Member.id).where(
+            and_(
+                Member.gym_id == gym_id,
+                Member.member_code == person_identifier,
+                Member.is_active == True,  # noqa: E712
+            )
+        )
+    ).scalar_one_or_none()
+
+    # Fallback for biometric devices that use local face/fingerprint user IDs.
+    # These are mapped to ActiveHQ members via device_user_mappings.
+    if member_id is None:
+        member_id = db.execute(
+            select(Member.id)
+            .join(DeviceUserMapping, DeviceUserMapping.member_id == Member.id)
+            .where(
+                and_(
+                    DeviceUserMapping.gym_id == gym_id,
+                    DeviceUserMapping.device_id == device_id,
+                    DeviceUserMapping.device_user_id == person_identifier,
+                    Member.gym_id == gym_id,
+                    Member.is_active == True,  # noqa: E712
+                )
+            )
+        ).scalar_one_or_none()
+
+    with _lock:
+        entries = _identities.setdefault(gym_id, {})
+        if len(entries) >= MAX_IDENTITIES_PER_GYM:
+            entries.clear()
+        entries[key] = (_expires_at(settings.biometric_resolver_ttl_seconds), member_id)
+    return member_id
+
+
+def resolve_device_token(db: Session, token_hash: str) -> DeviceToken | None:
+    """Active device (and its gym's status) for an ingest token hash, or None."""
+    with _lock:
+        row = _tokens.get(token_hash)
+    if _fresh(row):
+        return row[1]
+
+    found = db.execute(
+        select(BiometricDevice.id, BiometricDevice.gym_id, Gym.is_active)
+        .join(Gym, Gym.id == BiometricDevice.gym_id)
+        .where(
+            and_(
+                BiometricDevice.ingest_token_hash == token_hash,
+                BiometricDevice.is_active == True,  # noqa: E712
+            )
+        )
+    ).first()
+    if found is None:
+        return None
+
+    entry = DeviceToken(device_id=found[0], gym_id=found[1], gym_active=bool(found[2]))
+    with _lock:
+        _tokens[token_hash] = (_expires_at(settings.biometric_auth_cache_ttl_seconds), entry)
+    return entry
+
+
+def invalidate_gym_identities(gym_id: uuid.UUID) -> None:
+    """Drop cached person -> member resolutions for a gym (mapping/member changes)."""
+    with _lock:
+        _identities.pop(gym_id, None)
+
+
+def invalidate_gym_devices(gym_id: uuid.UUID) -> None:
+    """Drop cached devices and tokens for a gym (device/token/gym status changes)."""
+    with _lock:
+        _devices.pop(gym_id, None)
+        for token_hash in [h for h, (_, entry) in _tokens.items() if entry.gym_id == gym_id]:
+            _tokens.pop(token_hash, None)
+
+
+def clear() -> None:
+    with _lock:
+        _identities.clear()
+        _devices.clear()
+        _tokens.clear()
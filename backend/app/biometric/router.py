@@ -1,8 +1,20 @@
+import asyncio
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
 
-from app.auth.dependencies import TenantDep, require_manager_or_above, DbDep, BiometricDeviceTenantDep
+from app.auth.dependencies import (
+    AsyncBiometricDeviceTenantDep,
+    AsyncDbDep,
+    AsyncTenantDep,
+    TenantDep,
+    require_manager_or_above,
+    require_manager_or_above_async,
+    DbDep,
+    BiometricDeviceTenantDep,
+    lookup_biometric_device,
+)
 from app.biometric.schemas import (
     BiometricConflictEventResponse,
     BiometricDeviceCreate,
@@ -10,13 +22,22 @@ from app.biometric.schemas import (
     BiometricDeviceTokenResponse,
     BiometricEventIngestRequest,
     BiometricIngestSummary,
+    BiometricMultiDeviceIngestRequest,
+    BiometricMultiDeviceIngestSummary,
     DeviceUserMappingCreate,
     DeviceUserMappingResponse,
+    FaceEnrollRequest,
+    FaceEnrollResponse,
+    FaceIdentifyRequest,
+    FaceIdentifyResponse,
 )
 from app.biometric.service import BiometricService
+from app.biometric.stream import punch_batcher
+from app.core.request_encoding import GzipRequestRoute
 from app.models import Member
 
-router = APIRouter()
+# Device agents may gzip their batch uploads.
+router = APIRouter(route_class=GzipRequestRoute)
 
 
 @router.get("/devices", response_model=list[BiometricDeviceResponse])
@@ -121,6 +142,69 @@ def delete_mapping(
         raise HTTPException(status_code=404, detail="Mapping not found")
 
 
+@router.websocket("/events/stream")
+async def stream_events_device(websocket: WebSocket, db: AsyncDbDep):
+    """
+    Low-latency punch stream for device agents.
+
+    Auth: X-Biometric-Token header (or ?token= for clients that cannot set headers).
+    Client sends {"seq": n, "external_device_id": ..., "events": [...]} messages.
+    Server replies {"seq": n, "status": "queued"} at once, then
+    {"seq": n, "status": "committed" | "failed", ...} after the micro-batch is written,
+    or {"seq": n, "status": "busy"} when the queue is full (retry later).
+
+    scripts/biometric_agent.py uploads here and falls back to
+    /events/ingest-device/batch while the stream is unavailable.
+    """
+    token = websocket.headers.get("X-Biometric-Token") or websocket.query_params.get("token")
+    device = None
+    if token:
+        # Async session: the token lookup must not block the event loop
+        device = await db.run_sync(lookup_biometric_device, token)
+    # Give the connection back now rather than hold it for the stream's lifetime
+    await db.close()
+    if not device or not device.gym_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    gym_id = device.gym_id
+
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    outbox: asyncio.Queue[dict] = asyncio.Queue()
+
+    def ack_later(seq):
+        def on_done(result: dict) -> None:
+            try:
+                loop.call_soon_threadsafe(outbox.put_nowait, {"seq": seq, **result})
+            except RuntimeError:
+                pass  # connection loop already closed
+
+        return on_done
+
+    async def sender() -> None:
+        while True:
+            await websocket.send_json(await outbox.get())
+
+    sender_task = asyncio.create_task(sender())
+    try:
+        while True:
+            message = await websocket.receive_json()
+            seq = message.get("seq") if isinstance(message, dict) else None
+            try:
+                batch = BiometricEventIngestRequest.model_validate(message)
+            except ValidationError as exc:
+                await outbox.put({"seq": seq, "status": "invalid", "error": exc.errors()[0]["msg"]})
+                continue
+            if punch_batcher.submit(gym_id, batch.external_device_id, batch.events, ack_later(seq)):
+                await outbox.put({"seq": seq, "status": "queued", "count": len(batch.events)})
+            else:
+                await outbox.put({"seq": seq, "status": "busy"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender_task.cancel()
+
+
 @router.get("/events/conflicts", response_model=list[BiometricConflictEventResponse])
 def list_conflict_events(
     tenant: TenantDep,
@@ -151,27 +235,81 @@ def list_conflict_events(
 
 
 @router.post("/events/ingest", response_model=BiometricIngestSummary)
-def ingest_events(
+async def ingest_events(
     payload: BiometricEventIngestRequest,
+    tenant: AsyncTenantDep,
+    db: AsyncDbDep,
+    _: object = Depends(require_manager_or_above_async),
+):
+    try:
+        return await db.run_sync(lambda s: BiometricService(s).ingest_events(tenant, payload))
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.post("/faces", response_model=FaceEnrollResponse, status_code=status.HTTP_201_CREATED)
+def enroll_face(
+    payload: FaceEnrollRequest,
     tenant: TenantDep,
     db: DbDep,
     _: object = Depends(require_manager_or_above),
 ):
+    """Enroll (or replace) a member's primary face template."""
     service = BiometricService(db)
     try:
-        return service.ingest_events(tenant, payload)
+        return service.enroll_face(tenant, payload)
     except ValueError as exc:
-        raise HTTPException(status_code=404, detail=str(exc)) from exc
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.post("/events/ingest-device", response_model=BiometricIngestSummary)
-def ingest_events_device(
-    payload: BiometricEventIngestRequest,
+@router.post("/faces/identify", response_model=FaceIdentifyResponse)
+def identify_face(
+    payload: FaceIdentifyRequest,
+    tenant: TenantDep,
+    db: DbDep,
+):
+    """Match a face template against the gym's enrolled members (front-desk camera)."""
+    service = BiometricService(db)
+    try:
+        return service.identify_face(tenant, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post("/faces/identify-device", response_model=FaceIdentifyResponse)
+def identify_face_device(
+    payload: FaceIdentifyRequest,
     tenant: BiometricDeviceTenantDep,
     db: DbDep,
 ):
+    """Same as /faces/identify for camera agents authenticated with a device token."""
     service = BiometricService(db)
     try:
-        return service.ingest_events(tenant, payload)
+        return service.identify_face(tenant, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post("/events/ingest-device", response_model=BiometricIngestSummary)
+async def ingest_events_device(
+    payload: BiometricEventIngestRequest,
+    tenant: AsyncBiometricDeviceTenantDep,
+    db: AsyncDbDep,
+):
+    try:
+        return await db.run_sync(lambda s: BiometricService(s).ingest_events(tenant, payload))
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.post("/events/ingest-device/batch", response_model=BiometricMultiDeviceIngestSummary)
+async def ingest_events_device_batch(
+    payload: BiometricMultiDeviceIngestRequest,
+    tenant: AsyncBiometricDeviceTenantDep,
+    db: AsyncDbDep,
+):
+    """
+    Coalesced upload from an agent polling several devices of the same gym.
+    Any active device token of the gym authenticates the call.
+    """
+    return await db.run_sync(lambda s: BiometricService(s).ingest_device_batches(tenant, payload))
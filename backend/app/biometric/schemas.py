@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.models.enums import BiometricEventType, DeviceVendor
 
@@ -53,6 +53,26 @@ class BiometricIngestSummary(BaseModel):
     failed: int
 
 
+class BiometricMultiDeviceIngestRequest(BaseModel):
+    """Events from several devices of one gym in a single call (multi-device agents)."""
+    batches: list[BiometricEventIngestRequest] = Field(..., min_length=1, max_length=16)
+
+    @model_validator(mode="after")
+    def _limit_total_events(self):
+        if sum(len(b.events) for b in self.batches) > 2000:
+            raise ValueError("At most 2000 events per call")
+        return self
+
+
+class BiometricDeviceIngestSummary(BiometricIngestSummary):
+    external_device_id: str
+    error: str | None = None
+
+
+class BiometricMultiDeviceIngestSummary(BaseModel):
+    devices: list[BiometricDeviceIngestSummary]
+
+
 class DeviceUserMappingCreate(BaseModel):
     device_id: UUID
     member_id: UUID
@@ -80,3 +100,37 @@ class DeviceUserMappingResponse(BaseModel):
     member_phone: str | None = None
 
     model_config = {"from_attributes": True}
+
+
+class FaceEnrollRequest(BaseModel):
+    member_id: UUID
+    # Base64 of the raw template bytes (512 little-endian float32 by default)
+    template_b64: str = Field(..., min_length=1, max_length=16_000)
+    template_format: str = Field(default="float32", max_length=50)
+    enrollment_quality: float | None = Field(default=None, ge=0, le=1)
+    device_id: UUID | None = None
+
+
+class FaceEnrollResponse(BaseModel):
+    id: UUID
+    member_id: UUID
+    enrollment_quality: float | None
+    replaced: int = Field(description="Previous primary templates demoted for this member")
+
+
+class FaceIdentifyRequest(BaseModel):
+    template_b64: str = Field(..., min_length=1, max_length=16_000)
+    template_format: str = Field(default="float32", max_length=50)
+    top_k: int = Field(default=3, ge=1, le=10)
+
+
+class FaceMatchResponse(BaseModel):
+    member_id: UUID
+    member_name: str
+    similarity: float
+    threshold: float
+
+
+class FaceIdentifyResponse(BaseModel):
+    matches: list[FaceMatchResponse]
+    templates_searched: int
@@ -1,12 +1,31 @@
 from datetime import datetime, timedelta, timezone
+import base64
+import binascii
 import hashlib
 import secrets
+import uuid
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.attendance import rollups
+from app.attendance.auto_checkout import close_stale_sessions
+from app.biometric import resolver
+from app.core.change_counters import mark_changed
+from app.core.gym_time import local_day_start
+from app.core.metrics import record_biometric_ingest
+from app.biometric.face_index import decode_template, face_indexes
+from app.members.typeahead_index import typeahead_indexes
 from app.auth.dependencies import TenantContext
-from app.models import Attendance, BiometricDevice, BiometricEvent, DeviceUserMapping, Member
+from app.models import (
+    Attendance,
+    BiometricDevice,
+    BiometricEvent,
+    BiometricFaceEncoding,
+    DeviceUserMapping,
+    Member,
+)
 from app.models.enums import (
     BiometricEventStatus,
     BiometricEventType,
@@ -14,11 +33,31 @@ from app.models.enums import (
 )
 from app.biometric.schemas import (
     BiometricDeviceCreate,
+    BiometricDeviceIngestSummary,
     BiometricEventIngestRequest,
     BiometricIngestSummary,
+    BiometricMultiDeviceIngestRequest,
+    BiometricMultiDeviceIngestSummary,
+    FaceEnrollRequest,
+    FaceEnrollResponse,
+    FaceIdentifyRequest,
+    FaceIdentifyResponse,
+    FaceMatchResponse,
 )
 
 
+def _decode_b64(value: str) -> bytes:
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("Template is not valid base64") from exc
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite (tests) returns naive datetimes; stored values are UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
 class BiometricService:
     def __init__(self, db: Session):
         self.db = db
@@ -129,6 +168,8 @@ class BiometricService:
         member.last_biometric_sync = now
 
         self.db.commit()
+        resolver.invalidate_gym_identities(tenant.gym_id)
+        typeahead_indexes.member_changed(member)
         self.db.refresh(mapping)
         return mapping
 
@@ -167,6 +208,7 @@ class BiometricService:
             return False
         self.db.delete(row)
         self.db.commit()
+        resolver.invalidate_gym_identities(tenant.gym_id)
         return True
 
     def create_device(self, tenant: TenantContext, payload: BiometricDeviceCreate) -> BiometricDevice:
@@ -200,34 +242,119 @@ class BiometricService:
         device.ingest_token_hash = token_hash
         device.ingest_token_rotated_at = datetime.now(timezone.utc)
         self.db.commit()
+        resolver.invalidate_gym_devices(tenant.gym_id)
         self.db.refresh(device)
         return device, token
 
-    def ingest_events(self, tenant: TenantContext, payload: BiometricEventIngestRequest) -> BiometricIngestSummary:
-        device = self.db.execute(
-            select(BiometricDevice).where(
+    def enroll_face(self, tenant: TenantContext, payload: FaceEnrollRequest) -> FaceEnrollResponse:
+        """Store a new primary face template; earlier primaries of the member are demoted."""
+        member = self.db.execute(
+            select(Member).where(
                 and_(
-                    BiometricDevice.gym_id == tenant.gym_id,
-                    BiometricDevice.external_device_id == payload.external_device_id,
-                    BiometricDevice.is_active == True,  # noqa: E712
+                    Member.gym_id == tenant.gym_id,
+                    Member.id == payload.member_id,
+                    Member.is_active == True,  # noqa: E712
                 )
             )
         ).scalar_one_or_none()
+        if not member:
+            raise ValueError("Member not found")
 
-        if not device:
+        template = _decode_b64(payload.template_b64)
+        if decode_template(template, payload.template_format) is None:
+            raise ValueError("Template must be a raw 512-dim float32/float64 vector")
+
+        previous = list(
+            self.db.execute(
+                select(BiometricFaceEncoding).where(
+                    and_(
+                        BiometricFaceEncoding.gym_id == tenant.gym_id,
+                        BiometricFaceEncoding.member_id == member.id,
+                        BiometricFaceEncoding.is_primary == True,  # noqa: E712
+                    )
+                )
+            ).scalars().all()
+        )
+        for old in previous:
+            old.is_primary = False
+
+        encoding = BiometricFaceEncoding(
+            gym_id=tenant.gym_id,
+            member_id=member.id,
+            device_id=payload.device_id,
+            face_template=template,
+            face_template_format=payload.template_format.lower(),
+            enrollment_quality=payload.enrollment_quality,
+            is_primary=True,
+        )
+        self.db.add(encoding)
+        member.biometric_enrolled = True
+        self.db.commit()
+
+        face_indexes.apply(self.db, tenant.gym_id, remove={old.id for old in previous}, add=[encoding])
+        return FaceEnrollResponse(
+            id=encoding.id,
+            member_id=member.id,
+            enrollment_quality=payload.enrollment_quality,
+            replaced=len(previous),
+        )
+
+    def identify_face(self, tenant: TenantContext, payload: FaceIdentifyRequest) -> FaceIdentifyResponse:
+        """Top-k active members whose primary template matches the probe."""
+        probe = decode_template(_decode_b64(payload.template_b64), payload.template_format)
+        if probe is None:
+            raise ValueError("Template must be a raw 512-dim float32/float64 vector")
+
+        index = face_indexes.get(self.db, tenant.gym_id)
+        # Over-fetch a little: members deactivated since the index was built are dropped below.
+        matches = index.search(probe, k=payload.top_k + 2)
+        names: dict[uuid.UUID, str] = {}
+        if matches:
+            names = dict(
+                self.db.execute(
+                    select(Member.id, Member.name).where(
+                        and_(
+                            Member.gym_id == tenant.gym_id,
+                            Member.id.in_([m.member_id for m in matches]),
+                            Member.is_active == True,  # noqa: E712
+                        )
+                    )
+                ).all()
+            )
+        return FaceIdentifyResponse(
+            matches=[
+                FaceMatchResponse(
+                    member_id=m.member_id,
+                    member_name=names[m.member_id],
+                    similarity=round(m.similarity, 4),
+                    threshold=round(m.threshold, 4),
+                )
+                for m in matches
+                if m.member_id in names
+            ][: payload.top_k],
+            templates_searched=len(index),
+        )
+
+    def ingest_events(self, tenant: TenantContext, payload: BiometricEventIngestRequest) -> BiometricIngestSummary:
+        # Device and person lookups go through the in-process resolver cache.
+        device_id = resolver.resolve_device_id(
+            self.db, gym_id=tenant.gym_id, external_device_id=payload.external_device_id
+        )
+        if device_id is None:
             raise ValueError("Device not found or inactive")
 
         processed = 0
         duplicates = 0
         conflicts = 0
         failed = 0
+        synced_members: dict[uuid.UUID, datetime] = {}
 
         for item in payload.events:
             existing = self.db.execute(
-                select(BiometricEvent).where(
+                select(BiometricEvent.id).where(
                     and_(
                         BiometricEvent.gym_id == tenant.gym_id,
-                        BiometricEvent.device_id == device.id,
+                        BiometricEvent.device_id == device_id,
                         BiometricEvent.external_event_id == item.external_event_id,
                     )
                 )
@@ -242,43 +369,17 @@ class BiometricService:
             if item.device_offset_minutes:
                 event_time = event_time - timedelta(minutes=item.device_offset_minutes)
 
-            member = self.db.execute(
-                select(Member).where(
-                    and_(
-                        Member.gym_id == tenant.gym_id,
-                        Member.member_code == item.person_identifier,
-                        Member.is_active == True,  # noqa: E712
-                    )
-                )
-            ).scalar_one_or_none()
-
-            # Fallback for biometric devices that use local face/fingerprint user IDs.
-            # These are mapped to ActiveHQ members via device_user_mappings.
-            if not member:
-                mapping = self.db.execute(
-                    select(DeviceUserMapping).where(
-                        and_(
-                            DeviceUserMapping.gym_id == tenant.gym_id,
-                            DeviceUserMapping.device_id == device.id,
-                            DeviceUserMapping.device_user_id == item.person_identifier,
-                        )
-                    )
-                ).scalar_one_or_none()
-                if mapping:
-                    member = self.db.execute(
-                        select(Member).where(
-                            and_(
-                                Member.gym_id == tenant.gym_id,
-                                Member.id == mapping.member_id,
-                                Member.is_active == True,  # noqa: E712
-                            )
-                        )
-                    ).scalar_one_or_none()
+            member_id = resolver.resolve_member_id(
+                self.db,
+                gym_id=tenant.gym_id,
+                device_id=device_id,
+                person_identifier=item.person_identifier,
+            )
 
             event = BiometricEvent(
                 gym_id=tenant.gym_id,
-                device_id=device.id,
-                member_id=member.id if member else None,
+                device_id=device_id,
+                member_id=member_id,
                 external_event_id=item.external_event_id,
                 person_identifier=item.person_identifier,
                 event_type=item.event_type,
@@ -290,11 +391,10 @@ class BiometricService:
             self.db.flush()
 
             try:
-                status = self._apply_event_to_attendance(tenant, event, member)
+                status = self._apply_event_to_attendance(tenant, event, member_id)
                 event.status = status
-                if status == BiometricEventStatus.PROCESSED and member:
-                    member.last_biometric_sync = event.event_time
-                    member.biometric_enrolled = True
+                if status == BiometricEventStatus.PROCESSED and member_id:
+                    synced_members[member_id] = event.event_time
                     processed += 1
                 elif status == BiometricEventStatus.DUPLICATE:
                     duplicates += 1
@@ -307,8 +407,21 @@ class BiometricService:
                 event.conflict_reason = "processing_error"
                 failed += 1
 
-        device.last_seen_at = payload.events[-1].event_time
+        for member_id, synced_at in synced_members.items():
+            self.db.execute(
+                update(Member)
+                .where(Member.id == member_id)
+                .values(last_biometric_sync=synced_at, biometric_enrolled=True)
+            )
+        if synced_members:
+            mark_changed(self.db, tenant.gym_id, "members")
+        self.db.execute(
+            update(BiometricDevice)
+            .where(BiometricDevice.id == device_id)
+            .values(last_seen_at=payload.events[-1].event_time)
+        )
         self.db.commit()
+        record_biometric_ingest(processed=processed, duplicates=duplicates, conflicts=conflicts, failed=failed)
 
         return BiometricIngestSummary(
             total_received=len(payload.events),
@@ -318,13 +431,43 @@ class BiometricService:
             failed=failed,
         )
 
+    def ingest_device_batches(
+        self,
+        tenant: TenantContext,
+        payload: BiometricMultiDeviceIngestRequest,
+    ) -> BiometricMultiDeviceIngestSummary:
+        """Ingest per-device batches in one call; an unknown device fails only its own batch."""
+        results = []
+        for batch in payload.batches:
+            try:
+                summary = self.ingest_events(tenant, batch)
+                results.append(
+                    BiometricDeviceIngestSummary(
+                        external_device_id=batch.external_device_id, **summary.model_dump()
+                    )
+                )
+            except ValueError as exc:
+                # Raised before any writes (unknown/inactive device).
+                results.append(
+                    BiometricDeviceIngestSummary(
+                        external_device_id=batch.external_device_id,
+                        total_received=len(batch.events),
+                        processed=0,
+                        duplicates=0,
+                        conflicts=0,
+                        failed=len(batch.events),
+                        error=str(exc),
+                    )
+                )
+        return BiometricMultiDeviceIngestSummary(devices=results)
+
     def _apply_event_to_attendance(
         self,
         tenant: TenantContext,
         event: BiometricEvent,
-        member: Member | None,
+        member_id: uuid.UUID | None,
     ) -> BiometricEventStatus:
-        if not member:
+        if not member_id:
             event.conflict_reason = "unknown_member"
             return BiometricEventStatus.CONFLICT
 
@@ -332,7 +475,7 @@ class BiometricService:
             select(Attendance).where(
                 and_(
                     Attendance.gym_id == tenant.gym_id,
-                    Attendance.member_id == member.id,
+                    Attendance.member_id == member_id,
                     Attendance.check_out_time.is_(None),
                 )
             ).order_by(Attendance.check_in_time.desc())
@@ -347,22 +490,41 @@ class BiometricService:
                 select(Attendance).where(
                     and_(
                         Attendance.gym_id == tenant.gym_id,
-                        Attendance.member_id == member.id,
+                        Attendance.member_id == member_id,
                     )
                 ).order_by(Attendance.check_in_time.desc())
             ).scalar_one_or_none()
-            if latest_entry and abs((event.event_time - latest_entry.check_in_time).total_seconds()) <= 180:
+            if latest_entry and abs((event.event_time - _utc(latest_entry.check_in_time)).total_seconds()) <= 180:
                 event.conflict_reason = "duplicate_punch"
                 return BiometricEventStatus.DUPLICATE
+            if open_attendance:
+                if _utc(open_attendance.check_in_time) >= local_day_start(self.db, tenant.gym_id, event.event_time):
+                    event.conflict_reason = "already_checked_in"
+                    return BiometricEventStatus.CONFLICT
+                # Left open on an earlier day: close it so it does not block today's check-in
+                close_stale_sessions(self.db, tenant.gym_id, [member_id], before=event.event_time)
 
-            self.db.add(
-                Attendance(
-                    gym_id=tenant.gym_id,
-                    member_id=member.id,
-                    check_in_time=event.event_time,
-                    check_out_time=None,
-                    marked_by=None,
-                )
+            try:
+                # Savepoint: a concurrent check-in that won idx_attendance_open
+                # (one open session per member) fails only this event.
+                with self.db.begin_nested():
+                    self.db.add(
+                        Attendance(
+                            gym_id=tenant.gym_id,
+                            member_id=member_id,
+                            check_in_time=event.event_time,
+                            check_out_time=None,
+                            marked_by=None,
+                        )
+                    )
+            except IntegrityError:
+                event.conflict_reason = "already_checked_in"
+                return BiometricEventStatus.CONFLICT
+            rollups.record_check_in(
+                self.db,
+                gym_id=tenant.gym_id,
+                member_id=member_id,
+                check_in_time=event.event_time,
             )
             return BiometricEventStatus.PROCESSED
 
@@ -370,9 +532,15 @@ class BiometricService:
             event.conflict_reason = "checkout_without_open_session"
             return BiometricEventStatus.CONFLICT
 
-        if event.event_time < open_attendance.check_in_time:
+        if event.event_time < _utc(open_attendance.check_in_time):
             event.conflict_reason = "clock_drift_negative_duration"
             return BiometricEventStatus.CONFLICT
 
         open_attendance.check_out_time = event.event_time
+        rollups.record_check_out(
+            self.db,
+            gym_id=tenant.gym_id,
+            check_in_time=open_attendance.check_in_time,
+            check_out_time=event.event_time,
+        )
         return BiometricEventStatus.PROCESSED
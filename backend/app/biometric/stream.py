@@ -0,0 +1,147 @@
+"""
+Real-time punch ingest: an in-memory queue flushed to the DB in micro-batches.
+
+The WebSocket endpoint (/biometric/events/stream) enqueues punches and acks
+immediately with status "queued"; a background thread drains the queue every
+biometric_stream_flush_ms, groups punches per (gym, device) and runs them
+through BiometricService.ingest_events in one transaction per group. Each
+submission then gets a second ack ("committed" or "failed"), so agents should
+drop punches from their local spool only after "committed".
+"""
+
+import threading
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import groupby
+
+from sqlalchemy.orm import Session
+
+from app.biometric.schemas import BiometricEventIngestItem, BiometricEventIngestRequest
+from app.biometric.service import BiometricService
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import log_error
+
+# Same cap as one HTTP ingest call.
+MAX_EVENTS_PER_FLUSH_GROUP = 500
+
+
+class _StreamTenant:
+    """Tenant scope for queued punches (ingest only needs the gym id)."""
+
+    def __init__(self, gym_id: uuid.UUID):
+        self.gym_id = gym_id
+
+
+@dataclass
+class _Submission:
+    gym_id: uuid.UUID
+    external_device_id: str
+    events: list[BiometricEventIngestItem]
+    on_done: Callable[[dict], None] | None
+
+
+class PunchBatcher:
+    """Thread-safe punch queue with a background micro-batch flusher."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = settings.biometric_stream_flush_ms / 1000,
+        max_queue: int = settings.biometric_stream_max_queue,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._pending: list[_Submission] = []
+        self._queued_events = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def queued_events(self) -> int:
+        return self._queued_events
+
+    def submit(
+        self,
+        gym_id: uuid.UUID,
+        external_device_id: str,
+        events: list[BiometricEventIngestItem],
+        on_done: Callable[[dict], None] | None = None,
+    ) -> bool:
+        """Queue punches; False when the queue is full (caller should retry later)."""
+        with self._lock:
+            if self._queued_events + len(events) > self.max_queue:
+                return False
+            self._pending.append(_Submission(gym_id, external_device_id, events, on_done))
+            self._queued_events += len(events)
+        return True
+
+    def flush(self) -> int:
+        """Write everything queued so far. Returns number of events written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._queued_events = 0
+            if not pending:
+                return 0
+
+            written = 0
+            key = lambda sub: (str(sub.gym_id), sub.external_device_id)  # noqa: E731
+            for (_, external_device_id), group in groupby(sorted(pending, key=key), key=key):
+                submissions = list(group)
+                events = [ev for sub in submissions for ev in sub.events]
+                result = {"status": "committed"}
+                try:
+                    with self.session_factory() as db:
+                        service = BiometricService(db)
+                        tenant = _StreamTenant(submissions[0].gym_id)
+                        for i in range(0, len(events), MAX_EVENTS_PER_FLUSH_GROUP):
+                            service.ingest_events(
+                                tenant,
+                                BiometricEventIngestRequest(
+                                    external_device_id=external_device_id,
+                                    events=events[i : i + MAX_EVENTS_PER_FLUSH_GROUP],
+                                ),
+                            )
+                    written += len(events)
+                except ValueError as exc:
+                    result = {"status": "failed", "error": str(exc)}
+                except Exception as exc:
+                    log_error(
+                        "Biometric stream flush failed",
+                        error=exc,
+                        gym_id=str(submissions[0].gym_id),
+                        external_device_id=external_device_id,
+                    )
+                    result = {"status": "failed", "error": "processing_error"}
+                for sub in submissions:
+                    if sub.on_done is not None:
+                        sub.on_done({**result, "count": len(sub.events)})
+            return written
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="biometric-stream-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as exc:
+                log_error("Biometric stream flusher error", error=exc)
+
+
+punch_batcher = PunchBatcher()
@@ -4,25 +4,29 @@ from __future__ import annotations
 
 import threading
 import time
-from typing import Any, TypeVar
+from typing import Any, Callable, TypeVar
+
+from app.core.logger import log_error
+from app.core.metrics import record_cache
 
 T = TypeVar("T")
 
 _lock = threading.Lock()
 _store: dict[str, tuple[float, Any]] = {}
+# key -> (fresh_until, stale_until, value) for cache_get_or_load
+_swr_store: dict[str, tuple[float, float, Any]] = {}
+_refreshing: set[str] = set()
 
 
 def cache_get(key: str) -> Any | None:
     now = time.monotonic()
     with _lock:
         row = _store.get(key)
-        if not row:
-            return None
-        expires_at, value = row
-        if expires_at <= now:
+        if row and row[0] <= now:
             _store.pop(key, None)
-            return None
-        return value
+            row = None
+    record_cache(key, "hit" if row else "miss")
+    return row[1] if row else None
 
 
 def cache_set(key: str, value: Any, ttl_seconds: int = 60) -> None:
@@ -31,13 +35,72 @@ def cache_set(key: str, value: Any, ttl_seconds: int = 60) -> None:
         _store[key] = (expires_at, value)
 
 
+def cache_get_or_load(
+    key: str,
+    loader: Callable[[], T],
+    ttl_seconds: int = 60,
+    stale_seconds: int = 0,
+    refresher: Callable[[], T] | None = None,
+) -> T:
+    """
+    Return the cached value or compute it with loader.
+
+    With stale_seconds > 0 an expired value is still served for that long
+    while one background thread recomputes it (stale-while-revalidate).
+    refresher is called instead of loader in the background, e.g. so it can
+    open its own DB session instead of reusing the request's.
+    """
+    now = time.monotonic()
+    with _lock:
+        row = _swr_store.get(key)
+        fresh = bool(row) and now < row[0]
+        serve_stale = bool(row) and now < row[1]
+        start_refresh = serve_stale and key not in _refreshing
+        if start_refresh:
+            _refreshing.add(key)
+    record_cache(key, "hit" if fresh else "stale" if serve_stale else "miss")
+    if fresh:
+        return row[2]
+    if serve_stale:
+        if start_refresh:
+            threading.Thread(
+                target=_refresh,
+                args=(key, refresher or loader, ttl_seconds, stale_seconds),
+                daemon=True,
+            ).start()
+        return row[2]
+
+    value = loader()
+    _swr_put(key, value, ttl_seconds, stale_seconds)
+    return value
+
+
+def _swr_put(key: str, value: Any, ttl_seconds: int, stale_seconds: int) -> None:
+    now = time.monotonic()
+    with _lock:
+        _swr_store[key] = (now + ttl_seconds, now + ttl_seconds + stale_seconds, value)
+
+
+def _refresh(key: str, loader: Callable[[], Any], ttl_seconds: int, stale_seconds: int) -> None:
+    try:
+        _swr_put(key, loader(), ttl_seconds, stale_seconds)
+    except Exception as e:
+        # Keep serving the stale value until it ages out.
+        log_error("Background cache refresh failed", error=e, key=key)
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+
 def cache_delete_prefix(prefix: str) -> None:
     with _lock:
-        keys = [k for k in _store if k.startswith(prefix)]
-        for k in keys:
-            _store.pop(k, None)
+        for store in (_store, _swr_store):
+            keys = [k for k in store if k.startswith(prefix)]
+            for k in keys:
+                store.pop(k, None)
 
 
 def cache_clear() -> None:
     with _lock:
         _store.clear()
+        _swr_store.clear()
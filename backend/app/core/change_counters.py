@@ -0,0 +1,100 @@
+"""
+Per-gym change counters (gym_change_counters), the source of HTTP validators.
+
+Any commit that inserted, updated or deleted a Member, Membership, Payment,
+Attendance or Plan through the unit of work bumps (gym, table) by one, in the
+same transaction. Bulk statements (insert().from_select, update() by
+criteria) bypass the unit of work; their callers call mark_changed().
+
+Counters are bumped at commit time in (gym, scope) order, so the row locks
+are held only for the end of the transaction and never taken in opposite
+orders by two writers.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models import GymChangeCounter
+
+# Tables whose writes invalidate cached reads; the scope is the table name.
+TRACKED_SCOPES = frozenset({"members", "memberships", "payments", "attendance", "plans"})
+
+_PENDING = "changed_gyms"
+
+
+def mark_changed(db: Session, gym_id: uuid.UUID, *scopes: str) -> None:
+    """Record a write the unit of work cannot see; bumped when db commits."""
+    pending = db.info.setdefault(_PENDING, set())
+    pending.update((gym_id, scope) for scope in scopes)
+
+
+def _bump(db: Session, changes: set[tuple[uuid.UUID, str]]) -> None:
+    insert = dialect_insert(db)
+    connection = db.connection()
+    for gym_id, scope in sorted(changes, key=lambda change: (str(change[0]), change[1])):
+        stmt = insert(GymChangeCounter).values(gym_id=gym_id, scope=scope, version=1, changed_at=func.now())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["gym_id", "scope"],
+            set_={"version": GymChangeCounter.version + 1, "changed_at": func.now()},
+        )
+        connection.execute(stmt)
+
+
+def _tracked(obj) -> tuple[uuid.UUID, str] | None:
+    scope = getattr(obj, "__tablename__", None)
+    gym_id = getattr(obj, "gym_id", None)
+    return (gym_id, scope) if scope in TRACKED_SCOPES and gym_id is not None else None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_changes(session: Session, flush_context) -> None:
+    # new / dirty / deleted still hold the pre-flush state here
+    changes = {_tracked(obj) for obj in (*session.new, *session.deleted)}
+    changes.update(
+        _tracked(obj) for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    )
+    changes.discard(None)
+    if changes:
+        session.info.setdefault(_PENDING, set()).update(changes)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session: Session) -> None:
+    # before_commit runs ahead of commit's own final flush
+    session.flush()
+    changes = session.info.pop(_PENDING, None)
+    if changes:
+        _bump(session, changes)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_on_end(session: Session, transaction) -> None:
+    # Committed changes were bumped above; a rolled back transaction's are discarded.
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def _versions_query(gym_id: uuid.UUID, scopes: tuple[str, ...]):
+    return select(GymChangeCounter.scope, GymChangeCounter.version, GymChangeCounter.changed_at).where(
+        GymChangeCounter.gym_id == gym_id,
+        GymChangeCounter.scope.in_(scopes),
+    )
+
+
+def gym_versions(db: Session, gym_id: uuid.UUID, scopes: tuple[str, ...]) -> dict[str, tuple[int, datetime]]:
+    """scope -> (version, changed_at); scopes never written are missing."""
+    rows = db.execute(_versions_query(gym_id, scopes)).all()
+    return {scope: (version, changed_at) for scope, version, changed_at in rows}
+
+
+async def gym_versions_async(
+    db: AsyncSession, gym_id: uuid.UUID, scopes: tuple[str, ...]
+) -> dict[str, tuple[int, datetime]]:
+    """gym_versions on an AsyncSession."""
+    rows = (await db.execute(_versions_query(gym_id, scopes))).all()
+    return {scope: (version, changed_at) for scope, version, changed_at in rows}
@@ -0,0 +1,198 @@
+"""
+Response compression (brotli or gzip, by Accept-Encoding).
+
+Pure ASGI middleware, so streamed bodies are compressed chunk by chunk and
+flushed as they go instead of being buffered:
+
+    - one-message bodies under COMPRESSION_MIN_BYTES are sent as is
+    - only text-like content types are compressed; photos (image/*), archives
+      and anything already carrying Content-Encoding pass through untouched
+    - the level comes from route_levels ("METHOD /route/{template}") or the
+      COMPRESSION_*_LEVEL defaults
+    - strong ETags become weak on compressed responses (the bytes differ)
+"""
+
+import zlib
+from typing import NamedTuple
+
+import brotli
+
+from app.core.config import settings
+from app.core.profiling import _route_template
+
+_COMPRESSIBLE_PREFIXES = ("text/",)
+_COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "image/svg+xml",
+})
+
+
+class CompressionLevels(NamedTuple):
+    gzip: int
+    brotli: int
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith(_COMPRESSIBLE_PREFIXES)
+        or media_type in _COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """'br' or 'gzip' (br preferred on a tie), None if the client accepts neither."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    ranked = [
+        (weights.get(coding, wildcard), preference, coding)
+        for preference, coding in ((1, "br"), (0, "gzip"))
+    ]
+    q, _, coding = max(ranked)
+    return coding if q > 0 else None
+
+
+class _Encoder:
+    """Incremental compressor; flush() makes everything so far decodable by the client."""
+
+    def __init__(self, encoding: str, levels: CompressionLevels):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=levels.brotli)
+        else:
+            # wbits 16 + MAX_WBITS: gzip container
+            self._zlib = zlib.compressobj(levels.gzip, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses for clients that send Accept-Encoding: br / gzip."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int | None = None,
+        route_levels: dict[str, CompressionLevels] | None = None,
+    ):
+        self.app = app
+        self.minimum_size = settings.compression_min_bytes if minimum_size is None else minimum_size
+        self.default_levels = CompressionLevels(settings.compression_gzip_level, settings.compression_brotli_level)
+        self.route_levels = route_levels or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression_enabled or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: _Encoder | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = {key.lower(): value for key, value in message.get("headers", [])}
+                passthrough = (
+                    message["status"] < 200
+                    or message["status"] in (204, 206, 304)
+                    or b"content-encoding" in response_headers
+                    or b"no-transform" in response_headers.get(b"cache-control", b"")
+                    or not _compressible(response_headers.get(b"content-type", b"").decode("latin-1"))
+                )
+                if not passthrough:
+                    start_message = {**message, "headers": _add_vary(message.get("headers", []))}
+                else:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    # Whole body in one message and too small to be worth it
+                    await send(start_message)
+                    await send(message)
+                    passthrough = True
+                    return
+                encoder = _Encoder(encoding, self.route_levels.get(_route_key(scope), self.default_levels))
+                if not more_body:
+                    compressed = encoder.compress(body) + encoder.finish()
+                    await send({**start_message, "headers": _encoded_headers(start_message, encoding, len(compressed))})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                # Streaming: length unknown up front, chunks flushed as they arrive
+                await send({**start_message, "headers": _encoded_headers(start_message, encoding, None)})
+
+            chunk = encoder.compress(body)
+            chunk += encoder.flush() if more_body else encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _route_key(scope) -> str:
+    return f"{scope['method']} {_route_template(scope)}"
+
+
+def _add_vary(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    for index, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers = list(headers)
+                headers[index] = (key, value + b", Accept-Encoding")
+            return headers
+    return [*headers, (b"vary", b"Accept-Encoding")]
+
+
+def _encoded_headers(start_message, encoding: str, length: int | None) -> list[tuple[bytes, bytes]]:
+    headers = []
+    for key, value in start_message["headers"]:
+        name = key.lower()
+        if name == b"content-length":
+            continue
+        if name == b"etag" and not value.startswith(b"W/"):
+            value = b"W/" + value
+        headers.append((key, value))
+    headers.append((b"content-encoding", encoding.encode()))
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    return headers
@@ -1,22 +1,95 @@
 """
 Database connection and session management.
+
+Writes and front-desk reads use the primary (get_db / get_async_db). Report,
+admin and member-portal reads use get_read_db / get_async_read_db, which go
+to DATABASE_REPLICA_URL when it is set. A user who has just written (any
+session flush or ORM insert/update/delete during their request) reads from
+the primary for DATABASE_REPLICA_PIN_SECONDS, so they see their own change
+despite replication lag. The pin travels with the client, not the worker:
+PrimaryPinMiddleware returns it as a signed X-Primary-Pin header (bearer
+subject + wall-clock expiry) and clients send it back on later requests, so
+it holds whichever gunicorn worker or instance serves them.
 """
 
-from collections.abc import Generator
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+import time
+from collections.abc import AsyncGenerator, Generator
+
+from fastapi.requests import HTTPConnection
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, sessionmaker, Session
 
 from app.core.config import settings
+from app.core.logger import log_warning
+from app.core.metrics import record_db_disconnect
+from app.core.profiling import TimedAsyncQueuePool, TimedQueuePool
 
 
-# Create engine with connection pooling
-engine = create_engine(
-    settings.database_url_sqlalchemy,  # Use computed property that fixes URL format
-    echo=settings.db_echo,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,
-    max_overflow=20,
-)
+def async_database_url(url: str) -> str:
+    """
+    Async driver URL for a sync one. postgresql+psycopg stays as is (psycopg 3
+    picks its async connection class under create_async_engine); SQLite needs aiosqlite.
+    """
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+def pool_options(role: str | None = None) -> dict:
+    """
+    Pool keyword arguments for this process role (settings.db_role by default).
+
+    pool_recycle replaces connections before server / proxy idle timeouts; a
+    connection dropped anyway fails one statement, which SQLAlchemy reports as
+    a disconnect and answers by invalidating the pool, so the next checkout
+    reconnects (see _on_engine_error). Pre-ping stays available as opt-in.
+    """
+    role = (role or settings.db_role).lower()
+    if role not in ("web", "cron", "worker"):
+        raise ValueError(f"Unknown DB_ROLE {role!r} (expected web, cron or worker)")
+    return {
+        "pool_size": getattr(settings, f"db_pool_size_{role}"),
+        "max_overflow": getattr(settings, f"db_max_overflow_{role}"),
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def connect_args(url: str) -> dict:
+    """Driver arguments: PgBouncer transaction mode cannot keep server-side prepared statements."""
+    if settings.db_pgbouncer_transaction_mode and url.startswith("postgresql+psycopg"):
+        return {"prepare_threshold": None}
+    return {}
+
+
+def _create_engines(url: str):
+    """(sync engine, async engine) for one database, pooled per settings.db_role."""
+    sync_engine = create_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=TimedQueuePool,  # pool wait shows up in the request profile
+        connect_args=connect_args(url),
+        **pool_options(),
+    )
+    # Async engine for the I/O-bound hot paths (AsyncDbDep). Its own pool of the
+    # same size: async requests hold a connection without holding a thread.
+    async_url = async_database_url(sync_engine.url.render_as_string(hide_password=False))
+    async_engine = create_async_engine(
+        async_url,
+        echo=settings.db_echo,
+        poolclass=TimedAsyncQueuePool,
+        connect_args=connect_args(async_url),
+        **pool_options(),
+    )
+    return sync_engine, async_engine
+
+
+# Primary
+engine, async_engine = _create_engines(settings.database_url_sqlalchemy)
 
 # Session factory
 SessionLocal = sessionmaker(
@@ -25,9 +98,154 @@ SessionLocal = sessionmaker(
     autoflush=False,
     expire_on_commit=False,
 )
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Read replica. Without DATABASE_REPLICA_URL the "replica" is the primary engine itself.
+if settings.database_replica_url_sqlalchemy:
+    replica_engine, async_replica_engine = _create_engines(settings.database_replica_url_sqlalchemy)
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+
+ReplicaSessionLocal = sessionmaker(
+    bind=replica_engine,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    bind=async_replica_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_engine_error(context) -> None:
+    # SQLAlchemy invalidates the connection (and the pool's older ones) on a
+    # disconnect; count it so dropped connections are visible without pre-ping.
+    if context.is_disconnect:
+        record_db_disconnect()
+        log_warning("db_disconnect", error=type(context.original_exception).__name__)
+
+
+def pool_stats() -> dict[str, dict]:
+    """Pool counters per engine (QueuePool only), for /health/detailed."""
+    engines = {"primary": engine, "primary_async": async_engine.sync_engine}
+    if replica_engine is not engine:
+        engines.update(replica=replica_engine, replica_async=async_replica_engine.sync_engine)
+    stats = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
+    return stats
+
+
+PRIMARY_PIN_HEADER = "X-Primary-Pin"
+_PIN_TOKEN_TYPE = "primary_pin"
+
+
+def issue_primary_pin(subject: str, seconds: float | None = None) -> str:
+    """Signed pin for subject, valid for seconds (DATABASE_REPLICA_PIN_SECONDS by default)."""
+    seconds = settings.database_replica_pin_seconds if seconds is None else seconds
+    claims = {"sub": subject, "until": time.time() + seconds, "type": _PIN_TOKEN_TYPE}
+    return jwt.encode(claims, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+
+def primary_pin_subject(pin: str) -> str | None:
+    """Subject of a genuine, unexpired pin; None for anything else."""
+    try:
+        claims = jwt.decode(pin, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+        until = float(claims.get("until", 0))
+    except (JWTError, TypeError, ValueError):
+        return None
+    if claims.get("type") != _PIN_TOKEN_TYPE or until <= time.time():
+        return None
+    subject = claims.get("sub")
+    return str(subject) if subject else None
+
+
+class PrimaryPinMiddleware:
+    """Add the X-Primary-Pin header to responses of requests that wrote (see _pin_if_wrote)."""
 
+    def __init__(self, app):
+        self.app = app
 
-def get_db() -> Generator[Session, None, None]:
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Signed here, so the pin runs from the end of the request, not its first write
+                subject = scope.get("state", {}).get("primary_pin_subject")
+                if subject:
+                    pin = issue_primary_pin(subject).encode()
+                    headers = [*message.get("headers", []), (PRIMARY_PIN_HEADER.lower().encode(), pin)]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+@event.listens_for(Session, "after_flush")
+def _pin_on_flush(session: Session, flush_context) -> None:
+    _pin_if_wrote(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _pin_on_dml(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _pin_if_wrote(orm_execute_state.session)
+
+
+def request_subject(connection: HTTPConnection) -> str | None:
+    """
+    "sub" of the request's bearer token (staff or member JWT), unverified: it
+    only picks primary vs replica, authentication happens in the route's dependencies.
+    """
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        subject = jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+    return str(subject) if subject else None
+
+
+def _pin_if_wrote(session: Session) -> None:
+    """
+    Flag the request for PrimaryPinMiddleware as soon as its session writes:
+    dependency teardown can run after the response has been sent.
+    """
+    connection: HTTPConnection | None = session.info.get("connection")
+    if connection is None or replica_engine is engine or getattr(connection.state, "primary_pin_subject", None):
+        return
+    subject = request_subject(connection)
+    if subject:
+        connection.state.primary_pin_subject = subject
+
+
+def _read_from_primary(connection: HTTPConnection) -> bool:
+    subject = request_subject(connection)
+    pin = connection.headers.get(PRIMARY_PIN_HEADER)
+    return subject is not None and pin is not None and primary_pin_subject(pin) == subject
+
+
+def get_db(connection: HTTPConnection) -> Generator[Session, None, None]:
     """
     Dependency that provides a database session.
     Use with FastAPI's Depends().
@@ -37,8 +255,56 @@ def get_db() -> Generator[Session, None, None]:
         def get_items(db: Session = Depends(get_db)):
             ...
     """
-    db = SessionLocal()
+    db = SessionLocal(info={"connection": connection})
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(connection: HTTPConnection) -> Generator[Session, None, None]:
+    """
+    Read-only session on the replica (the primary if none is configured, or
+    if this user wrote within the last DATABASE_REPLICA_PIN_SECONDS).
+    Use for report / admin / portal reads via ReadDbDep; never write through it.
+    """
+    factory = SessionLocal if _read_from_primary(connection) else ReplicaSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async database session (psycopg async).
+    
+    Queries are awaited on the event loop instead of occupying a threadpool
+    thread. Existing sync service code runs unchanged through run_sync:
+    
+        @router.get("/items")
+        async def get_items(db: AsyncDbDep):
+            return await db.run_sync(lambda s: ItemService(s).list_items())
+    """
+    async with AsyncSessionLocal(info={"connection": connection}) as db:
+        yield db
+
+
+async def get_async_read_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    """get_read_db on the async engines (AsyncReadDbDep)."""
+    factory = AsyncSessionLocal if _read_from_primary(connection) else AsyncReplicaSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def dialect_insert(db: Session):
+    """
+    Return the dialect-specific ``insert`` construct (supports ON CONFLICT upserts).
+    PostgreSQL in production, SQLite in tests.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
@@ -0,0 +1,44 @@
+"""
+A gym's local timezone and date.
+
+gym.settings["timezone"] (an IANA name, e.g. "Asia/Kolkata"), else
+settings.gym_default_timezone. Attendance rollups bucket by it, and "today"
+on the dashboard and attendance summary is the gym's today, not the server's.
+"""
+
+import uuid
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_get_or_load
+from app.core.config import settings
+from app.models import Gym
+
+
+def gym_zone(db: Session, gym_id: uuid.UUID) -> ZoneInfo:
+    """The gym's timezone (cached 5 min per process)."""
+
+    def load() -> ZoneInfo:
+        gym_settings = db.execute(select(Gym.settings).where(Gym.id == gym_id)).scalar()
+        name = (gym_settings or {}).get("timezone") or settings.gym_default_timezone
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo(settings.gym_default_timezone)
+
+    return cache_get_or_load(f"gym_zone:{gym_id}", load, ttl_seconds=300)
+
+
+def local_today(db: Session, gym_id: uuid.UUID) -> date:
+    """Today in the gym's timezone."""
+    return datetime.now(gym_zone(db, gym_id)).date()
+
+
+def local_day_start(db: Session, gym_id: uuid.UUID, at: datetime | None = None) -> datetime:
+    """UTC instant of the gym's local midnight starting the day of at (default now)."""
+    zone = gym_zone(db, gym_id)
+    local = (at or datetime.now(timezone.utc)).astimezone(zone)
+    return datetime.combine(local.date(), time.min, tzinfo=zone).astimezone(timezone.utc)
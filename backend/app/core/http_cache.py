@@ -0,0 +1,135 @@
+"""
+Conditional GETs for polled read endpoints.
+
+Validators come from the gym's change counters (app.core.change_counters),
+not from the response body, so a route can answer If-None-Match /
+If-Modified-Since with 304 after one primary-key lookup, before running its
+own query:
+
+    DASHBOARD_CACHE = CachePolicy("dashboard", scopes=(...), daily=True)
+
+    validators = await load_validators_async(db, request, DASHBOARD_CACHE, tenant.gym_id)
+    if validators.matches(request):
+        return validators.not_modified()
+    ...
+    validators.apply(response)
+
+Read the counters through the same session as the data, so a lagging
+replica yields an old ETag for old data rather than a new ETag for it.
+"""
+
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timezone, tzinfo
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.change_counters import gym_versions, gym_versions_async
+from app.core.config import settings
+from app.core.gym_time import gym_zone
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    name: part of the ETag, so two routes never share one
+    scopes: tracked tables the response reads (see change_counters.TRACKED_SCOPES)
+    cache_control: Cache-Control header on 200 and 304 responses
+    daily: the response also depends on the gym's local date (counts "today", "expiring in 7 days")
+    """
+
+    name: str
+    scopes: tuple[str, ...]
+    cache_control: str = "private, no-cache"
+    daily: bool = False
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime | None
+    cache_control: str
+
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": self.cache_control, "Vary": "Authorization"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        """True when the client's cached copy is current (If-None-Match wins over If-Modified-Since)."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since.tzinfo is not None and self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers())
+        return response
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC.
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def build_validators(
+    policy: CachePolicy,
+    request: Request,
+    gym_id: uuid.UUID,
+    versions: dict[str, tuple[int, datetime]],
+    *,
+    variant: str = "",
+    zone: tzinfo = timezone.utc,
+    today: date | None = None,
+) -> Validators:
+    """
+    ETag over (app version, route, gym, variant, query string, counter
+    versions, and the gym's date in zone for daily policies); Last-Modified
+    is the latest bump.
+    """
+    today = today or datetime.now(zone).date()
+    parts = [settings.app_version, policy.name, str(gym_id), variant, request.url.query]
+    parts.extend(f"{scope}={versions.get(scope, (0, None))[0]}" for scope in policy.scopes)
+    changed = [_as_utc(changed_at) for _, changed_at in versions.values()]
+    if policy.daily:
+        parts.append(today.isoformat())
+        # Gym-local midnight: the first request of the day is newer than any earlier copy
+        changed.append(datetime.combine(today, time.min, tzinfo=zone).astimezone(timezone.utc))
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    return Validators(
+        etag=f'W/"{digest}"',
+        last_modified=max(changed) if changed else None,
+        cache_control=policy.cache_control,
+    )
+
+
+def load_validators(
+    db: Session, request: Request, policy: CachePolicy, gym_id: uuid.UUID, *, variant: str = ""
+) -> Validators:
+    zone = gym_zone(db, gym_id) if policy.daily else timezone.utc
+    versions = gym_versions(db, gym_id, policy.scopes)
+    return build_validators(policy, request, gym_id, versions, variant=variant, zone=zone)
+
+
+async def load_validators_async(
+    db: AsyncSession, request: Request, policy: CachePolicy, gym_id: uuid.UUID, *, variant: str = ""
+) -> Validators:
+    zone = await db.run_sync(gym_zone, gym_id) if policy.daily else timezone.utc
+    versions = await gym_versions_async(db, gym_id, policy.scopes)
+    return build_validators(policy, request, gym_id, versions, variant=variant, zone=zone)
@@ -0,0 +1,106 @@
+"""
+JobRun bookkeeping shared by the batched background jobs.
+
+    with job_run(db, JOB_NAME, gym_id=gym_id, counter="expired") as progress:
+        while progress.batches < MAX_BATCHES:
+            ...
+            progress.add_batch(len(rows), gym_ids)
+    return progress.summary
+
+The JobRun row is committed as "running" before the body starts and
+finished as "success" or "failed" (after a rollback) with counts, duration
+and the job metric; failures are logged and re-raised.
+"""
+
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.logger import log_error, log_info
+from app.core.metrics import observe_job
+from app.models import JobRun
+
+# Safety valve: never loop forever if something keeps re-creating matching rows.
+MAX_BATCHES = 10_000
+
+
+@dataclass
+class JobProgress:
+    """Counters of one run; summary is filled in once the run has finished."""
+
+    counter: str
+    count: int = 0
+    batches: int = 0
+    gyms_affected: set[uuid.UUID] = field(default_factory=set)
+    summary: dict[str, Any] = field(default_factory=dict)
+
+    def add_batch(self, rows: int, gym_ids: Iterable[uuid.UUID]) -> None:
+        self.batches += 1
+        self.count += rows
+        self.gyms_affected.update(gym_ids)
+
+
+@contextmanager
+def job_run(
+    db: Session,
+    job_name: str,
+    *,
+    gym_id: uuid.UUID | None,
+    counter: str,
+) -> Iterator[JobProgress]:
+    """
+    Record one execution of job_name in job_runs.
+    counter names the row count in stats and the summary ("expired", "closed", ...).
+    Summary: run_id, <counter>, batches, gyms_affected, duration_ms.
+    """
+    started = time.perf_counter()
+    run = JobRun(
+        job_name=job_name,
+        status="running",
+        started_at=datetime.now(timezone.utc),
+        stats={"gym_id": str(gym_id) if gym_id else None},
+    )
+    db.add(run)
+    db.commit()
+
+    progress = JobProgress(counter)
+    try:
+        yield progress
+    except Exception as e:
+        db.rollback()
+        run.status = "failed"
+        run.error = str(e)[:2000]
+        _finish_run(db, run, started, progress, gym_id)
+        log_error(f"{job_name}_failed", error=e, **{counter: progress.count}, batches=progress.batches)
+        raise
+
+    run.status = "success"
+    progress.summary = _finish_run(db, run, started, progress, gym_id)
+    log_info(f"{job_name}_done", **progress.summary)
+
+
+def _finish_run(
+    db: Session,
+    run: JobRun,
+    started: float,
+    progress: JobProgress,
+    gym_id: uuid.UUID | None,
+) -> dict[str, Any]:
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    run.finished_at = datetime.now(timezone.utc)
+    run.duration_ms = duration_ms
+    observe_job(run.job_name, run.status, duration_ms / 1000)
+    counts = {
+        progress.counter: progress.count,
+        "batches": progress.batches,
+        "gyms_affected": len(progress.gyms_affected),
+    }
+    run.stats = {"gym_id": str(gym_id) if gym_id else None, **counts}
+    db.commit()
+    return {"run_id": str(run.id), **counts, "duration_ms": duration_ms}
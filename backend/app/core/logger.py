@@ -44,7 +44,7 @@ class StructuredFormatter(logging.Formatter):
         else:
             # Development format
             return (
-                f"{record.asctime} | {record.levelname:8} | "
+                f"{self.formatTime(record)} | {record.levelname:8} | "
                 f"{record.name}:{record.lineno} | {record.getMessage()}"
             )
 
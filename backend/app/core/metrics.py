@@ -0,0 +1,180 @@
+"""
+Prometheus metrics (GET /metrics, text exposition format).
+
+Exported:
+    activehq_http_request_duration_seconds  histogram   method, route
+    activehq_http_requests_total            counter     method, route, status
+    activehq_db_pool_wait_seconds           histogram   time spent waiting for a pooled connection
+    activehq_db_pool_{size,checked_out,overflow}  gauges, summed over live workers
+    activehq_cache_requests_total           counter     cache (key prefix), result (hit|miss|stale)
+    activehq_biometric_events_total         counter     result (processed|duplicate|conflict|failed)
+    activehq_job_duration_seconds           histogram   job, status
+    activehq_messages_total                 counter     provider, channel, result (sent|failed)
+    activehq_db_disconnects_total           counter     statements that failed on a dropped connection
+
+Request metrics are recorded by app.core.profiling.ProfilerMiddleware.
+
+Under gunicorn each worker has its own counters. entrypoint.sh points
+PROMETHEUS_MULTIPROC_DIR at an empty directory before the workers start; every
+worker then writes its samples there, /metrics aggregates all of them, and
+gunicorn.conf.py cleans up after workers that exit. Without that variable
+(local dev, tests) /metrics shows the current process only.
+"""
+
+import functools
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_JOB_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "activehq_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "activehq_http_requests_total",
+    "HTTP responses by route template and status code.",
+    ["method", "route", "status"],
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "activehq_db_pool_wait_seconds",
+    "Time a request waited for a pooled DB connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_SIZE = Gauge("activehq_db_pool_size", "Configured pool size.", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "activehq_db_pool_checked_out", "Connections currently checked out.", multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "activehq_db_pool_overflow",
+    "Connections open beyond pool_size (negative: unused pool slots).",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "activehq_cache_requests_total",
+    "app.core.cache lookups by key prefix.",
+    ["cache", "result"],
+)
+BIOMETRIC_EVENTS = Counter(
+    "activehq_biometric_events_total",
+    "Biometric punches ingested, by outcome.",
+    ["result"],
+)
+JOB_SECONDS = Histogram(
+    "activehq_job_duration_seconds",
+    "Background / cron job run time.",
+    ["job", "status"],
+    buckets=_JOB_BUCKETS,
+)
+MESSAGES = Counter(
+    "activehq_messages_total",
+    "Outbound messages by provider and channel.",
+    ["provider", "channel", "result"],
+)
+DB_DISCONNECTS = Counter(
+    "activehq_db_disconnects_total",
+    "Statements that hit a dropped DB connection (the pool reconnects).",
+)
+
+
+def observe_request(
+    method: str,
+    route: str,
+    status_code: int,
+    elapsed_seconds: float,
+    pool_wait_seconds: float,
+) -> None:
+    HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed_seconds)
+    HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+    DB_POOL_WAIT_SECONDS.observe(pool_wait_seconds)
+
+
+def observe_pool(pool) -> None:
+    """Refresh the pool gauges (QueuePool only; StaticPool/NullPool have no counters)."""
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL_SIZE.set(pool.size())
+    DB_POOL_CHECKED_OUT.set(pool.checkedout())
+    DB_POOL_OVERFLOW.set(pool.overflow())
+
+
+def record_db_disconnect() -> None:
+    DB_DISCONNECTS.inc()
+
+
+def record_cache(key: str, result: str) -> None:
+    CACHE_REQUESTS.labels(key.split(":", 1)[0], result).inc()
+
+
+def record_biometric_ingest(*, processed: int, duplicates: int, conflicts: int, failed: int) -> None:
+    for result, count in (
+        ("processed", processed),
+        ("duplicate", duplicates),
+        ("conflict", conflicts),
+        ("failed", failed),
+    ):
+        if count:
+            BIOMETRIC_EVENTS.labels(result).inc(count)
+
+
+def observe_job(job: str, status: str, seconds: float) -> None:
+    JOB_SECONDS.labels(job, status).observe(seconds)
+
+
+@contextmanager
+def track_job(job: str) -> Iterator[None]:
+    """Time a job without its own JobRun bookkeeping."""
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        yield
+        status = "success"
+    finally:
+        observe_job(job, status, time.perf_counter() - started)
+
+
+def counts_messages(provider: str, channel: str = "email") -> Callable:
+    """
+    Count a send function's results. Works with SendResult (success, channel)
+    and with (ok, error) tuples, which are counted under `channel`.
+    """
+
+    def decorate(send: Callable) -> Callable:
+        @functools.wraps(send)
+        def wrapper(*args, **kwargs):
+            result = send(*args, **kwargs)
+            if isinstance(result, tuple):
+                success, sent_channel = bool(result[0]), channel
+            else:
+                success, sent_channel = result.success, result.channel
+            MESSAGES.labels(provider, sent_channel, "sent" if success else "failed").inc()
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def render_latest() -> tuple[bytes, str]:
+    """(body, content type) for /metrics."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
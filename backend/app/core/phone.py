@@ -0,0 +1,19 @@
+"""
+Phone number normalisation shared by stored members and search queries.
+"""
+
+import re
+
+
+def national_digits(phone: str | None) -> str:
+    """
+    Digits of an Indian phone number without the +91 / 91 country code or the
+    0 trunk prefix ("+91 98765 43210", "098765 43210" -> "9876543210").
+    Used for Member.phone_digits and the search box, so both sides compare alike.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    if (phone or "").lstrip().startswith("+91") or (len(digits) > 10 and digits.startswith("91")):
+        return digits[2:]
+    if len(digits) > 10 and digits.startswith("0"):
+        return digits[1:]
+    return digits
@@ -0,0 +1,331 @@
+"""
+Per-request query profiler.
+
+ProfilerMiddleware opens a RequestProfile for each HTTP request (held in a
+context variable, so it follows the request into FastAPI's threadpool), and
+SQLAlchemy cursor events add every statement's count and duration to it.
+TimedQueuePool (TimedAsyncQueuePool for the async engine) records how long
+the request waited for a pooled connection.
+
+Per request:
+    - outside production: X-DB-Queries, X-DB-Time-Ms, X-DB-Pool-Wait-Ms,
+      X-Response-Time-Ms and X-Profile-Flags response headers
+    - in production: one structured log line (warning if over budget, with the
+      slowest normalized statements)
+    - always: aggregated into route_stats, served by GET /metrics/routes, and
+      into the Prometheus metrics in app.core.metrics
+
+A request is flagged "queries" above settings.profiler_query_budget statements
+and "latency" above settings.profiler_latency_budget_ms.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import log_api_response, log_warning
+
+# Histogram bucket upper bounds (ms / statements); the last bucket is +Inf.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 25, 50, 100)
+
+# Longest normalized statement kept (slow-statement lists, logs).
+MAX_STATEMENT_CHARS = 300
+
+_current: ContextVar["RequestProfile | None"] = ContextVar("request_profile", default=None)
+
+
+@dataclass
+class RequestProfile:
+    query_count: int = 0
+    db_ms: float = 0.0
+    pool_wait_ms: float = 0.0
+    # (ms, normalized statement), slowest first, at most settings.profiler_slow_statements
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    def add_statement(self, statement: str, elapsed_ms: float) -> None:
+        self.query_count += 1
+        self.db_ms += elapsed_ms
+        keep = settings.profiler_slow_statements
+        if keep <= 0 or (len(self.slowest) >= keep and elapsed_ms <= self.slowest[-1][0]):
+            return
+        self.slowest.append((elapsed_ms, normalize_statement(statement)))
+        self.slowest.sort(key=lambda item: -item[0])
+        del self.slowest[keep:]
+
+    def flags(self, elapsed_ms: float) -> list[str]:
+        flags = []
+        if self.query_count > settings.profiler_query_budget:
+            flags.append("queries")
+        if elapsed_ms > settings.profiler_latency_budget_ms:
+            flags.append("latency")
+        return flags
+
+
+def current_profile() -> RequestProfile | None:
+    return _current.get()
+
+
+@contextmanager
+def profiled() -> Iterator[RequestProfile]:
+    """Profile the statements run inside the block, outside a request (benchmarks, tests)."""
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement shape: literals and bind params become ?, IN lists collapse to (?...)."""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("(?...)", text)
+    return text[:MAX_STATEMENT_CHARS]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.get("profile_started")
+    if profile is None or not started:
+        return
+    profile.add_statement(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute.
+    conn = exception_context.connection
+    started = conn.info.get("profile_started") if conn is not None else None
+    if started:
+        started.pop()
+
+
+class _TimedConnect:
+    """Charges the time spent waiting for a pooled connection to the request."""
+
+    def connect(self):
+        profile = _current.get()
+        if profile is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            profile.pool_wait_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedQueuePool(_TimedConnect, QueuePool):
+    """QueuePool for the sync engine."""
+
+
+class TimedAsyncQueuePool(_TimedConnect, AsyncAdaptedQueuePool):
+    """Same for the async engine (checkout runs inside the request's greenlet)."""
+
+
+class RouteStats:
+    """Per-route request / DB histograms for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], dict] = {}
+
+    def record(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        elapsed_ms: float,
+        profile: RequestProfile,
+        flagged: bool,
+    ) -> None:
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = {
+                    "count": 0,
+                    "errors": 0,
+                    "flagged": 0,
+                    "latency_ms_sum": 0.0,
+                    "latency_ms_max": 0.0,
+                    "db_ms_sum": 0.0,
+                    "queries_sum": 0,
+                    "queries_max": 0,
+                    "pool_wait_ms_sum": 0.0,
+                    "latency_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                    "query_buckets": [0] * (len(QUERY_BUCKETS) + 1),
+                }
+            stats["count"] += 1
+            stats["errors"] += status_code >= 500
+            stats["flagged"] += flagged
+            stats["latency_ms_sum"] += elapsed_ms
+            stats["latency_ms_max"] = max(stats["latency_ms_max"], elapsed_ms)
+            stats["db_ms_sum"] += profile.db_ms
+            stats["queries_sum"] += profile.query_count
+            stats["queries_max"] = max(stats["queries_max"], profile.query_count)
+            stats["pool_wait_ms_sum"] += profile.pool_wait_ms
+            stats["latency_buckets"][bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            stats["query_buckets"][bisect_left(QUERY_BUCKETS, profile.query_count)] += 1
+
+    def snapshot(self) -> list[dict]:
+        """One dict per route, slowest total time first. Histogram buckets are cumulative."""
+        with self._lock:
+            items = [
+                (key, {name: list(v) if isinstance(v, list) else v for name, v in value.items()})
+                for key, value in self._routes.items()
+            ]
+        result = []
+        for (method, route), stats in items:
+            count = stats["count"]
+            result.append(
+                {
+                    "method": method,
+                    "route": route,
+                    "count": count,
+                    "errors": stats["errors"],
+                    "flagged": stats["flagged"],
+                    "latency_ms_avg": round(stats["latency_ms_sum"] / count, 2),
+                    "latency_ms_max": round(stats["latency_ms_max"], 2),
+                    "latency_ms_sum": round(stats["latency_ms_sum"], 2),
+                    "db_ms_avg": round(stats["db_ms_sum"] / count, 2),
+                    "queries_avg": round(stats["queries_sum"] / count, 2),
+                    "queries_max": stats["queries_max"],
+                    "pool_wait_ms_avg": round(stats["pool_wait_ms_sum"] / count, 2),
+                    "latency_histogram_ms": _cumulative(LATENCY_BUCKETS_MS, stats["latency_buckets"]),
+                    "query_histogram": _cumulative(QUERY_BUCKETS, stats["query_buckets"]),
+                }
+            )
+        result.sort(key=lambda row: -row["latency_ms_sum"])
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+def _cumulative(bounds: tuple, counts: list[int]) -> dict[str, int]:
+    result = {}
+    running = 0
+    for bound, count in zip((*bounds, "+Inf"), counts):
+        running += count
+        result[str(bound)] = running
+    return result
+
+
+route_stats = RouteStats()
+
+
+def _route_template(scope) -> str:
+    """
+    Request path with path-parameter segments put back as {name}.
+    (Routes of included routers only know their path relative to the router.)
+    """
+    if "endpoint" not in scope:
+        # Unmatched paths share one bucket so scanners cannot grow the stats table.
+        return "<unmatched>"
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    if not names:
+        return scope["path"]
+    return "/".join(f"{{{names[part]}}}" if part in names else part for part in scope["path"].split("/"))
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware (no extra task, so the context variable reaches the endpoint)."""
+
+    def __init__(self, app, pool=None):
+        self.app = app
+        # Engine pool whose size / checked-out / overflow gauges are refreshed per request.
+        self.pool = pool
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiler_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        status_code = 500
+        expose = settings.environment != "production"
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if expose:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    headers = list(message.get("headers", []))
+                    headers += [
+                        (b"x-db-queries", str(profile.query_count).encode()),
+                        (b"x-db-time-ms", f"{profile.db_ms:.1f}".encode()),
+                        (b"x-db-pool-wait-ms", f"{profile.pool_wait_ms:.1f}".encode()),
+                        (b"x-response-time-ms", f"{elapsed_ms:.1f}".encode()),
+                    ]
+                    flags = profile.flags(elapsed_ms)
+                    if flags:
+                        headers.append((b"x-profile-flags", ",".join(flags).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._finish(scope, status_code, (time.perf_counter() - started) * 1000, profile, expose)
+
+    def _finish(self, scope, status_code: int, elapsed_ms: float, profile: RequestProfile, exposed: bool) -> None:
+        method = scope["method"]
+        route = _route_template(scope)
+        flags = profile.flags(elapsed_ms)
+        route_stats.record(method, route, status_code, elapsed_ms, profile, bool(flags))
+        metrics.observe_request(method, route, status_code, elapsed_ms / 1000, profile.pool_wait_ms / 1000)
+        if self.pool is not None:
+            metrics.observe_pool(self.pool)
+        if exposed:
+            return
+        context = {
+            "route": route,
+            "db_queries": profile.query_count,
+            "db_ms": round(profile.db_ms, 1),
+            "pool_wait_ms": round(profile.pool_wait_ms, 1),
+        }
+        if flags:
+            log_warning(
+                "request_over_budget",
+                method=method,
+                status_code=status_code,
+                duration_ms=round(elapsed_ms, 1),
+                flags=flags,
+                slowest=[{"ms": round(ms, 1), "sql": sql} for ms, sql in profile.slowest],
+                **context,
+            )
+        else:
+            log_api_response(method, scope["path"], status_code, round(elapsed_ms, 1), **context)
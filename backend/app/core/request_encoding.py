@@ -0,0 +1,50 @@
+"""
+Accept gzip-compressed request bodies (Content-Encoding: gzip).
+
+Used by routers that receive large machine-generated payloads, e.g. the
+biometric agent's batch uploads:
+
+    router = APIRouter(route_class=GzipRequestRoute)
+"""
+
+import zlib
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+# Upper bound on a decompressed body; guards against gzip bombs.
+MAX_DECOMPRESSED_BYTES = 8 * 1024 * 1024
+
+
+class GzipRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            raw = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                try:
+                    raw = decoder.decompress(raw, MAX_DECOMPRESSED_BYTES)
+                except zlib.error as exc:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Invalid gzip body",
+                    ) from exc
+                if decoder.unconsumed_tail:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Decompressed body too large",
+                    )
+            self._body = raw
+        return self._body
+
+
+class GzipRequestRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return custom_route_handler
@@ -1,14 +1,51 @@
 """
 API Response utilities for consistent response formatting.
+
+ORJSONResponse is the app's default response class. PreEncodedJSONResponse
+sends bytes that are already JSON (e.g. a cached payload) without decoding
+or re-encoding them.
 """
 
+from decimal import Decimal
 from typing import Any, Generic, TypeVar
 
+import orjson
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from starlette.responses import Response
 
 T = TypeVar("T")
 
 
+def _orjson_default(value: Any) -> Any:
+    """Types orjson does not serialize natively, encoded the way jsonable_encoder does."""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_bytes(content: Any) -> bytes:
+    """Encode content to JSON bytes (datetime, date, UUID and enums natively)."""
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return json_bytes(content)
+
+
+class PreEncodedJSONResponse(Response):
+    """Response whose content is already-encoded JSON bytes."""
+
+    media_type = "application/json"
+
+
 class ApiResponse(BaseModel, Generic[T]):
     """
     Standard API response wrapper.
@@ -72,6 +109,9 @@ def paginated_response(
 
 __all__ = [
     "ApiResponse",
+    "ORJSONResponse",
+    "PreEncodedJSONResponse",
+    "json_bytes",
     "success_response",
     "error_response",
     "paginated_response",
@@ -6,15 +6,20 @@ Main FastAPI application entry point.
 from contextlib import asynccontextmanager
 
 import sentry_sdk
-from fastapi import FastAPI, HTTPException, Query, status
+from fastapi import FastAPI, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from sqlalchemy import text
 
+from app.biometric.stream import punch_batcher
+from app.core.compression import CompressionLevels, CompressionMiddleware
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import PRIMARY_PIN_HEADER, PrimaryPinMiddleware, async_engine, engine, pool_stats
+from app.core.metrics import render_latest
+from app.core.profiling import ProfilerMiddleware, route_stats
 from app.core.rate_limit import limiter
+from app.core.responses import ORJSONResponse
 
 
 @asynccontextmanager
@@ -33,8 +38,11 @@ async def lifespan(app: FastAPI):
             environment=settings.environment,
         )
         print("   Sentry monitoring enabled")
+    punch_batcher.start()
     yield
     # Shutdown
+    punch_batcher.stop()
+    await async_engine.dispose()
     print(f"👋 Shutting down {settings.app_name}")
 
 
@@ -44,12 +52,33 @@ app = FastAPI(
     version=settings.app_version,
     description="Multi-tenant gym management SaaS platform",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.debug else None,  # Disable docs in production
     redoc_url="/redoc" if settings.debug else None,
 )
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Compression (innermost). Lists and reports polled from phones on mobile data
+# get a higher brotli level; one-off migration previews a cheaper one.
+app.add_middleware(
+    CompressionMiddleware,
+    route_levels={
+        "GET /api/v1/members": CompressionLevels(gzip=6, brotli=5),
+        "GET /api/v1/attendance": CompressionLevels(gzip=6, brotli=5),
+        "GET /api/v1/attendance/member/{member_id}": CompressionLevels(gzip=6, brotli=5),
+        "GET /api/m/me/attendance": CompressionLevels(gzip=6, brotli=5),
+        "POST /api/v1/migration/reconciliation": CompressionLevels(gzip=6, brotli=5),
+        **{
+            f"POST /api/v1/migration/{kind}/preview": CompressionLevels(gzip=4, brotli=4)
+            for kind in ("members", "plans", "memberships", "payments", "attendance")
+        },
+    },
+)
+
+# Read-your-writes pin for replica reads (X-Primary-Pin, echoed back by the clients)
+app.add_middleware(PrimaryPinMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -58,8 +87,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PRIMARY_PIN_HEADER],
 )
 
+# Query profiler (outermost, so it times everything below it)
+app.add_middleware(ProfilerMiddleware, pool=engine.pool)
+
 
 @app.get("/")
 async def root():
@@ -93,7 +126,7 @@ async def readiness_check():
 
 @app.get("/health/detailed")
 async def detailed_health_check():
-    """Detailed health for diagnostics (includes DB status)."""
+    """Detailed health for diagnostics (includes DB status and connection pool usage)."""
     db_status = "healthy"
     try:
         with engine.connect() as connection:
@@ -103,6 +136,39 @@ async def detailed_health_check():
     return {
         "status": "healthy" if db_status == "healthy" else "degraded",
         "services": {"api": "healthy", "database": db_status},
+        "db_role": settings.db_role,
+        "pools": pool_stats(),
+    }
+
+
+def _check_metrics_secret(secret: str) -> None:
+    expected = settings.metrics_secret or settings.cron_secret
+    if not expected or secret != expected:
+        raise HTTPException(status_code=403, detail="Invalid or missing metrics secret")
+
+
+@app.get("/metrics")
+async def prometheus_metrics(secret: str = Query(..., description="METRICS_SECRET (or CRON_SECRET)")):
+    """
+    Prometheus scrape endpoint (all gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set).
+    Requires: ?secret=<METRICS_SECRET>, falling back to CRON_SECRET when unset.
+    """
+    _check_metrics_secret(secret)
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/metrics/routes")
+async def route_metrics(secret: str = Query(..., description="METRICS_SECRET (or CRON_SECRET)")):
+    """
+    Per-route latency / query-count histograms for this worker process.
+    Requires: ?secret=<METRICS_SECRET>, falling back to CRON_SECRET when unset.
+    """
+    _check_metrics_secret(secret)
+    return {
+        "query_budget": settings.profiler_query_budget,
+        "latency_budget_ms": settings.profiler_latency_budget_ms,
+        "routes": route_stats.snapshot(),
     }
 
 
@@ -2,17 +2,22 @@
 Member-portal data endpoints (read-only for v1).
 
 Mounted at /api/m.  All routes require a member-scoped JWT.
+
+Members open the app many times a day and every screen calls these, so they
+run on the async session instead of the threadpool, reading from the replica
+when one is configured (AsyncReadDbDep).
 """
 
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Query, Request, Response
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import joinedload
 
-from app.core.database import get_db
+from app.auth.dependencies import AsyncReadDbDep
+from app.core.http_cache import CachePolicy, load_validators_async
 from app.member_portal.dependencies import CurrentMemberDep
 from app.member_portal.schemas import (
     ActivePlan,
@@ -26,13 +31,21 @@ from app.models.enums import MembershipStatus
 
 router = APIRouter()
 
+# Per member (variant), from the gym's counters; days_remaining changes at midnight.
+MY_PLAN_CACHE = CachePolicy(
+    "portal_plan",
+    scopes=("memberships", "plans", "payments"),
+    cache_control="private, max-age=30",
+    daily=True,
+)
+
 
 # ─────────────────────────────────────────────────────────────────────
 # Profile + active plan
 # ─────────────────────────────────────────────────────────────────────
 
 @router.get("/me", response_model=MemberMe)
-def me(member: CurrentMemberDep) -> MemberMe:
+async def me(member: CurrentMemberDep) -> MemberMe:
     return MemberMe(
         id=member.id,
         gym_id=member.gym_id,
@@ -46,22 +59,30 @@ def me(member: CurrentMemberDep) -> MemberMe:
 
 
 @router.get("/me/plan", response_model=ActivePlan)
-def my_plan(
+async def my_plan(
+    request: Request,
+    response: Response,
     member: CurrentMemberDep,
-    db: Annotated[Session, Depends(get_db)],
-) -> ActivePlan:
+    db: AsyncReadDbDep,
+) -> ActivePlan | Response:
     """
     Return the *most relevant* membership: prefer the latest active one,
     otherwise fall back to the latest membership of any status so the UI
     can still show expiry / dues.
     """
+    validators = await load_validators_async(
+        db, request, MY_PLAN_CACHE, member.gym_id, variant=str(member.id)
+    )
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
     stmt = (
         select(Membership)
         .options(joinedload(Membership.plan))
         .where(Membership.member_id == member.id)
         .order_by(Membership.status.desc(), Membership.end_date.desc())
     )
-    rows = list(db.execute(stmt).scalars().all())
+    rows = list((await db.execute(stmt)).scalars().all())
     if not rows:
         return ActivePlan()
 
@@ -95,28 +116,28 @@ def my_plan(
 # ─────────────────────────────────────────────────────────────────────
 
 @router.get("/me/attendance", response_model=list[AttendanceEntry])
-def my_attendance(
+async def my_attendance(
     member: CurrentMemberDep,
-    db: Annotated[Session, Depends(get_db)],
+    db: AsyncReadDbDep,
     days: Annotated[int, Query(ge=1, le=180)] = 90,
     limit: Annotated[int, Query(ge=1, le=200)] = 60,
 ) -> list[AttendanceEntry]:
     since = datetime.now(timezone.utc) - timedelta(days=days)
     rows = (
-        db.execute(
+        (await db.execute(
             select(Attendance)
             .where(Attendance.member_id == member.id)
             .where(Attendance.check_in_time >= since)
             .order_by(Attendance.check_in_time.desc())
             .limit(limit)
-        )
+        ))
         .scalars()
         .all()
     )
     out: list[AttendanceEntry] = []
     for row in rows:
         duration: int | None = None
-        if row.check_out_time and row.check_in_time:
+        if row.check_out_time and row.check_in_time and not row.auto_closed:
             seconds = (row.check_out_time - row.check_in_time).total_seconds()
             if seconds > 0:
                 duration = int(seconds // 60)
@@ -136,18 +157,18 @@ def my_attendance(
 # ─────────────────────────────────────────────────────────────────────
 
 @router.get("/me/payments", response_model=list[PaymentEntry])
-def my_payments(
+async def my_payments(
     member: CurrentMemberDep,
-    db: Annotated[Session, Depends(get_db)],
+    db: AsyncReadDbDep,
     limit: Annotated[int, Query(ge=1, le=50)] = 20,
 ) -> list[PaymentEntry]:
     rows = (
-        db.execute(
+        (await db.execute(
             select(Payment)
             .where(Payment.member_id == member.id)
             .order_by(Payment.payment_date.desc(), Payment.created_at.desc())
             .limit(limit)
-        )
+        ))
         .scalars()
         .all()
     )
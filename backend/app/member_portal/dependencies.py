@@ -6,9 +6,10 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from app.core.database import get_db
+from app.core.database import get_async_read_db
 from app.member_portal.service import decode_member_access_token
 from app.models import Member
 
@@ -16,9 +17,9 @@ from app.models import Member
 member_bearer = HTTPBearer(auto_error=False)
 
 
-def get_current_member(
+async def get_current_member(
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(member_bearer)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
 ) -> Member:
     if credentials is None:
         raise HTTPException(
@@ -41,10 +42,12 @@ def get_current_member(
             detail="Malformed token",
         )
 
-    member = db.execute(
-        select(Member)
-        .options(joinedload(Member.gym))
-        .where(Member.id == member_id, Member.is_active.is_(True))
+    member = (
+        await db.execute(
+            select(Member)
+            .options(joinedload(Member.gym))
+            .where(Member.id == member_id, Member.is_active.is_(True))
+        )
     ).scalar_one_or_none()
 
     if member is None or member.gym is None or not member.gym.is_active:
@@ -8,7 +8,14 @@ from datetime import date, datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
 from fastapi.responses import FileResponse
 
-from app.auth.dependencies import TenantDep, DbDep, require_manager_or_above, require_owner
+from app.auth.dependencies import (
+    AsyncDbDep,
+    AsyncTenantDep,
+    TenantDep,
+    DbDep,
+    require_manager_or_above,
+    require_owner,
+)
 from app.core.logger import logger
 from app.members.schemas import (
     MemberCreate,
@@ -16,6 +23,7 @@ from app.members.schemas import (
     MemberResponse,
     MemberWithMembership,
     MemberListResponse,
+    MemberTypeaheadItem,
 )
 from app.members.service import MemberService
 from app.members.photo_storage import (
@@ -60,9 +68,9 @@ def create_member(
 
 
 @router.get("", response_model=MemberListResponse)
-def list_members(
-    tenant: TenantDep,
-    db: DbDep,
+async def list_members(
+    tenant: AsyncTenantDep,
+    db: AsyncDbDep,
     query: str | None = Query(None, description="Search by name, phone, or member code"),
     status: str | None = Query(None, description="Filter: active, expired, or all"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -75,16 +83,33 @@ def list_members(
     - **status**: Filter by membership status (active, expired, or all)
     - Supports pagination
     """
-    service = MemberService(db)
-    return service.list_members(
-        gym_id=tenant.gym_id,
-        query=query,
-        status=status,
-        page=page,
-        page_size=page_size,
+    return await db.run_sync(
+        lambda s: MemberService(s).list_members(
+            gym_id=tenant.gym_id,
+            query=query,
+            status=status,
+            page=page,
+            page_size=page_size,
+        )
     )
 
 
+@router.get("/typeahead", response_model=list[MemberTypeaheadItem])
+def member_typeahead(
+    tenant: TenantDep,
+    db: DbDep,
+    q: str = Query(..., min_length=1, max_length=100, description="Name, phone digits or member code"),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """
+    Ranked suggestions for the front-desk search box.
+    
+    Returns only id, name, phone and photo_url so it can run on every keystroke.
+    """
+    service = MemberService(db)
+    return service.typeahead(tenant.gym_id, q, limit)
+
+
 @router.get("/expiring", response_model=list[MemberWithMembership])
 def get_expiring_members(
     tenant: TenantDep,
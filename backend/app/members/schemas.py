@@ -124,6 +124,14 @@ class MemberListResponse(BaseModel):
     total_pages: int
 
 
+class MemberTypeaheadItem(BaseModel):
+    """Lightweight search-box suggestion."""
+    id: uuid.UUID
+    name: str
+    phone: str
+    photo_url: str | None = None
+
+
 class MemberSearchParams(BaseModel):
     """Member search/filter parameters."""
     query: str | None = None  # Search by name or phone
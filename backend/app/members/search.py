@@ -0,0 +1,177 @@
+"""
+Member search for the front-desk search box and typeahead.
+
+PostgreSQL: name / member_code ILIKE and phone_digits LIKE are served by
+pg_trgm GIN indexes, and the trigram similarity operator (name % term) adds
+typo-tolerant name matches. SQLite (tests) runs the same filters without the
+similarity operator; its typeahead ranks the gym's members in memory with
+match_tier, the Python twin of rank_expression.
+
+Ranking (higher first, then name similarity on PostgreSQL, then name):
+    100 member_code equals term
+     90 phone digits equal the query digits
+     80 name equals term
+     70 name starts with term
+     60 a later word of the name starts with term
+     50 phone digits / member_code start with the term
+     40 substring match anywhere
+     20 fuzzy (similar) name only
+"""
+
+import re
+import uuid
+from difflib import SequenceMatcher
+
+from sqlalchemy import and_, case, false, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.phone import national_digits
+from app.models import Member
+
+# Phone matching kicks in once the query has this many digits.
+MIN_PHONE_DIGITS = 3
+# In-memory fuzzy match cut-off (SequenceMatcher ratio) for the SQLite fallback.
+FUZZY_RATIO = 0.6
+
+_PHONE_QUERY = re.compile(r"^[\d\s()+\-.]+$")
+
+
+def is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def query_digits(term: str) -> str | None:
+    """Digits to match against phone_digits, or None if the term is not phone-like."""
+    if not _PHONE_QUERY.match(term):
+        return None
+    # Same normalisation as the stored column: no country code / trunk prefix.
+    digits = national_digits(term)
+    return digits if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(db: Session, term: str):
+    """WHERE clause matching term against name, member_code and phone digits."""
+    term = term.strip()
+    escaped = _escape_like(term)
+    digits = query_digits(term)
+    conditions = [
+        Member.name.ilike(f"%{escaped}%", escape="\\"),
+        Member.member_code.ilike(f"%{escaped}%", escape="\\"),
+        Member.phone_digits.like(f"%{digits}%") if digits else false(),
+    ]
+    if is_postgres(db) and len(term) >= 3:
+        conditions.append(Member.name.op("%")(term))
+    return or_(*conditions)
+
+
+def rank_expression(term: str):
+    """SQL rank of a matching row; mirrors match_tier."""
+    term = term.strip()
+    lowered = term.lower()
+    escaped = _escape_like(term)
+    digits = query_digits(term)
+    whens = [(func.lower(Member.member_code) == lowered, 100)]
+    if digits:
+        whens.append((Member.phone_digits == digits, 90))
+    whens += [
+        (func.lower(Member.name) == lowered, 80),
+        (Member.name.ilike(f"{escaped}%", escape="\\"), 70),
+        (Member.name.ilike(f"% {escaped}%", escape="\\"), 60),
+        (
+            or_(
+                Member.member_code.ilike(f"{escaped}%", escape="\\"),
+                Member.phone_digits.like(f"{digits}%") if digits else false(),
+            ),
+            50,
+        ),
+        (
+            or_(
+                Member.name.ilike(f"%{escaped}%", escape="\\"),
+                Member.member_code.ilike(f"%{escaped}%", escape="\\"),
+                Member.phone_digits.like(f"%{digits}%") if digits else false(),
+            ),
+            40,
+        ),
+    ]
+    return case(*whens, else_=20)
+
+
+def order_by(db: Session, term: str) -> list:
+    """ORDER BY for ranked results."""
+    ordering = [rank_expression(term).desc()]
+    if is_postgres(db):
+        ordering.append(func.similarity(Member.name, term.strip()).desc())
+    ordering.append(Member.name)
+    return ordering
+
+
+def match_tier(
+    term: str,
+    *,
+    name: str,
+    phone_digits: str | None,
+    member_code: str | None,
+) -> int:
+    """Rank of one member for term (0 = no match). Python twin of rank_expression."""
+    lowered = term.strip().lower()
+    if not lowered:
+        return 0
+    digits = query_digits(lowered)
+    name_l = name.lower()
+    code_l = (member_code or "").lower()
+    phone = phone_digits or ""
+
+    if code_l and code_l == lowered:
+        return 100
+    if digits and phone == digits:
+        return 90
+    if name_l == lowered:
+        return 80
+    if name_l.startswith(lowered):
+        return 70
+    if f" {lowered}" in name_l:
+        return 60
+    if (code_l and code_l.startswith(lowered)) or (digits and phone.startswith(digits)):
+        return 50
+    if lowered in name_l or lowered in code_l or (digits and digits in phone):
+        return 40
+    if len(lowered) >= 3 and any(
+        SequenceMatcher(None, lowered, part).ratio() >= FUZZY_RATIO for part in [name_l, *name_l.split()]
+    ):
+        return 20
+    return 0
+
+
+def typeahead(db: Session, gym_id: uuid.UUID, term: str, limit: int = 8) -> list[dict]:
+    """Top matches for the search box: id, name, phone, photo_url only."""
+    term = term.strip()
+    if not term:
+        return []
+    columns = (Member.id, Member.name, Member.phone, Member.photo_url)
+    active = and_(Member.gym_id == gym_id, Member.is_active == True)  # noqa: E712
+
+    if is_postgres(db):
+        rows = db.execute(
+            select(*columns)
+            .where(active, search_filter(db, term))
+            .order_by(*order_by(db, term))
+            .limit(limit)
+        ).all()
+        return [row._asdict() for row in rows]
+
+    # SQLite fallback: rank the gym's members in memory.
+    rows = db.execute(select(*columns, Member.phone_digits, Member.member_code).where(active)).all()
+    scored = []
+    for row in rows:
+        tier = match_tier(term, name=row.name, phone_digits=row.phone_digits, member_code=row.member_code)
+        if tier:
+            scored.append((-tier, row.name, row))
+    scored.sort(key=lambda item: (item[0], item[1]))
+    return [
+        {"id": row.id, "name": row.name, "phone": row.phone, "photo_url": row.photo_url}
+        for _, _, row in scored[:limit]
+    ]
@@ -6,9 +6,12 @@ import uuid
 from datetime import date
 from decimal import Decimal
 
-from sqlalchemy import select, func, or_, and_
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, select, func, and_
+from sqlalchemy.orm import Session, lazyload
 
+from app.biometric import resolver
+from app.members import search
+from app.members.typeahead_index import typeahead_indexes
 from app.models import Member, Membership, Plan
 from app.models.enums import MembershipStatus
 from app.members.schemas import (
@@ -17,6 +20,7 @@ from app.members.schemas import (
     MemberSummary,
     MemberWithMembership,
     MemberListResponse,
+    MemberTypeaheadItem,
 )
 
 
@@ -60,7 +64,11 @@ class MemberService:
         
         self.db.add(member)
         self.db.commit()
+        if member.member_code:
+            # May replace a cached "unknown user" for this code.
+            resolver.invalidate_gym_identities(gym_id)
         self.db.refresh(member)
+        typeahead_indexes.member_changed(member)
         
         return member
     
@@ -102,7 +110,10 @@ class MemberService:
             setattr(member, field, value)
         
         self.db.commit()
+        if "member_code" in update_data or "is_active" in update_data:
+            resolver.invalidate_gym_identities(member.gym_id)
         self.db.refresh(member)
+        typeahead_indexes.member_changed(member)
         
         return member
     
@@ -110,14 +121,18 @@ class MemberService:
         """Soft delete a member."""
         member.is_active = False
         self.db.commit()
+        resolver.invalidate_gym_identities(member.gym_id)
         self.db.refresh(member)
+        typeahead_indexes.member_changed(member)
         return member
     
     def reactivate_member(self, member: Member) -> Member:
         """Reactivate a deleted member."""
         member.is_active = True
         self.db.commit()
+        resolver.invalidate_gym_identities(member.gym_id)
         self.db.refresh(member)
+        typeahead_indexes.member_changed(member)
         return member
     
     def list_members(
@@ -144,14 +159,10 @@ class MemberService:
             Member.is_active == True,  # noqa: E712
         )
         
-        # Search filter
+        # Search filter (trigram-indexed on PostgreSQL, see app.members.search)
+        query = (query or "").strip() or None
         if query:
-            search_filter = or_(
-                Member.name.ilike(f"%{query}%"),
-                Member.phone.ilike(f"%{query}%"),
-                Member.member_code.ilike(f"%{query}%"),
-            )
-            base_query = base_query.where(search_filter)
+            base_query = base_query.where(search.search_filter(self.db, query))
         
         # Status filter (requires join with memberships)
         today = date.today()
@@ -210,18 +221,52 @@ class MemberService:
         offset = (page - 1) * page_size
         
         # Fetch items
-        items_query = base_query.order_by(Member.name).offset(offset).limit(page_size)
-        result = self.db.execute(items_query)
-        members = result.scalars().all()
+        ordering = search.order_by(self.db, query) if query else [Member.name]
+        # Plain row tuples: the summary needs six columns, not Member entities
+        items_query = (
+            base_query.with_only_columns(
+                Member.id,
+                Member.name,
+                Member.phone,
+                Member.member_code,
+                Member.joined_date,
+                Member.is_active,
+            )
+            .order_by(*ordering)
+            .offset(offset)
+            .limit(page_size)
+        )
+        rows = self.db.execute(items_query).all()
+        latest = self._latest_membership_summaries(gym_id, [row.id for row in rows])
         
         return MemberListResponse(
-            items=[self._member_summary_with_membership(gym_id, m) for m in members],
+            items=[
+                self._member_summary_with_membership(row, latest.get(row.id))
+                for row in rows
+            ],
             total=total,
             page=page,
             page_size=page_size,
             total_pages=total_pages,
         )
     
+    def typeahead(
+        self,
+        gym_id: uuid.UUID,
+        query: str,
+        limit: int = 8,
+    ) -> list[MemberTypeaheadItem]:
+        """
+        Best matches for the search box (id, name, phone, photo only).
+        
+        Served from the in-process prefix index; only queries it cannot
+        answer (typos, mid-word fragments) go to the ranked SQL search.
+        """
+        rows = typeahead_indexes.get(self.db, gym_id).lookup(query, limit)
+        if not rows:
+            rows = search.typeahead(self.db, gym_id, query, limit)
+        return [MemberTypeaheadItem(**row) for row in rows]
+    
     def get_member_with_membership(
         self,
         gym_id: uuid.UUID,
@@ -233,46 +278,7 @@ class MemberService:
         if not member:
             return None
         
-        # Get current/latest membership
-        today = date.today()
-        current_membership = self.db.execute(
-            select(Membership)
-            .where(
-                Membership.gym_id == gym_id,
-                Membership.member_id == member_id,
-            )
-            .order_by(Membership.end_date.desc())
-            .limit(1)
-        ).scalar_one_or_none()
-        
-        # Build response
-        response_data = {
-            **member.__dict__,
-            "current_membership_status": None,
-            "current_membership_end": None,
-            "current_plan_name": None,
-            "amount_due": None,
-        }
-        
-        if current_membership:
-            # Determine actual status based on date
-            if current_membership.status == MembershipStatus.ACTIVE and current_membership.end_date < today:
-                response_data["current_membership_status"] = MembershipStatus.EXPIRED
-            else:
-                response_data["current_membership_status"] = current_membership.status
-            
-            response_data["current_membership_end"] = current_membership.end_date
-            response_data["amount_due"] = float(current_membership.amount_total - current_membership.amount_paid)
-            
-            # Get plan name
-            plan = self.db.execute(
-                select(Plan).where(Plan.id == current_membership.plan_id)
-            ).scalar_one_or_none()
-            
-            if plan:
-                response_data["current_plan_name"] = plan.name
-        
-        return MemberWithMembership(**response_data)
+        return self._member_with_membership(member, self._latest_memberships(gym_id, [member.id]))
     
     def get_expiring_members(
         self,
@@ -292,8 +298,8 @@ class MemberService:
         end_date = today + timedelta(days=days)
         
         # Find active memberships expiring soon
-        expiring_memberships = self.db.execute(
-            select(Membership)
+        expiring_member_ids = self.db.execute(
+            select(Membership.member_id)
             .where(
                 Membership.gym_id == gym_id,
                 Membership.status == MembershipStatus.ACTIVE,
@@ -303,13 +309,9 @@ class MemberService:
             .order_by(Membership.end_date)
         ).scalars().all()
         
-        results = []
-        for membership in expiring_memberships:
-            member_data = self.get_member_with_membership(gym_id, membership.member_id)
-            if member_data:
-                results.append(member_data)
-        
-        return results
+        return self._members_with_membership(
+            gym_id, list(dict.fromkeys(expiring_member_ids))
+        )
     
     def get_members_with_dues(
         self,
@@ -317,8 +319,8 @@ class MemberService:
     ) -> list[MemberWithMembership]:
         """Get members with pending payment dues."""
         # Find memberships with amount due
-        memberships_with_dues = self.db.execute(
-            select(Membership)
+        member_ids_with_dues = self.db.execute(
+            select(Membership.member_id)
             .where(
                 Membership.gym_id == gym_id,
                 Membership.amount_total > Membership.amount_paid,
@@ -326,51 +328,137 @@ class MemberService:
             .order_by(Membership.created_at.desc())
         ).scalars().all()
         
-        # Get unique members
-        seen_members = set()
-        results = []
-        
-        for membership in memberships_with_dues:
-            if membership.member_id not in seen_members:
-                seen_members.add(membership.member_id)
-                member_data = self.get_member_with_membership(gym_id, membership.member_id)
-                if member_data:
-                    results.append(member_data)
-        
-        return results
+        # Unique members, most recent due first
+        return self._members_with_membership(
+            gym_id, list(dict.fromkeys(member_ids_with_dues))
+        )
 
-    def _member_summary_with_membership(
+    def _latest_memberships(
         self,
         gym_id: uuid.UUID,
-        member: Member,
-    ) -> MemberSummary:
-        today = date.today()
-        latest_membership = self.db.execute(
-            select(Membership)
+        member_ids: list[uuid.UUID],
+    ) -> dict[uuid.UUID, tuple[Membership, str | None]]:
+        """
+        Latest membership (by end date) and its plan name for each member.
+
+        One query for the whole page instead of two per member.
+        """
+        if not member_ids:
+            return {}
+        ranked = (
+            select(
+                Membership.id,
+                func.row_number()
+                .over(partition_by=Membership.member_id, order_by=Membership.end_date.desc())
+                .label("rank"),
+            )
             .where(
                 Membership.gym_id == gym_id,
-                Membership.member_id == member.id,
+                Membership.member_id.in_(member_ids),
             )
-            .order_by(Membership.end_date.desc())
-            .limit(1)
-        ).scalar_one_or_none()
+            .subquery()
+        )
+        rows = self.db.execute(
+            select(Membership, Plan.name)
+            .join(ranked, and_(ranked.c.id == Membership.id, ranked.c.rank == 1))
+            .outerjoin(Plan, Plan.id == Membership.plan_id)
+            .options(lazyload(Membership.payments))
+        ).all()
+        return {membership.member_id: (membership, plan_name) for membership, plan_name in rows}
+
+    def _latest_membership_summaries(
+        self,
+        gym_id: uuid.UUID,
+        member_ids: list[uuid.UUID],
+    ) -> dict[uuid.UUID, tuple[MembershipStatus, date, str | None]]:
+        """(status, end date, plan name) of each member's latest membership, as row tuples."""
+        if not member_ids:
+            return {}
+        ranked = (
+            select(
+                Membership.member_id,
+                Membership.status,
+                Membership.end_date,
+                Membership.plan_id,
+                func.row_number()
+                .over(partition_by=Membership.member_id, order_by=Membership.end_date.desc())
+                .label("rank"),
+            )
+            .where(
+                Membership.gym_id == gym_id,
+                Membership.member_id.in_(member_ids),
+            )
+            .subquery()
+        )
+        rows = self.db.execute(
+            select(ranked.c.member_id, ranked.c.status, ranked.c.end_date, Plan.name)
+            .outerjoin(Plan, Plan.id == ranked.c.plan_id)
+            .where(ranked.c.rank == 1)
+        ).all()
+        return {member_id: (status, end_date, plan_name) for member_id, status, end_date, plan_name in rows}
+
+    def _members_with_membership(
+        self,
+        gym_id: uuid.UUID,
+        member_ids: list[uuid.UUID],
+    ) -> list[MemberWithMembership]:
+        """MemberWithMembership for each id, in the given order (unknown ids are skipped)."""
+        if not member_ids:
+            return []
+        members = {
+            m.id: m
+            for m in self.db.execute(
+                select(Member).where(Member.gym_id == gym_id, Member.id.in_(member_ids))
+            ).scalars()
+        }
+        latest = self._latest_memberships(gym_id, list(members))
+        return [
+            self._member_with_membership(members[member_id], latest)
+            for member_id in member_ids
+            if member_id in members
+        ]
 
+    @staticmethod
+    def _current_status(status: MembershipStatus, end_date: date) -> MembershipStatus:
+        # Memberships past their end date may not have been flipped by the expiry job yet
+        if status == MembershipStatus.ACTIVE and end_date < date.today():
+            return MembershipStatus.EXPIRED
+        return status
+
+    def _member_with_membership(
+        self,
+        member: Member,
+        latest: dict[uuid.UUID, tuple[Membership, str | None]],
+    ) -> MemberWithMembership:
+        response_data = {
+            **member.__dict__,
+            "current_membership_status": None,
+            "current_membership_end": None,
+            "current_plan_name": None,
+            "amount_due": None,
+        }
+        if member.id in latest:
+            membership, plan_name = latest[member.id]
+            response_data["current_membership_status"] = self._current_status(
+                membership.status, membership.end_date
+            )
+            response_data["current_membership_end"] = membership.end_date
+            response_data["amount_due"] = float(membership.amount_total - membership.amount_paid)
+            response_data["current_plan_name"] = plan_name
+        return MemberWithMembership(**response_data)
+
+    def _member_summary_with_membership(
+        self,
+        member: Row,
+        latest: tuple[MembershipStatus, date, str | None] | None,
+    ) -> MemberSummary:
         current_status = None
         current_end = None
         current_plan = None
 
-        if latest_membership:
-            current_end = latest_membership.end_date
-            if latest_membership.status == MembershipStatus.ACTIVE and latest_membership.end_date < today:
-                current_status = MembershipStatus.EXPIRED
-            else:
-                current_status = latest_membership.status
-
-            plan = self.db.execute(
-                select(Plan).where(Plan.id == latest_membership.plan_id)
-            ).scalar_one_or_none()
-            if plan:
-                current_plan = plan.name
+        if latest:
+            status, current_end, current_plan = latest
+            current_status = self._current_status(status, current_end)
 
         return MemberSummary(
             id=member.id,
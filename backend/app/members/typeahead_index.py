@@ -0,0 +1,199 @@
+"""
+In-process per-gym typeahead index for front-desk member lookup.
+
+Each loaded gym keeps its active members in a prefix index: name words,
+member_code, and the phone digits (national, see app.core.phone) and their
+last 4 are indexed by their first MAX_PREFIX characters. A lookup intersects the postings of the query words,
+re-checks the candidates, and ranks them with app.members.search.match_tier.
+This takes microseconds, with no DB round trip.
+
+Indexes are built lazily on first lookup, updated by MemberService on
+create / update / deactivate / reactivate, dropped after bulk imports, kept
+for at most member_typeahead_max_gyms gyms (LRU), and rebuilt after
+member_typeahead_ttl_seconds so changes made by other workers show up.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.members.search import match_tier, query_digits
+from app.models import Member
+
+# Keys are cut to this length; longer query words are re-checked on candidates.
+MAX_PREFIX = 6
+# Tier for candidates matching every query word, but not as one phrase ("kumar ravi").
+_ALL_WORDS_TIER = 30
+
+
+@dataclass(frozen=True)
+class TypeaheadEntry:
+    id: uuid.UUID
+    name: str
+    phone: str
+    photo_url: str | None
+    phone_digits: str | None
+    member_code: str | None
+
+    def tokens(self) -> list[str]:
+        tokens = self.name.lower().split()
+        if self.member_code:
+            tokens.append(self.member_code.lower())
+        digits = self.phone_digits or ""
+        if len(digits) >= 4:
+            tokens += [digits, digits[-4:]]
+        return tokens
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "phone": self.phone, "photo_url": self.photo_url}
+
+
+def _entry(member) -> TypeaheadEntry:
+    return TypeaheadEntry(
+        id=member.id,
+        name=member.name,
+        phone=member.phone,
+        photo_url=member.photo_url,
+        phone_digits=member.phone_digits,
+        member_code=member.member_code,
+    )
+
+
+def _keys(token: str) -> set[str]:
+    return {token[:n] for n in range(1, min(len(token), MAX_PREFIX) + 1)}
+
+
+class GymTypeaheadIndex:
+    """Prefix index over one gym's active members. Guarded by its own lock."""
+
+    def __init__(self, gym_id: uuid.UUID, entries: list[TypeaheadEntry]):
+        self.gym_id = gym_id
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._entries: dict[uuid.UUID, TypeaheadEntry] = {}
+        self._postings: dict[str, set[uuid.UUID]] = {}
+        for entry in entries:
+            self._add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, entry: TypeaheadEntry) -> None:
+        self._entries[entry.id] = entry
+        for token in entry.tokens():
+            for key in _keys(token):
+                self._postings.setdefault(key, set()).add(entry.id)
+
+    def _remove(self, member_id: uuid.UUID) -> None:
+        entry = self._entries.pop(member_id, None)
+        if entry is None:
+            return
+        for token in entry.tokens():
+            for key in _keys(token):
+                posting = self._postings.get(key)
+                if posting is not None:
+                    posting.discard(member_id)
+                    if not posting:
+                        del self._postings[key]
+
+    def upsert(self, entry: TypeaheadEntry) -> None:
+        with self._lock:
+            self._remove(entry.id)
+            self._add(entry)
+
+    def remove(self, member_id: uuid.UUID) -> None:
+        with self._lock:
+            self._remove(member_id)
+
+    def lookup(self, term: str, limit: int = 8) -> list[dict]:
+        """Best `limit` matches for term, ranked like app.members.search."""
+        digits = query_digits(term)
+        words = [digits] if digits else term.lower().split()
+        if not words:
+            return []
+
+        with self._lock:
+            candidates: set[uuid.UUID] | None = None
+            for word in sorted(words, key=len, reverse=True):
+                posting = self._postings.get(word[:MAX_PREFIX], set())
+                candidates = set(posting) if candidates is None else candidates & posting
+                if not candidates:
+                    return []
+            entries = [self._entries[member_id] for member_id in candidates]
+
+        scored = []
+        for entry in entries:
+            tokens = entry.tokens()
+            if not all(any(token.startswith(word) for token in tokens) for word in words):
+                continue
+            tier = match_tier(term, name=entry.name, phone_digits=entry.phone_digits, member_code=entry.member_code)
+            scored.append((-(tier or _ALL_WORDS_TIER), entry.name, entry))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [entry.as_dict() for _, _, entry in scored[:limit]]
+
+
+class TypeaheadIndexRegistry:
+    """LRU of per-gym indexes for this process."""
+
+    def __init__(self):
+        self._indexes: OrderedDict[uuid.UUID, GymTypeaheadIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, gym_id: uuid.UUID) -> GymTypeaheadIndex:
+        with self._lock:
+            index = self._indexes.get(gym_id)
+            if index is not None and time.monotonic() - index.built_at < settings.member_typeahead_ttl_seconds:
+                self._indexes.move_to_end(gym_id)
+                return index
+
+        rows = db.execute(
+            select(
+                Member.id,
+                Member.name,
+                Member.phone,
+                Member.photo_url,
+                Member.phone_digits,
+                Member.member_code,
+            ).where(
+                Member.gym_id == gym_id,
+                Member.is_active == True,  # noqa: E712
+            )
+        ).all()
+        index = GymTypeaheadIndex(gym_id, [TypeaheadEntry(*row) for row in rows])
+        with self._lock:
+            self._indexes[gym_id] = index
+            self._indexes.move_to_end(gym_id)
+            while len(self._indexes) > settings.member_typeahead_max_gyms:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _loaded(self, gym_id: uuid.UUID) -> GymTypeaheadIndex | None:
+        with self._lock:
+            return self._indexes.get(gym_id)
+
+    def member_changed(self, member) -> None:
+        """Reflect a committed create/update/(de)activation, if the gym is loaded."""
+        index = self._loaded(member.gym_id)
+        if index is None:
+            return
+        if member.is_active:
+            index.upsert(_entry(member))
+        else:
+            index.remove(member.id)
+
+    def invalidate(self, gym_id: uuid.UUID) -> None:
+        with self._lock:
+            self._indexes.pop(gym_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+typeahead_indexes = TypeaheadIndexRegistry()
@@ -0,0 +1,133 @@
+"""
+Platform-wide membership expiry job.
+
+Flips ACTIVE memberships whose end_date has passed to EXPIRED using set-based
+UPDATE ... RETURNING in bounded batches (one short transaction per batch, rows
+locked with SKIP LOCKED) so it can run alongside front-desk traffic.
+Call from the daily cron (see app.automation.cron_runner.run_all_automation).
+"""
+
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import date
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_delete_prefix
+from app.core.change_counters import mark_changed
+from app.core.config import settings
+from app.core.job_runs import MAX_BATCHES, job_run
+from app.core.logger import log_error
+from app.models import Membership
+from app.models.enums import MembershipStatus
+
+JOB_NAME = "membership_expiry"
+
+ExpiryListener = Callable[[uuid.UUID, list[uuid.UUID]], None]
+
+_listeners: list[ExpiryListener] = []
+
+
+def add_expiry_listener(listener: ExpiryListener) -> None:
+    """
+    Subscribe to expired membership ids.
+    Called once per gym per committed batch with (gym_id, membership_ids).
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_expiry_listener(listener: ExpiryListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _invalidate_report_caches(gym_id: uuid.UUID, membership_ids: list[uuid.UUID]) -> None:
+    """Dashboard counts active/expired members; drop the cached copy."""
+    cache_delete_prefix(f"dashboard:{gym_id}")
+
+
+add_expiry_listener(_invalidate_report_caches)
+
+
+def _emit(expired_by_gym: dict[uuid.UUID, list[uuid.UUID]]) -> None:
+    for gym_id, membership_ids in expired_by_gym.items():
+        for listener in list(_listeners):
+            try:
+                listener(gym_id, membership_ids)
+            except Exception as e:  # listeners must never abort the job
+                log_error("membership_expiry_listener_failed", error=e, gym_id=str(gym_id))
+
+
+def _expire_batch(
+    db: Session,
+    *,
+    today: date,
+    batch_size: int,
+    gym_id: uuid.UUID | None,
+) -> list[tuple[uuid.UUID, uuid.UUID]]:
+    """Expire up to batch_size overdue memberships. Returns (membership_id, gym_id) rows."""
+    candidates = (
+        select(Membership.id)
+        .where(
+            Membership.status == MembershipStatus.ACTIVE,
+            Membership.end_date < today,
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    if gym_id is not None:
+        candidates = candidates.where(Membership.gym_id == gym_id)
+
+    rows = db.execute(
+        update(Membership)
+        .where(
+            Membership.id.in_(candidates.scalar_subquery()),
+            # Re-check under the row lock: status may have changed since the scan.
+            Membership.status == MembershipStatus.ACTIVE,
+        )
+        .values(status=MembershipStatus.EXPIRED)
+        .returning(Membership.id, Membership.gym_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    for row_gym_id in {row[1] for row in rows}:
+        mark_changed(db, row_gym_id, "memberships")
+    db.commit()
+    return [(row[0], row[1]) for row in rows]
+
+
+def run_membership_expiry(
+    db: Session,
+    *,
+    gym_id: uuid.UUID | None = None,
+    batch_size: int | None = None,
+    today: date | None = None,
+) -> dict[str, Any]:
+    """
+    Expire overdue memberships across all gyms (or one gym if gym_id is given).
+
+    Each batch commits on its own, then listeners receive the expired ids.
+    A JobRun row records counts and duration.
+    Returns: run_id, expired, batches, gyms_affected, duration_ms.
+    """
+    today = today or date.today()
+    batch_size = batch_size or settings.membership_expiry_batch_size
+
+    with job_run(db, JOB_NAME, gym_id=gym_id, counter="expired") as progress:
+        while progress.batches < MAX_BATCHES:
+            rows = _expire_batch(db, today=today, batch_size=batch_size, gym_id=gym_id)
+            if not rows:
+                break
+
+            by_gym: dict[uuid.UUID, list[uuid.UUID]] = defaultdict(list)
+            for membership_id, row_gym_id in rows:
+                by_gym[row_gym_id].append(membership_id)
+            progress.add_batch(len(rows), by_gym)
+            _emit(by_gym)
+
+            if len(rows) < batch_size:
+                break
+    return progress.summary
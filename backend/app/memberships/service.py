@@ -340,25 +340,13 @@ class MembershipService:
     
     def expire_memberships(self, gym_id: uuid.UUID) -> int:
         """
-        Mark expired memberships as expired.
+        Mark expired memberships as expired for one gym.
         
-        Should be run daily via scheduled job.
+        Thin wrapper over the batched platform job
+        (app.memberships.expiry_job.run_membership_expiry), which the daily
+        cron runs for all gyms at once.
         Returns count of memberships expired.
         """
-        today = date.today()
-        
-        result = self.db.execute(
-            select(Membership).where(
-                Membership.gym_id == gym_id,
-                Membership.status == MembershipStatus.ACTIVE,
-                Membership.end_date < today,
-            )
-        )
-        memberships = result.scalars().all()
-        
-        for membership in memberships:
-            membership.status = MembershipStatus.EXPIRED
-        
-        self.db.commit()
+        from app.memberships.expiry_job import run_membership_expiry
         
-        return len(memberships)
+        return run_membership_expiry(self.db, gym_id=gym_id)["expired"]
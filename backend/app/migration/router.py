@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from app.auth.dependencies import TenantDep, DbDep, require_manager_or_above
+from app.auth.dependencies import TenantDep, DbDep, ReadDbDep, require_manager_or_above
 from app.migration.schemas import (
     AttendanceImportRequest,
     AttendanceImportResult,
@@ -165,7 +165,7 @@ def import_device_user_mappings(
 def reconciliation_report(
     payload: ReconciliationRequest,
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     _: object = Depends(require_manager_or_above),
 ):
     """Generate a reconciliation report for validating imported data.
@@ -181,7 +181,7 @@ def reconciliation_report(
 @router.get("/biometric-sync", response_model=BiometricSyncOverview)
 def biometric_sync_overview(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     _: object = Depends(require_manager_or_above),
 ):
     """Biometric sync dashboard: device status, event counts, mapped members."""
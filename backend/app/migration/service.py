@@ -19,6 +19,11 @@ from app.models import (
 )
 from app.models.enums import BiometricEventStatus, BiometricEventType, MembershipStatus
 
+from app.attendance.rollups import rebuild_rollups, rollup_day
+from app.core.gym_time import gym_zone
+from app.biometric import resolver
+from app.members.typeahead_index import typeahead_indexes
+from app.payments.ledger import record_payment
 from app.migration.phone_utils import normalize_phone
 from app.migration.photo_import import import_member_photo_value
 from app.migration.row_apply import (
@@ -137,6 +142,8 @@ class MigrationService:
                 errors.append(f"Row {idx}: membership — {exc}")
 
         self.db.commit()
+        resolver.invalidate_gym_identities(gym_id)
+        typeahead_indexes.invalidate(gym_id)
         return MemberImportResult(
             total_received=len(req.members),
             created=created,
@@ -348,6 +355,7 @@ class MigrationService:
                 )
                 self.db.add(payment)
                 self.db.flush()
+                record_payment(self.db, payment)
                 created += 1
             except Exception as exc:
                 errors.append(f"Row {idx}: {exc}")
@@ -371,6 +379,8 @@ class MigrationService:
         errors: list[str] = []
 
         code_to_member = self._code_to_member_map(gym_id)
+        touched_days: set[date] = set()
+        zone = gym_zone(self.db, gym_id)
 
         for idx, row in enumerate(req.records, start=1):
             member = code_to_member.get(row.person_identifier)
@@ -396,18 +406,25 @@ class MigrationService:
                 continue
 
             try:
+                open_att = self.db.execute(
+                    select(Attendance).where(
+                        and_(
+                            Attendance.gym_id == gym_id,
+                            Attendance.member_id == member.id,
+                            Attendance.check_out_time.is_(None),
+                        )
+                    )
+                ).scalar_one_or_none()
+                open_since = None
+                if open_att is not None:
+                    open_since = open_att.check_in_time
+                    if open_since.tzinfo is None:
+                        open_since = open_since.replace(tzinfo=timezone.utc)
+
                 if row.punch_type in (BiometricEventType.CHECK_OUT,):
-                    open_att = self.db.execute(
-                        select(Attendance).where(
-                            and_(
-                                Attendance.gym_id == gym_id,
-                                Attendance.member_id == member.id,
-                                Attendance.check_out_time.is_(None),
-                            )
-                        ).order_by(Attendance.check_in_time.desc())
-                    ).scalar_one_or_none()
-                    if open_att and ts > open_att.check_in_time:
+                    if open_att and ts > open_since:
                         open_att.check_out_time = ts
+                        touched_days.add(rollup_day(open_att.check_in_time, zone))
                         created += 1
                         continue
 
@@ -418,12 +435,32 @@ class MigrationService:
                     check_out_time=None,
                     marked_by=None,
                 )
+                if open_att is not None:
+                    # At most one open session per member (idx_attendance_open is
+                    # unique): the earlier punch is closed at the later one, as
+                    # auto_closed so it does not count towards durations.
+                    if ts > open_since:
+                        open_att.check_out_time = ts
+                        open_att.auto_closed = True
+                        touched_days.add(rollup_day(open_att.check_in_time, zone))
+                    else:
+                        att.check_out_time = open_since
+                        att.auto_closed = True
                 self.db.add(att)
                 self.db.flush()
+                touched_days.add(rollup_day(ts, zone))
                 created += 1
             except Exception as exc:
                 errors.append(f"Row {idx}: {exc}")
 
+        # Historical punches arrive unordered; recompute the affected rollup range once.
+        if touched_days:
+            rebuild_rollups(
+                self.db,
+                gym_id=gym_id,
+                from_date=min(touched_days),
+                to_date=max(touched_days),
+            )
         self.db.commit()
         return AttendanceImportResult(
             total_received=len(req.records),
@@ -498,6 +535,8 @@ class MigrationService:
             member.last_biometric_sync = now
 
         self.db.commit()
+        resolver.invalidate_gym_identities(gym_id)
+        typeahead_indexes.invalidate(gym_id)
         return DeviceUserMappingResult(
             total_received=len(req.mappings),
             created=created,
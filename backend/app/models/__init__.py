@@ -39,6 +39,10 @@ from app.models.audit_log import AuditLog
 from app.models.device_user_mapping import DeviceUserMapping
 from app.models.mobile_push_token import MobilePushToken
 from app.models.member_portal import MemberLoginOtp, MemberMagicLink
+from app.models.job_run import JobRun
+from app.models.attendance_rollup import AttendanceHourlyRollup
+from app.models.revenue_ledger import RevenueDailyLedger
+from app.models.gym_change_counter import GymChangeCounter
 
 __all__ = [
     # Enums
@@ -76,4 +80,8 @@ __all__ = [
     "MobilePushToken",
     "MemberLoginOtp",
     "MemberMagicLink",
+    "JobRun",
+    "AttendanceHourlyRollup",
+    "RevenueDailyLedger",
+    "GymChangeCounter",
 ]
@@ -7,7 +7,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Index
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -58,6 +58,14 @@ class Attendance(UUIDPrimaryKeyMixin, TimestampMixin, Base):
         DateTime(timezone=True),
     )
     
+    # Closed by the auto-checkout sweeper, not by the member; excluded from duration stats
+    auto_closed: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default=text("false"),
+        nullable=False,
+    )
+    
     # Staff who marked attendance (null = self check-in via app)
     marked_by: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
@@ -74,6 +82,16 @@ class Attendance(UUIDPrimaryKeyMixin, TimestampMixin, Base):
         Index("idx_attendance_daily", "gym_id", "check_in_time"),
         # Member attendance history
         Index("idx_attendance_member", "member_id", "check_in_time"),
+        # Open sessions: check-out and "currently in"; unique, so it is also
+        # the double check-in guard (at most one open session per member)
+        Index(
+            "idx_attendance_open",
+            "gym_id",
+            "member_id",
+            unique=True,
+            postgresql_where=text("check_out_time IS NULL"),
+            sqlite_where=text("check_out_time IS NULL"),
+        ),
     )
     
     def __repr__(self) -> str:
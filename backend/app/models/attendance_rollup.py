@@ -0,0 +1,51 @@
+"""
+Attendance rollup model - per-gym, per-day, per-hour attendance counters.
+Maintained incrementally on check-in/check-out so summaries and heatmaps
+read O(days x 24) rows instead of scanning attendance.
+"""
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Integer, SmallInteger, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base import Base
+
+
+class AttendanceHourlyRollup(Base):
+    """
+    One row per (gym, local day, local hour) bucket of check-in time, in the
+    gym's timezone (app.attendance.rollups.gym_zone).
+
+    unique_members counts members whose *first* check-in of the day falls in
+    this hour, so summing a day's hours gives the daily unique-member count.
+    Session duration is attributed to the check-in hour:
+    avg = session_seconds / sessions_closed.
+    """
+
+    __tablename__ = "attendance_hourly_rollups"
+
+    gym_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("gyms.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    hour: Mapped[int] = mapped_column(SmallInteger, primary_key=True)  # 0-23, gym-local
+
+    check_ins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    unique_members: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sessions_closed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    session_seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<AttendanceHourlyRollup(gym_id={self.gym_id}, day={self.day}, hour={self.hour})>"
@@ -0,0 +1,42 @@
+"""
+Gym change counter model - per-gym, per-table write versions.
+Bumped in the same transaction as writes to the tracked tables, so read
+endpoints can derive ETag / Last-Modified without running their query.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base import Base
+
+
+class GymChangeCounter(Base):
+    """
+    One row per (gym, scope); scope is the tracked table's name
+    (members, memberships, payments, attendance, plans).
+
+    version only ever increases; changed_at is the time of the last bump.
+    """
+
+    __tablename__ = "gym_change_counters"
+
+    gym_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("gyms.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    scope: Mapped[str] = mapped_column(String(40), primary_key=True)
+
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<GymChangeCounter(gym_id={self.gym_id}, scope={self.scope}, version={self.version})>"
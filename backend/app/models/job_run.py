@@ -0,0 +1,44 @@
+"""
+Job run log - one row per execution of a platform-wide background job.
+Lets ops see when a job last ran, how long it took and what it touched.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base import Base
+
+
+class JobRun(Base):
+    """
+    Execution record for a background job (membership expiry, sweepers, ...).
+    job_name: stable identifier, e.g. "membership_expiry"
+    stats: job-specific counters (rows affected, batches, gyms touched)
+    """
+
+    __tablename__ = "job_runs"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    job_name: Mapped[str] = mapped_column(String(60), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="running")  # running|success|failed
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    duration_ms: Mapped[int | None] = mapped_column(Integer)
+    stats: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text)
+
+    __table_args__ = (
+        Index("idx_job_run_name_started", "job_name", "started_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<JobRun(id={self.id}, job_name={self.job_name}, status={self.status})>"
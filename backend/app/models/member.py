@@ -20,9 +20,10 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy import String, Text, Boolean, Date, DateTime, Enum, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID, JSON
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from app.core.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+from app.core.phone import national_digits
 from app.models.enums import Gender
 
 if TYPE_CHECKING:
@@ -61,6 +62,8 @@ class Member(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     email: Mapped[str | None] = mapped_column(String(255))  # Optional in India
     phone: Mapped[str] = mapped_column(String(15), nullable=False)  # Required
+    # National digits of phone (no +91 / 0 prefix), for search; kept in sync by _sync_phone_digits
+    phone_digits: Mapped[str | None] = mapped_column(String(15))
     alternate_phone: Mapped[str | None] = mapped_column(String(15))  # Common in India
     
     gender: Mapped[Gender | None] = mapped_column(
@@ -154,7 +157,31 @@ class Member(UUIDPrimaryKeyMixin, TimestampMixin, Base):
         Index("idx_member_joined_date", "gym_id", "joined_date"),
         # NEW: Index for enrollment status (reporting & filtering)
         Index("idx_member_enrollment_status", "gym_id", "enrollment_status"),
+        # Member search (app.members.search): trigram GIN for ILIKE '%term%' and similarity
+        Index(
+            "idx_member_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_member_phone_digits_trgm",
+            "phone_digits",
+            postgresql_using="gin",
+            postgresql_ops={"phone_digits": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_member_code_trgm",
+            "member_code",
+            postgresql_using="gin",
+            postgresql_ops={"member_code": "gin_trgm_ops"},
+        ),
     )
+
+    @validates("phone")
+    def _sync_phone_digits(self, key: str, value: str | None) -> str | None:
+        self.phone_digits = national_digits(value) or None
+        return value
     
     def __repr__(self) -> str:
         return f"<Member(id={self.id}, name='{self.name}', phone='{self.phone}')>"
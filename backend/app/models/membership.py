@@ -17,7 +17,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, String, Text, Date, DateTime, Numeric, Enum, ForeignKey, Index
+from sqlalchemy import Boolean, String, Text, Date, DateTime, Numeric, Enum, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -145,6 +145,12 @@ class Membership(UUIDPrimaryKeyMixin, TimestampMixin, Base):
         # NEW: Renewal tracking
         Index("idx_membership_renewal_date", "gym_id", "renewal_date"),
         Index("idx_membership_auto_renewal", "gym_id", "auto_renewal"),
+        # Platform expiry job: overdue ACTIVE rows across all gyms
+        Index(
+            "idx_membership_active_end_date",
+            "end_date",
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
     )
     
     def __repr__(self) -> str:
@@ -0,0 +1,53 @@
+"""
+Revenue ledger model - per-gym, per-day, per-payment-mode collection totals.
+Maintained incrementally when payments are recorded so collection reports
+read O(days x modes) rows instead of scanning payments.
+"""
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, Enum, ForeignKey, Integer, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base import Base
+from app.models.enums import PaymentMode
+
+
+class RevenueDailyLedger(Base):
+    """
+    One row per (gym, payment_date, payment_mode).
+
+    amount and tax_amount mirror the Payment columns of the same name, so
+    collected total = amount + tax_amount. All payments count, including
+    ad-hoc payments not linked to a membership.
+    """
+
+    __tablename__ = "revenue_daily_ledger"
+
+    gym_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("gyms.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    payment_mode: Mapped[PaymentMode] = mapped_column(
+        Enum(PaymentMode, name="payment_mode", create_constraint=True),
+        primary_key=True,
+    )
+
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+    tax_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+    payment_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<RevenueDailyLedger(gym_id={self.gym_id}, day={self.day}, mode={self.payment_mode.value})>"
@@ -0,0 +1,129 @@
+"""
+Daily revenue ledger (per gym, per payment date, per payment mode).
+
+Writers call record_payment in the same transaction as the payment insert
+(caller commits). rebuild_ledger recomputes a date range from the payments
+table, e.g. after a bulk import or manual data fix.
+"""
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models import Payment, RevenueDailyLedger
+
+
+def record_payment(db: Session, payment: Payment) -> None:
+    """Add one payment to its (gym, day, mode) row (INSERT ... ON CONFLICT DO UPDATE)."""
+    insert = dialect_insert(db)
+    stmt = insert(RevenueDailyLedger).values(
+        gym_id=payment.gym_id,
+        day=payment.payment_date,
+        payment_mode=payment.payment_mode,
+        amount=payment.amount,
+        tax_amount=payment.tax_amount or Decimal("0"),
+        payment_count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["gym_id", "day", "payment_mode"],
+        set_={
+            "amount": RevenueDailyLedger.amount + stmt.excluded.amount,
+            "tax_amount": RevenueDailyLedger.tax_amount + stmt.excluded.tax_amount,
+            "payment_count": RevenueDailyLedger.payment_count + stmt.excluded.payment_count,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def rebuild_ledger(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+) -> int:
+    """
+    Recompute ledger rows for [from_date, to_date] from payments. Caller commits.
+    Returns number of ledger rows written.
+    """
+    db.execute(
+        delete(RevenueDailyLedger).where(
+            and_(
+                RevenueDailyLedger.gym_id == gym_id,
+                RevenueDailyLedger.day >= from_date,
+                RevenueDailyLedger.day <= to_date,
+            )
+        )
+    )
+    grouped = (
+        select(
+            Payment.gym_id,
+            Payment.payment_date,
+            Payment.payment_mode,
+            func.coalesce(func.sum(Payment.amount), 0),
+            func.coalesce(func.sum(Payment.tax_amount), 0),
+            func.count(),
+            func.now(),
+        )
+        .where(
+            and_(
+                Payment.gym_id == gym_id,
+                Payment.payment_date >= from_date,
+                Payment.payment_date <= to_date,
+            )
+        )
+        .group_by(Payment.gym_id, Payment.payment_date, Payment.payment_mode)
+    )
+    result = db.execute(
+        RevenueDailyLedger.__table__.insert().from_select(
+            ["gym_id", "day", "payment_mode", "amount", "tax_amount", "payment_count", "updated_at"],
+            grouped,
+        )
+    )
+    return max(result.rowcount or 0, 0)
+
+
+def get_ledger_rows(
+    db: Session,
+    *,
+    gym_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+) -> list[RevenueDailyLedger]:
+    """Ledger rows for a date range, ordered by day and payment mode."""
+    return list(
+        db.execute(
+            select(RevenueDailyLedger)
+            .where(
+                and_(
+                    RevenueDailyLedger.gym_id == gym_id,
+                    RevenueDailyLedger.day >= from_date,
+                    RevenueDailyLedger.day <= to_date,
+                )
+            )
+            .order_by(RevenueDailyLedger.day, RevenueDailyLedger.payment_mode)
+        ).scalars().all()
+    )
+
+
+def get_revenue_total(
+    db: Session,
+    *,
+    gym_id: uuid.UUID | None = None,
+    from_date: date | None = None,
+    to_date: date | None = None,
+) -> Decimal:
+    """Sum of payment amounts (excluding tax); all gyms when gym_id is None."""
+    query = select(func.coalesce(func.sum(RevenueDailyLedger.amount), 0))
+    if gym_id is not None:
+        query = query.where(RevenueDailyLedger.gym_id == gym_id)
+    if from_date is not None:
+        query = query.where(RevenueDailyLedger.day >= from_date)
+    if to_date is not None:
+        query = query.where(RevenueDailyLedger.day <= to_date)
+    return Decimal(db.execute(query).scalar() or 0)
@@ -6,15 +6,16 @@ import os
 import uuid
 from datetime import date
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 
-from app.auth.dependencies import TenantDep, DbDep
+from app.auth.dependencies import TenantDep, DbDep, require_manager_or_above
 from app.models.enums import PaymentMode
 from app.payments.schemas import (
     PaymentCreate,
     PaymentResponse,
     PaymentListResponse,
     DailyCollectionSummary,
+    LedgerRebuildResult,
 )
 from app.payments.receipt_tasks import deliver_payment_receipt
 from app.payments.service import PaymentService
@@ -128,6 +129,34 @@ def get_collection_range(
     return service.get_collection_range(tenant.gym_id, from_date, to_date)
 
 
+@router.post("/ledger/rebuild", response_model=LedgerRebuildResult)
+def rebuild_revenue_ledger(
+    tenant: TenantDep,
+    db: DbDep,
+    from_date: date = Query(..., description="Start date"),
+    to_date: date = Query(..., description="End date"),
+    _: object = Depends(require_manager_or_above),
+):
+    """
+    Recompute the daily revenue ledger for a date range from raw payments.
+    Use after bulk imports or manual data fixes.
+    """
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must be before or equal to to_date",
+        )
+    if (to_date - from_date).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date range cannot exceed 366 days",
+        )
+    
+    service = PaymentService(db)
+    written = service.rebuild_ledger(tenant.gym_id, from_date, to_date)
+    return LedgerRebuildResult(from_date=from_date, to_date=to_date, rows_written=written)
+
+
 @router.get("/member/{member_id}", response_model=list[PaymentResponse])
 def get_member_payments(
     member_id: str,
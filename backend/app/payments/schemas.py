@@ -71,3 +71,10 @@ class DailyCollectionSummary(BaseModel):
     total_amount: Decimal
     payment_count: int
     by_mode: dict[str, Decimal]  # e.g., {"cash": 5000, "upi": 3000}
+
+
+class LedgerRebuildResult(BaseModel):
+    """Result of rebuilding the revenue ledger for a date range."""
+    from_date: date
+    to_date: date
+    rows_written: int
@@ -3,7 +3,8 @@ Payment management service.
 """
 
 import uuid
-from datetime import date
+from collections import defaultdict
+from datetime import date, timedelta
 from decimal import Decimal
 
 from sqlalchemy import select, func
@@ -13,6 +14,7 @@ from app.models import Notification, Payment, Member, User, Membership
 from app.models.enums import NotificationChannel, NotificationStatus, NotificationType, PaymentMode
 from app.core.config import settings
 from app.services.audit_service import log as audit_log
+from app.payments import ledger
 from app.services.messaging import send_email, send_whatsapp_then_sms
 from app.payments.schemas import (
     PaymentCreate,
@@ -120,6 +122,7 @@ class PaymentService:
         )
         self.db.add(payment)
         self.db.flush()
+        ledger.record_payment(self.db, payment)
         audit_log(
             self.db,
             gym_id=gym_id,
@@ -222,33 +225,9 @@ class PaymentService:
         gym_id: uuid.UUID,
         target_date: date | None = None,
     ) -> DailyCollectionSummary:
-        """Get daily collection summary."""
+        """Get daily collection summary (from the revenue ledger)."""
         target_date = target_date or date.today()
-        
-        # Get all payments for the day
-        result = self.db.execute(
-            select(Payment).where(
-                Payment.gym_id == gym_id,
-                Payment.payment_date == target_date,
-            )
-        )
-        payments = result.scalars().all()
-        
-        # Calculate totals
-        total_amount = Decimal("0")
-        by_mode: dict[str, Decimal] = {}
-        
-        for payment in payments:
-            total_amount += payment.amount
-            mode_key = payment.payment_mode.value
-            by_mode[mode_key] = by_mode.get(mode_key, Decimal("0")) + payment.amount
-        
-        return DailyCollectionSummary(
-            date=target_date,
-            total_amount=total_amount,
-            payment_count=len(payments),
-            by_mode=by_mode,
-        )
+        return self.get_collection_range(gym_id, target_date, target_date)[0]
     
     def get_collection_range(
         self,
@@ -256,19 +235,42 @@ class PaymentService:
         from_date: date,
         to_date: date,
     ) -> list[DailyCollectionSummary]:
-        """Get daily collection summaries for a date range."""
-        from datetime import timedelta
+        """Get daily collection summaries for a date range (one ledger query)."""
+        by_day: dict[date, list] = defaultdict(list)
+        for row in ledger.get_ledger_rows(
+            self.db, gym_id=gym_id, from_date=from_date, to_date=to_date
+        ):
+            by_day[row.day].append(row)
         
         summaries = []
         current_date = from_date
-        
         while current_date <= to_date:
-            summary = self.get_daily_collection(gym_id, current_date)
-            summaries.append(summary)
+            rows = by_day.get(current_date, [])
+            summaries.append(
+                DailyCollectionSummary(
+                    date=current_date,
+                    total_amount=sum((r.amount for r in rows), Decimal("0")),
+                    payment_count=sum(r.payment_count for r in rows),
+                    by_mode={r.payment_mode.value: r.amount for r in rows},
+                )
+            )
             current_date += timedelta(days=1)
         
         return summaries
 
+    def rebuild_ledger(
+        self,
+        gym_id: uuid.UUID,
+        from_date: date,
+        to_date: date,
+    ) -> int:
+        """Recompute the revenue ledger for a date range from raw payments."""
+        written = ledger.rebuild_ledger(
+            self.db, gym_id=gym_id, from_date=from_date, to_date=to_date
+        )
+        self.db.commit()
+        return written
+
     def _send_payment_receipt(self, payment: Payment, member: Member) -> None:
         """Best-effort receipt notification. Never blocks payment collection."""
         message = (
@@ -4,9 +4,10 @@ Plan management API endpoints.
 
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
 from app.auth.dependencies import require_owner, require_manager_or_above, TenantDep, DbDep
+from app.core.http_cache import CachePolicy, load_validators
 from app.models import User
 from app.plans.schemas import (
     PlanCreate,
@@ -19,6 +20,10 @@ from app.plans.service import PlanService
 
 router = APIRouter()
 
+# Plans change rarely; clients may reuse a copy for a minute without asking.
+PLANS_CACHE = CachePolicy("plans", scopes=("plans",), cache_control="private, max-age=60")
+ACTIVE_PLANS_CACHE = CachePolicy("plans_active", scopes=("plans",), cache_control="private, max-age=60")
+
 
 @router.post("", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
 def create_plan(
@@ -39,6 +44,8 @@ def create_plan(
 
 @router.get("", response_model=list[PlanResponse])
 def list_plans(
+    http_request: Request,
+    response: Response,
     tenant: TenantDep,
     db: DbDep,
     include_inactive: bool = Query(False, description="Include inactive plans"),
@@ -49,6 +56,10 @@ def list_plans(
     List membership plans with pagination.
     By default, only active plans are returned.
     """
+    validators = load_validators(db, http_request, PLANS_CACHE, tenant.gym_id)
+    if validators.matches(http_request):
+        return validators.not_modified()
+    validators.apply(response)
     service = PlanService(db)
     plans = service.list_plans(
         tenant.gym_id,
@@ -61,6 +72,8 @@ def list_plans(
 
 @router.get("/active", response_model=list[PlanSummary])
 def list_active_plans(
+    http_request: Request,
+    response: Response,
     tenant: TenantDep,
     db: DbDep,
 ):
@@ -69,6 +82,10 @@ def list_active_plans(
     
     Returns minimal plan info.
     """
+    validators = load_validators(db, http_request, ACTIVE_PLANS_CACHE, tenant.gym_id)
+    if validators.matches(http_request):
+        return validators.not_modified()
+    validators.apply(response)
     service = PlanService(db)
     plans = service.list_plans(tenant.gym_id, active_only=True)
     return [PlanSummary.model_validate(p) for p in plans]
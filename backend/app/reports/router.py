@@ -1,12 +1,14 @@
 """
 Reports API endpoints.
+
+Read-only: every route reads through ReadDbDep (the replica when configured).
 """
 
 from datetime import date, timedelta
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 
-from app.auth.dependencies import TenantDep, DbDep
+from app.auth.dependencies import AsyncReadDbDep, AsyncTenantDep, ReadDbDep, TenantDep
 from app.reports.schemas import (
     DashboardStats,
     MembershipStats,
@@ -19,16 +21,25 @@ from app.reports.schemas import (
     InactiveMemberInfo,
 )
 from app.core.pagination import MAX_PAGE_SIZE, MAX_REPORT_PAGE_SIZE
-from app.reports.service import ReportsService
+from app.core.http_cache import CachePolicy, load_validators_async
+from app.core.responses import PreEncodedJSONResponse
+from app.reports.service import DASHBOARD_SCOPES, ReportsService
 
 
 router = APIRouter()
 
+DASHBOARD_CACHE = CachePolicy(
+    "dashboard",
+    scopes=DASHBOARD_SCOPES,
+    daily=True,
+)
+
 
 @router.get("/dashboard", response_model=DashboardStats)
-def get_dashboard_stats(
-    tenant: TenantDep,
-    db: DbDep,
+async def get_dashboard_stats(
+    request: Request,
+    tenant: AsyncTenantDep,
+    db: AsyncReadDbDep,
 ):
     """
     Get dashboard overview statistics.
@@ -38,15 +49,21 @@ def get_dashboard_stats(
     - Expiring memberships
     - Today's check-ins and collection
     - Members with dues
+    
+    Conditional: answers If-None-Match with 304 until a write to the gym's
+    members, memberships, payments or attendance (or midnight).
     """
-    service = ReportsService(db)
-    return service.get_dashboard_stats(tenant.gym_id)
+    validators = await load_validators_async(db, request, DASHBOARD_CACHE, tenant.gym_id)
+    if validators.matches(request):
+        return validators.not_modified()
+    body = await db.run_sync(lambda s: ReportsService(s).get_dashboard_stats_json(tenant.gym_id, validators.etag))
+    return validators.apply(PreEncodedJSONResponse(body))
 
 
 @router.get("/memberships", response_model=MembershipStats)
 def get_membership_stats(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
 ):
     """
     Get membership statistics.
@@ -60,7 +77,7 @@ def get_membership_stats(
 @router.get("/collection", response_model=CollectionReport)
 def get_collection_report(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     from_date: date = Query(..., description="Start date"),
     to_date: date = Query(..., description="End date"),
 ):
@@ -92,7 +109,7 @@ def get_collection_report(
 @router.get("/collection/today", response_model=CollectionReport)
 def get_today_collection(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
 ):
     """
     Get today's collection report.
@@ -105,7 +122,7 @@ def get_today_collection(
 @router.get("/collection/this-week", response_model=CollectionReport)
 def get_this_week_collection(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
 ):
     """
     Get this week's collection report (Monday to today).
@@ -119,7 +136,7 @@ def get_this_week_collection(
 @router.get("/collection/this-month", response_model=CollectionReport)
 def get_this_month_collection(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
 ):
     """
     Get this month's collection report.
@@ -133,7 +150,7 @@ def get_this_month_collection(
 @router.get("/expiring-members", response_model=list[ExpiringMemberInfo])
 def get_expiring_members(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     days: int = Query(7, ge=1, le=90, description="Days until expiry"),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=MAX_REPORT_PAGE_SIZE),
@@ -149,7 +166,7 @@ def get_expiring_members(
 @router.get("/members-with-dues", response_model=list[DuesMemberInfo])
 def get_members_with_dues(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=MAX_REPORT_PAGE_SIZE),
 ):
@@ -164,7 +181,7 @@ def get_members_with_dues(
 @router.get("/action-center", response_model=ActionCenterSummary)
 def get_action_center(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
 ):
     """Summary for Today's Action Center: expiring, dues, inactive counts."""
     service = ReportsService(db)
@@ -174,7 +191,7 @@ def get_action_center(
 @router.get("/revenue-opportunity", response_model=RevenueOpportunity)
 def get_revenue_opportunity(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
 ):
     """Potential renewal revenue from memberships expiring this week."""
     service = ReportsService(db)
@@ -184,7 +201,7 @@ def get_revenue_opportunity(
 @router.get("/activity-feed", response_model=list[ActivityFeedItem])
 def get_activity_feed(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     limit: int = Query(20, ge=1, le=50),
 ):
     """Unified feed: recent check-ins, payments, new members."""
@@ -195,7 +212,7 @@ def get_activity_feed(
 @router.get("/inactive-members", response_model=list[InactiveMemberInfo])
 def get_inactive_members(
     tenant: TenantDep,
-    db: DbDep,
+    db: ReadDbDep,
     days: int = Query(7, ge=1, le=90),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
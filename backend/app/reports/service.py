@@ -12,6 +12,10 @@ from sqlalchemy.orm import Session
 from app.models import Member, Membership, Payment, Attendance, Plan
 from app.models.enums import MembershipStatus
 from app.core.cache import cache_get, cache_set
+from app.core.change_counters import gym_versions
+from app.core.gym_time import local_today
+from app.attendance.rollups import get_day_totals
+from app.payments.ledger import get_ledger_rows, get_revenue_total
 from app.reports.schemas import (
     DashboardStats,
     MembershipStats,
@@ -25,6 +29,10 @@ from app.reports.schemas import (
 )
 
 
+# Tables the dashboard reads; its cached bytes are keyed by their change counters.
+DASHBOARD_SCOPES = ("members", "memberships", "payments", "attendance")
+
+
 class ReportsService:
     """Service class for generating reports."""
     
@@ -32,18 +40,32 @@ class ReportsService:
         self.db = db
     
     def get_dashboard_stats(self, gym_id: uuid.UUID) -> DashboardStats:
-        """Get dashboard overview statistics (cached 60s per gym)."""
-        cache_key = f"dashboard:{gym_id}"
+        """Get dashboard overview statistics (cached 60s per gym and counter version)."""
+        return DashboardStats.model_validate_json(self.get_dashboard_stats_json(gym_id))
+
+    def get_dashboard_stats_json(self, gym_id: uuid.UUID, version: str | None = None) -> bytes:
+        """
+        Dashboard stats as encoded JSON; the cache holds the bytes, so a hit is returned as is.
+
+        The cache key includes version (the route passes its ETag; otherwise
+        the gym's change counters and local date), so a write or midnight
+        misses instead of serving stats older than the caller's validators.
+        """
+        if version is None:
+            versions = gym_versions(self.db, gym_id, DASHBOARD_SCOPES)
+            version = ",".join(f"{scope}={versions.get(scope, (0, None))[0]}" for scope in DASHBOARD_SCOPES)
+            version += f"|{local_today(self.db, gym_id).isoformat()}"
+        cache_key = f"dashboard:{gym_id}:{version}"
         cached = cache_get(cache_key)
         if cached is not None:
-            return DashboardStats.model_validate(cached)
+            return cached
 
-        stats = self._compute_dashboard_stats(gym_id)
-        cache_set(cache_key, stats.model_dump(mode="json"), ttl_seconds=60)
-        return stats
+        body = self._compute_dashboard_stats(gym_id).model_dump_json().encode()
+        cache_set(cache_key, body, ttl_seconds=60)
+        return body
 
     def _compute_dashboard_stats(self, gym_id: uuid.UUID) -> DashboardStats:
-        today = date.today()
+        today = local_today(self.db, gym_id)
         week_from_now = today + timedelta(days=7)
         
         # Total members
@@ -86,25 +108,11 @@ class ReportsService:
         # Expired members
         expired_members = total_members - active_members
         
-        # Today's check-ins
-        today_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
-        today_end = today_start + timedelta(days=1)
+        # Today's check-ins (hourly rollups, no attendance scan)
+        today_check_ins = get_day_totals(self.db, gym_id=gym_id, day=today)[0]
         
-        today_check_ins = self.db.execute(
-            select(func.count()).where(
-                Attendance.gym_id == gym_id,
-                Attendance.check_in_time >= today_start,
-                Attendance.check_in_time < today_end,
-            )
-        ).scalar() or 0
-        
-        # Today's collection
-        today_collection = self.db.execute(
-            select(func.coalesce(func.sum(Payment.amount), 0)).where(
-                Payment.gym_id == gym_id,
-                Payment.payment_date == today,
-            )
-        ).scalar() or Decimal("0")
+        # Today's collection (revenue ledger, no payments scan)
+        today_collection = get_revenue_total(self.db, gym_id=gym_id, from_date=today, to_date=today)
         
         # Members with dues
         dues_result = self.db.execute(
@@ -208,52 +216,24 @@ class ReportsService:
         from_date: date,
         to_date: date,
     ) -> CollectionReport:
-        """Get collection report for a date range."""
-        # Total and count
-        result = self.db.execute(
-            select(
-                func.coalesce(func.sum(Payment.amount), 0),
-                func.count(),
-            ).where(
-                Payment.gym_id == gym_id,
-                Payment.payment_date >= from_date,
-                Payment.payment_date <= to_date,
-            )
-        ).first()
-        
-        total_amount = result[0] if result else Decimal("0")
-        total_transactions = result[1] if result else 0
-        
-        # By mode
-        mode_result = self.db.execute(
-            select(
-                Payment.payment_mode,
-                func.sum(Payment.amount),
-            ).where(
-                Payment.gym_id == gym_id,
-                Payment.payment_date >= from_date,
-                Payment.payment_date <= to_date,
-            ).group_by(Payment.payment_mode)
-        ).all()
+        """Get collection report for a date range (one revenue ledger query)."""
+        total_amount = Decimal("0")
+        total_transactions = 0
+        by_mode: dict[str, Decimal] = {}
+        by_day: dict[date, dict] = {}
         
-        by_mode = {row[0].value: row[1] for row in mode_result}
-        
-        # Daily breakdown
-        daily_result = self.db.execute(
-            select(
-                Payment.payment_date,
-                func.sum(Payment.amount),
-                func.count(),
-            ).where(
-                Payment.gym_id == gym_id,
-                Payment.payment_date >= from_date,
-                Payment.payment_date <= to_date,
-            ).group_by(Payment.payment_date).order_by(Payment.payment_date)
-        ).all()
+        for row in get_ledger_rows(self.db, gym_id=gym_id, from_date=from_date, to_date=to_date):
+            total_amount += row.amount
+            total_transactions += row.payment_count
+            mode_key = row.payment_mode.value
+            by_mode[mode_key] = by_mode.get(mode_key, Decimal("0")) + row.amount
+            day = by_day.setdefault(row.day, {"amount": Decimal("0"), "count": 0})
+            day["amount"] += row.amount
+            day["count"] += row.payment_count
         
         daily_breakdown = [
-            {"date": str(row[0]), "amount": float(row[1]), "count": row[2]}
-            for row in daily_result
+            {"date": str(day), "amount": float(totals["amount"]), "count": totals["count"]}
+            for day, totals in sorted(by_day.items())
         ]
         
         return CollectionReport(
@@ -412,7 +392,7 @@ class ReportsService:
 
         # Recent check-ins
         check_ins = self.db.execute(
-            select(Attendance, Member.name)
+            select(Attendance.id, Attendance.check_in_time, Member.name)
             .join(Member, Attendance.member_id == Member.id)
             .where(
                 Attendance.gym_id == gym_id,
@@ -421,21 +401,21 @@ class ReportsService:
             .order_by(Attendance.check_in_time.desc())
             .limit(limit)
         ).all()
-        for att, name in check_ins:
+        for attendance_id, check_in_time, name in check_ins:
             items.append((
-                att.check_in_time,
+                check_in_time,
                 ActivityFeedItem(
                     type="check_in",
                     title=f"{name} checked in",
-                    subtitle=att.check_in_time.strftime("%I:%M %p"),
-                    time=att.check_in_time.isoformat(),
-                    link_id=str(att.id),
+                    subtitle=check_in_time.strftime("%I:%M %p"),
+                    time=check_in_time.isoformat(),
+                    link_id=str(attendance_id),
                 ),
             ))
 
         # Recent payments
         payments = self.db.execute(
-            select(Payment, Member.name)
+            select(Payment.id, Payment.amount, Payment.payment_date, Member.name)
             .join(Member, Payment.member_id == Member.id)
             .where(
                 Payment.gym_id == gym_id,
@@ -444,26 +424,26 @@ class ReportsService:
             .order_by(Payment.payment_date.desc(), Payment.created_at.desc())
             .limit(limit)
         ).all()
-        for pay, name in payments:
-            pay_dt = datetime.combine(pay.payment_date, datetime.min.time()).replace(tzinfo=timezone.utc)
+        for payment_id, amount, payment_date, name in payments:
+            pay_dt = datetime.combine(payment_date, datetime.min.time()).replace(tzinfo=timezone.utc)
             items.append((
                 pay_dt,
                 ActivityFeedItem(
                     type="payment",
-                    title=f"{name} paid ₹{pay.amount:,.0f}",
-                    subtitle=pay.payment_date.strftime("%d %b"),
+                    title=f"{name} paid ₹{amount:,.0f}",
+                    subtitle=payment_date.strftime("%d %b"),
                     time=pay_dt.isoformat(),
-                    link_id=str(pay.id),
+                    link_id=str(payment_id),
                 ),
             ))
 
         # New members (created in last 14 days)
         new_members = self.db.execute(
-            select(Member).where(
+            select(Member.id, Member.name, Member.phone, Member.created_at).where(
                 Member.gym_id == gym_id,
                 Member.created_at >= cutoff_dt,
             ).order_by(Member.created_at.desc()).limit(limit)
-        ).scalars().all()
+        ).all()
         for m in new_members:
             items.append((
                 m.created_at,
@@ -476,7 +456,8 @@ class ReportsService:
                 ),
             ))
 
-        items.sort(key=lambda x: x[0], reverse=True)
+        # SQLite hands back naive datetimes next to the aware payment times; all are UTC.
+        items.sort(key=lambda x: x[0] if x[0].tzinfo else x[0].replace(tzinfo=timezone.utc), reverse=True)
         return [item for _, item in items[:limit]]
 
     def get_inactive_members(
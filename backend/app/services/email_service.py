@@ -10,6 +10,7 @@ from typing import Optional
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import counts_messages
 
 
 class EmailService:
@@ -26,6 +27,7 @@ class EmailService:
         """Check if SMTP is properly configured."""
         return bool(self.smtp_host and self.smtp_user and self.smtp_password)
 
+    @counts_messages("smtp", channel="email")
     def send_email(
         self,
         to_email: str,
@@ -9,6 +9,7 @@ from dataclasses import dataclass
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import counts_messages
 
 
 def normalize_phone_to_e164(phone: str, default_country_code: str = "91") -> str:
@@ -48,6 +49,7 @@ def _pickyassist_configured() -> bool:
     return bool((settings.pickyassist_api_token or "").strip())
 
 
+@counts_messages("pickyassist")
 def send_pickyassist_push(
     to_phone: str,
     body: str,
@@ -156,6 +158,7 @@ def send_whatsapp_then_sms(to_phone: str, body: str) -> SendResult:
     return SendResult(success=False, channel="sms", provider_message_id=None, error=err or "Send failed")
 
 
+@counts_messages("smtp")
 def send_email(to_email: str, subject: str, body: str) -> SendResult:
     """
     Send email via SMTP (GoDaddy / Gmail = free). No per-message cost.
@@ -0,0 +1,305 @@
+"""
+Synthetic multi-gym dataset for benchmarks.
+
+generate_dataset() creates `gyms` gyms with `members` members each, and
+`years` of history per member:
+    - memberships renewed back to back on a random plan, with a few lapses
+    - one payment per membership, plus revenue ledger rows
+    - attendance about `visits_per_week` times a week while the membership is active
+    - attendance rollups
+    - the last 30 days of attendance mirrored as processed biometric events
+
+Rows are bulk-inserted in chunks and generated from a fixed seed, so a
+(seed, gyms, members, years) combination always produces the same data.
+Gyms are identified by slug (bench-<seed>-<n>). Gyms that already exist are
+reused, so repeated runs against the same database skip generation.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.attendance.rollups import rebuild_rollups
+from app.core.security import hash_password
+from app.models import (
+    Attendance,
+    BiometricDevice,
+    BiometricEvent,
+    Gym,
+    Member,
+    Membership,
+    Payment,
+    Plan,
+    User,
+)
+from app.models.enums import (
+    BiometricEventStatus,
+    BiometricEventType,
+    DeviceVendor,
+    Gender,
+    MembershipStatus,
+    PaymentMode,
+    UserRole,
+)
+from app.payments.ledger import rebuild_ledger
+
+CHUNK_SIZE = 5000
+BIOMETRIC_HISTORY_DAYS = 30
+# IST opening hours; attendance is stored in UTC.
+IST = timezone(timedelta(hours=5, minutes=30))
+OPEN_HOUR, CLOSE_HOUR = 6, 22
+
+PLANS = [
+    ("Monthly", 30, Decimal("1500")),
+    ("Quarterly", 90, Decimal("4000")),
+    ("Half-Yearly", 180, Decimal("7500")),
+    ("Annual", 365, Decimal("13000")),
+]
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Reyansh", "Krishna", "Ishaan", "Rohan",
+    "Ananya", "Diya", "Priya", "Aadhya", "Saanvi", "Kavya", "Meera", "Riya", "Neha", "Pooja",
+    "Rahul", "Amit", "Suresh", "Ravi", "Vikram", "Karan", "Sneha", "Anjali", "Divya", "Nisha",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Kumar", "Singh", "Patel", "Reddy", "Nair", "Iyer", "Gupta", "Mehta",
+    "Joshi", "Rao", "Das", "Bose", "Menon", "Pillai", "Chopra", "Malhotra", "Kapoor", "Shetty",
+]
+
+
+@dataclass(frozen=True)
+class BenchGym:
+    gym_id: uuid.UUID
+    owner_id: uuid.UUID
+    device_external_id: str
+    member_codes: list[str]
+
+
+def _slug(seed: int, index: int) -> str:
+    return f"bench-{seed}-{index}"
+
+
+def _bulk_insert(db: Session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(model), rows[start : start + CHUNK_SIZE])
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _visit(rng: random.Random, day: date) -> tuple[datetime, datetime]:
+    local_in = datetime.combine(day, time(rng.randint(OPEN_HOUR, CLOSE_HOUR - 2), rng.randint(0, 59)), IST)
+    check_in = local_in.astimezone(timezone.utc)
+    return check_in, check_in + timedelta(minutes=rng.randint(40, 120))
+
+
+def _existing(db: Session, slug: str) -> BenchGym | None:
+    gym_id = db.execute(select(Gym.id).where(Gym.slug == slug)).scalar_one_or_none()
+    if gym_id is None:
+        return None
+    owner_id = db.execute(
+        select(User.id).where(User.gym_id == gym_id, User.role == UserRole.OWNER)
+    ).scalar_one()
+    device = db.execute(
+        select(BiometricDevice.external_device_id).where(BiometricDevice.gym_id == gym_id)
+    ).scalar_one()
+    codes = db.execute(
+        select(Member.member_code).where(Member.gym_id == gym_id).order_by(Member.member_code)
+    ).scalars().all()
+    return BenchGym(gym_id, owner_id, device, list(codes))
+
+
+def _generate_gym(
+    db: Session,
+    rng: random.Random,
+    *,
+    slug: str,
+    index: int,
+    members: int,
+    years: int,
+    visits_per_week: float,
+    today: date,
+    password_hash: str,
+) -> BenchGym:
+    gym_id, owner_id, device_id = _uuid(rng), _uuid(rng), _uuid(rng)
+    device_external_id = f"{slug}-turnstile-1"
+    history_start = today - timedelta(days=365 * years)
+
+    db.execute(
+        insert(Gym),
+        [{
+            "id": gym_id,
+            "name": f"Bench Gym {index}",
+            "slug": slug,
+            "owner_name": f"Bench Owner {index}",
+            "email": f"{slug}@bench.activehq.test",
+            "phone": f"8{index:09d}",
+            "city": "Bengaluru",
+            "is_active": True,
+        }],
+    )
+    db.execute(
+        insert(User),
+        [{
+            "id": owner_id,
+            "gym_id": gym_id,
+            "email": f"owner+{slug}@bench.activehq.test",
+            "password_hash": password_hash,
+            "name": f"Bench Owner {index}",
+            "role": UserRole.OWNER,
+            "is_active": True,
+        }],
+    )
+    db.execute(
+        insert(BiometricDevice),
+        [{
+            "id": device_id,
+            "gym_id": gym_id,
+            "name": "Front turnstile",
+            "vendor": DeviceVendor.ESSL,
+            "external_device_id": device_external_id,
+            "is_active": True,
+        }],
+    )
+    plans = [(_uuid(rng), name, days, price) for name, days, price in PLANS]
+    _bulk_insert(
+        db,
+        Plan,
+        [
+            {"id": plan_id, "gym_id": gym_id, "name": name, "duration_days": days, "price": price, "is_active": True}
+            for plan_id, name, days, price in plans
+        ],
+    )
+
+    member_rows, membership_rows, payment_rows, attendance_rows, event_rows = [], [], [], [], []
+    codes = []
+    visit_probability = min(visits_per_week / 7, 1.0)
+    biometric_since = today - timedelta(days=BIOMETRIC_HISTORY_DAYS)
+    for n in range(members):
+        member_id = _uuid(rng)
+        code = f"{index:02d}{n:05d}"
+        codes.append(code)
+        phone = f"9{index:02d}{n:07d}"
+        joined = history_start + timedelta(days=rng.randint(0, max((today - history_start).days - 1, 0)))
+        member_rows.append({
+            "id": member_id,
+            "gym_id": gym_id,
+            "member_code": code,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "phone": phone,
+            "phone_digits": phone,
+            "gender": rng.choice([Gender.MALE, Gender.FEMALE]),
+            "joined_date": joined,
+            "is_active": rng.random() > 0.05,
+        })
+
+        start = joined
+        while start <= today:
+            plan_id, _, days, price = rng.choice(plans)
+            end = start + timedelta(days=days - 1)
+            membership_id = _uuid(rng)
+            paid = price if rng.random() > 0.1 else price / 2
+            membership_rows.append({
+                "id": membership_id,
+                "gym_id": gym_id,
+                "member_id": member_id,
+                "plan_id": plan_id,
+                "start_date": start,
+                "end_date": end,
+                "amount_total": price,
+                "amount_paid": paid,
+                "status": MembershipStatus.ACTIVE if end >= today else MembershipStatus.EXPIRED,
+            })
+            payment_rows.append({
+                "id": _uuid(rng),
+                "gym_id": gym_id,
+                "member_id": member_id,
+                "membership_id": membership_id,
+                "amount": paid,
+                "payment_mode": rng.choice(list(PaymentMode)),
+                "payment_date": start,
+            })
+            day = start
+            while day <= min(end, today):
+                if rng.random() < visit_probability:
+                    check_in, check_out = _visit(rng, day)
+                    attendance_rows.append({
+                        "id": _uuid(rng),
+                        "gym_id": gym_id,
+                        "member_id": member_id,
+                        "check_in_time": check_in,
+                        "check_out_time": check_out if day < today else None,
+                    })
+                    if day >= biometric_since:
+                        punches = ((BiometricEventType.CHECK_IN, check_in), (BiometricEventType.CHECK_OUT, check_out))
+                        for event_type, at in punches:
+                            event_rows.append({
+                                "id": _uuid(rng),
+                                "gym_id": gym_id,
+                                "device_id": device_id,
+                                "member_id": member_id,
+                                "external_event_id": f"{code}-{at:%Y%m%d%H%M}-{event_type.value}",
+                                "person_identifier": code,
+                                "event_type": event_type,
+                                "event_time": at,
+                                "status": BiometricEventStatus.PROCESSED,
+                            })
+                day += timedelta(days=1)
+            # One in five members lapses for a while before renewing.
+            start = end + timedelta(days=1 + (rng.randint(15, 90) if rng.random() < 0.2 else 0))
+
+    for model, rows in (
+        (Member, member_rows),
+        (Membership, membership_rows),
+        (Payment, payment_rows),
+        (Attendance, attendance_rows),
+        (BiometricEvent, event_rows),
+    ):
+        _bulk_insert(db, model, rows)
+    rebuild_ledger(db, gym_id=gym_id, from_date=history_start, to_date=today)
+    rebuild_rollups(db, gym_id=gym_id, from_date=history_start, to_date=today)
+    db.commit()
+    return BenchGym(gym_id, owner_id, device_external_id, codes)
+
+
+def generate_dataset(
+    db: Session,
+    *,
+    gyms: int = 3,
+    members: int = 300,
+    years: int = 1,
+    visits_per_week: float = 3.0,
+    seed: int = 42,
+    today: date | None = None,
+) -> list[BenchGym]:
+    """Create (or reuse) the benchmark gyms. Returns them in slug order."""
+    today = today or date.today()
+    password_hash = None
+    result = []
+    for index in range(gyms):
+        slug = _slug(seed, index)
+        existing = _existing(db, slug)
+        if existing is not None:
+            result.append(existing)
+            continue
+        # bcrypt is slow on purpose: hash once for all owners.
+        password_hash = password_hash or hash_password("Bench@123")
+        result.append(
+            _generate_gym(
+                db,
+                random.Random(f"{seed}:{index}"),
+                slug=slug,
+                index=index,
+                members=members,
+                years=years,
+                visits_per_week=visits_per_week,
+                today=today,
+                password_hash=password_hash,
+            )
+        )
+    return result
@@ -0,0 +1,139 @@
+"""
+Benchmark scenarios: the hot paths, called at the service layer.
+
+Each scenario is a function (db, ctx, round_no) -> None. The runner calls it
+inside a transaction that is rolled back afterwards, so writing scenarios
+(ingest, imports, cron) see the same data every round. `round_no` keeps
+generated identifiers unique within a run.
+
+cold=True scenarios run with the in-process caches cleared (dashboard stats,
+biometric resolver, typeahead index), so they measure the query path rather
+than a dict lookup.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.auth.dependencies import TenantContext
+from app.automation.cron_runner import run_all_automation
+from app.biometric.schemas import BiometricEventIngestItem, BiometricEventIngestRequest
+from app.biometric.service import BiometricService
+from app.members.service import MemberService
+from app.migration.schemas import (
+    AttendanceImportRequest,
+    AttendanceImportRow,
+    MemberImportRequest,
+    MemberImportRow,
+)
+from app.migration.service import MigrationService
+from app.models import Gym, User
+from app.models.enums import BiometricEventType
+from app.reports.service import ReportsService
+from benchmarks.generator import BenchGym
+
+INGEST_BATCH = 200
+IMPORT_MEMBERS = 200
+IMPORT_ATTENDANCE = 2000
+
+
+@dataclass(frozen=True)
+class BenchContext:
+    gym: BenchGym
+    today: date
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    run: Callable[[Session, BenchContext, int], None]
+    cold: bool = False
+
+
+def _tenant(db: Session, ctx: BenchContext) -> TenantContext:
+    return TenantContext(db.get(User, ctx.gym.owner_id), db.get(Gym, ctx.gym.gym_id))
+
+
+def list_members(db: Session, ctx: BenchContext, round_no: int) -> None:
+    MemberService(db).list_members(ctx.gym.gym_id, page=1, page_size=20)
+
+
+def search_members(db: Session, ctx: BenchContext, round_no: int) -> None:
+    MemberService(db).list_members(ctx.gym.gym_id, query="kumar", page=1, page_size=20)
+
+
+def dashboard_stats(db: Session, ctx: BenchContext, round_no: int) -> None:
+    ReportsService(db).get_dashboard_stats(ctx.gym.gym_id)
+
+
+def activity_feed(db: Session, ctx: BenchContext, round_no: int) -> None:
+    ReportsService(db).get_activity_feed(ctx.gym.gym_id)
+
+
+def collection_report(db: Session, ctx: BenchContext, round_no: int) -> None:
+    ReportsService(db).get_collection_report(ctx.gym.gym_id, ctx.today - timedelta(days=30), ctx.today)
+
+
+def ingest_events(db: Session, ctx: BenchContext, round_no: int) -> None:
+    codes = ctx.gym.member_codes
+    base = datetime.combine(ctx.today, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=2)
+    events = [
+        BiometricEventIngestItem(
+            external_event_id=f"bench-{round_no}-{i}",
+            person_identifier=codes[i % len(codes)],
+            event_time=base + timedelta(seconds=i * 7),
+            event_type=BiometricEventType.CHECK_IN,
+        )
+        for i in range(INGEST_BATCH)
+    ]
+    BiometricService(db).ingest_events(
+        _tenant(db, ctx),
+        BiometricEventIngestRequest(external_device_id=ctx.gym.device_external_id, events=events),
+    )
+
+
+def import_members(db: Session, ctx: BenchContext, round_no: int) -> None:
+    rows = [
+        MemberImportRow(
+            name=f"Imported Member {round_no}-{i}",
+            phone=f"7{round_no % 100:02d}{i:07d}",
+            member_code=f"imp-{round_no}-{i}",
+        )
+        for i in range(IMPORT_MEMBERS)
+    ]
+    MigrationService(db).import_members(ctx.gym.gym_id, MemberImportRequest(members=rows))
+
+
+def import_attendance(db: Session, ctx: BenchContext, round_no: int) -> None:
+    codes = ctx.gym.member_codes
+    start = datetime.combine(ctx.today - timedelta(days=400), datetime.min.time(), tzinfo=timezone.utc)
+    records = [
+        AttendanceImportRow(
+            person_identifier=codes[i % len(codes)],
+            timestamp=start + timedelta(minutes=17 * i + round_no),
+            punch_type=BiometricEventType.CHECK_IN,
+        )
+        for i in range(IMPORT_ATTENDANCE)
+    ]
+    MigrationService(db).import_attendance(
+        ctx.gym.gym_id, AttendanceImportRequest(records=records, source_label=f"bench-{round_no}")
+    )
+
+
+def cron_runner(db: Session, ctx: BenchContext, round_no: int) -> None:
+    run_all_automation(db)
+
+
+SCENARIOS = [
+    Scenario("list_members", list_members),
+    Scenario("search_members", search_members),
+    Scenario("dashboard_stats", dashboard_stats, cold=True),
+    Scenario("activity_feed", activity_feed),
+    Scenario("collection_report", collection_report),
+    Scenario("ingest_events", ingest_events),
+    Scenario("import_members", import_members),
+    Scenario("import_attendance", import_attendance),
+    Scenario("cron_runner", cron_runner),
+]
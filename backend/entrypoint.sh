@@ -7,6 +7,11 @@ alembic upgrade head
 
 echo "✅ Migrations complete. Starting Gunicorn server..."
 
+# Prometheus multiprocess collection: one shared, empty directory per server start
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/activehq-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 exec gunicorn \
   --worker-class uvicorn.workers.UvicornWorker \
   --workers ${GUNICORN_WORKERS:-4} \
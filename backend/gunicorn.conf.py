@@ -0,0 +1,16 @@
+"""
+Gunicorn hooks (loaded automatically from the working directory).
+
+Prometheus multiprocess mode: entrypoint.sh sets PROMETHEUS_MULTIPROC_DIR;
+when a worker exits (max-requests recycling, crash) its live gauges are
+dropped so the pool gauges only sum running workers.
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
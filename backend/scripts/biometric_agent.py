@@ -1,46 +1,108 @@
 """
 ActiveHQ Biometric Agent (Gym PC)
 
-Polls eSSL/ZK device over LAN (TCP 4370) and pushes attendance logs to ActiveHQ API.
+Polls eSSL/ZK devices over LAN (TCP 4370) and pushes attendance logs to ActiveHQ API.
 
-Usage (Windows PowerShell):
+Usage (Windows PowerShell), single device:
   python -m pip install -r scripts/biometric_agent_requirements.txt
   $env:DEVICE_IP="192.168.1.11"
   $env:DEVICE_PORT="4370"
-  $env:DEVICE_TIMEZONE="Asia/Kolkata"
   $env:EXTERNAL_DEVICE_ID="essl-x2008-1"
   $env:ACTIVEHQ_API_BASE="https://api.activehq.fit"
   $env:ACTIVEHQ_BIOMETRIC_TOKEN="<from /api/v1/biometric/devices/{id}/token>"
   python scripts/biometric_agent.py
 
+Several devices (one process for all turnstiles of a gym):
+  $env:DEVICES_FILE="devices.json"
+  # [{"device_ip": "192.168.1.11", "external_device_id": "essl-front-1"},
+  #  {"device_ip": "192.168.1.12", "external_device_id": "essl-front-2", "device_port": 4370}]
+  Any one of the gym's device tokens authenticates the combined uploads.
+
 Mapping:
   The device's user_id must match Member.member_code in ActiveHQ.
+
+Sync:
+  The state file keeps, per device, a high-water mark (last_seen_ts, epoch
+  seconds), the device's record count at the last pull and the event IDs
+  seen within the last DEDUPE_WINDOW_SECONDS. A poll skips the log download
+  when the record count is unchanged and only converts records newer than
+  the watermark minus the window. pyzk has no ranged read, so a poll that
+  does see new records still downloads the device's whole log (clear the
+  device log periodically to keep that transfer small); only the conversion,
+  spooling and upload are O(new punches).
+
+Spool:
+  Converted events are appended to a local SQLite spool (SPOOL_PATH) before
+  upload and deleted only after the server accepts them, so punches survive
+  network outages and agent restarts. After an outage the spool drains in
+  back-to-back full batches.
+
+Upload:
+  Batches go over one long-lived WebSocket (/events/stream), skipping the
+  per-request HTTP round trip and auth lookup; a batch leaves the spool only
+  once the server reports it committed. If the stream is unavailable (busy,
+  connection error, no commit within STREAM_ACK_TIMEOUT_SECONDS, or the
+  websockets package is missing) the same batch goes out over HTTP
+  (/events/ingest-device/batch: one keep-alive client, gzip bodies,
+  retries with exponential backoff) and the stream is retried after
+  STREAM_RETRY_SECONDS. STREAM_UPLOAD=0 uses HTTP only. Re-sent punches
+  are harmless: the server dedupes by external_event_id.
+
+Concurrency:
+  Each device is polled by its own thread. A single uploader thread drains
+  the shared spool and coalesces events from all devices into one ingest
+  call per batch. GET http://127.0.0.1:STATUS_PORT/status reports per-device
+  lag, throughput and pending counts (STATUS_PORT=0 disables it).
 """
 
 from __future__ import annotations
 
+import gzip
 import json
 import os
+import random
+import sqlite3
+import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import httpx
 
+# Punches this close to the watermark are re-checked against recent IDs
+# (device clocks and out-of-order log writes can land slightly behind it).
+DEDUPE_WINDOW_SECONDS = 15 * 60
+# Events per ingest call (server accepts up to 500 per device batch).
+MAX_BATCH_SIZE = 500
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# WebSocket upload: wait this long for "committed"; after a failure use HTTP this long.
+STREAM_ACK_TIMEOUT_SECONDS = 30.0
+STREAM_RETRY_SECONDS = 300.0
+
 
 @dataclass
-class Config:
+class DeviceConfig:
     device_ip: str
-    device_port: int
-    device_timezone: str
     external_device_id: str
+    device_port: int = 4370
+
+
+@dataclass
+class Config:
+    devices: list[DeviceConfig]
     api_base: str
     biometric_token: str
     poll_seconds: int = 10
-    batch_size: int = 200
+    batch_size: int = MAX_BATCH_SIZE
     state_path: Path = Path("biometric_agent_state.json")
+    spool_path: Path = Path("biometric_agent_spool.db")
+    max_retries: int = 5
+    status_port: int = 8765
+    stream_upload: bool = True
 
 
 def _env(name: str, default: str | None = None) -> str:
@@ -52,41 +114,86 @@ def _env(name: str, default: str | None = None) -> str:
     return default
 
 
+def _load_devices() -> list[DeviceConfig]:
+    devices_file = _env("DEVICES_FILE", "")
+    if devices_file:
+        entries = json.loads(Path(devices_file).read_text(encoding="utf-8"))
+        return [DeviceConfig(**entry) for entry in entries]
+    return [
+        DeviceConfig(
+            device_ip=_env("DEVICE_IP"),
+            external_device_id=_env("EXTERNAL_DEVICE_ID"),
+            device_port=int(_env("DEVICE_PORT", "4370")),
+        )
+    ]
+
+
 def load_config() -> Config:
     return Config(
-        device_ip=_env("DEVICE_IP"),
-        device_port=int(_env("DEVICE_PORT", "4370")),
-        device_timezone=_env("DEVICE_TIMEZONE", "Asia/Kolkata"),
-        external_device_id=_env("EXTERNAL_DEVICE_ID"),
+        devices=_load_devices(),
         api_base=_env("ACTIVEHQ_API_BASE").rstrip("/"),
         biometric_token=_env("ACTIVEHQ_BIOMETRIC_TOKEN"),
         poll_seconds=int(_env("POLL_SECONDS", "10")),
-        batch_size=int(_env("BATCH_SIZE", "200")),
+        batch_size=min(int(_env("BATCH_SIZE", str(MAX_BATCH_SIZE))), MAX_BATCH_SIZE),
         state_path=Path(_env("STATE_PATH", "biometric_agent_state.json")),
+        spool_path=Path(_env("SPOOL_PATH", "biometric_agent_spool.db")),
+        max_retries=int(_env("MAX_RETRIES", "5")),
+        status_port=int(_env("STATUS_PORT", "8765")),
+        stream_upload=_env("STREAM_UPLOAD", "1") != "0",
     )
 
 
-def load_state(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        return {"last_seen_ts": None, "sent_event_ids": []}
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return {"last_seen_ts": None, "sent_event_ids": []}
-
+def _empty_state() -> dict[str, Any]:
+    return {"last_seen_ts": None, "last_record_count": None, "recent_event_ids": {}}
 
-def save_state(path: Path, state: dict[str, Any]) -> None:
-    path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
 
+class AgentState:
+    """Per-device sync state, persisted as one JSON file."""
 
-def _attendance_to_event(record: Any, tz_name: str) -> dict[str, Any]:
-    # pyzk record usually exposes: user_id, timestamp, status, punch
-    user_id = str(getattr(record, "user_id", "") or getattr(record, "uid", "") or "")
-    ts: datetime = getattr(record, "timestamp", None) or getattr(record, "time", None)
+    def __init__(self, path: Path, device_ids: list[str]):
+        self.path = path
+        self.lock = threading.Lock()
+        saved: dict[str, Any] = {}
+        if path.exists():
+            try:
+                saved = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                saved = {}
+        if "devices" not in saved and device_ids:
+            # Single-device state file from earlier agent versions. Its old
+            # sent_event_ids list is dropped (the server dedupes by event id).
+            saved = {"devices": {device_ids[0]: saved}}
+        self.devices: dict[str, dict[str, Any]] = {}
+        for device_id in device_ids:
+            state = _empty_state()
+            for key, value in (saved.get("devices", {}).get(device_id) or {}).items():
+                if key in state and value is not None:
+                    state[key] = value
+            self.devices[device_id] = state
+
+    def device(self, device_id: str) -> dict[str, Any]:
+        return self.devices[device_id]
+
+    def save(self) -> None:
+        with self.lock:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps({"devices": self.devices}, indent=2, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+
+
+def _record_time(record: Any) -> datetime:
+    ts = getattr(record, "timestamp", None) or getattr(record, "time", None)
     if not isinstance(ts, datetime):
         ts = datetime.now(timezone.utc)
     if ts.tzinfo is None:
         ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _attendance_to_event(record: Any) -> dict[str, Any]:
+    # pyzk record usually exposes: user_id, timestamp, status, punch
+    user_id = str(getattr(record, "user_id", "") or getattr(record, "uid", "") or "")
+    ts = _record_time(record)
 
     # Make a stable external_event_id (deviceUserId + epoch seconds + punch/status)
     punch = str(getattr(record, "punch", "") or getattr(record, "status", "") or "")
@@ -97,33 +204,51 @@ def _attendance_to_event(record: Any, tz_name: str) -> dict[str, Any]:
         "event_time": ts.isoformat(),
         "event_type": "unknown",
         "device_offset_minutes": 0,
+        # user_id/timestamp already travel as person_identifier/event_time
         "raw_payload": {
-            "user_id": user_id,
-            "timestamp": ts.isoformat(),
             "punch": getattr(record, "punch", None),
             "status": getattr(record, "status", None),
-            "device_timezone": tz_name,
         },
     }
 
 
-def fetch_attendance(config: Config) -> list[Any]:
+def _default_zk_factory(device: DeviceConfig) -> Any:
     try:
         from zk import ZK  # type: ignore
     except Exception as exc:
         raise SystemExit("pyzk not installed. Run: pip install -r scripts/biometric_agent_requirements.txt") from exc
-
-    zk = ZK(config.device_ip, port=config.device_port, timeout=10, force_udp=False, ommit_ping=False)
+    return ZK(device.device_ip, port=device.device_port, timeout=10, force_udp=False, ommit_ping=False)
+
+
+def fetch_attendance(
+    device: DeviceConfig,
+    state: dict[str, Any],
+    zk_factory: Callable[[DeviceConfig], Any] = _default_zk_factory,
+) -> tuple[list[Any] | None, int | None]:
+    """
+    Download the device log. Returns (logs, record_count); logs is None when
+    the device's record count has not changed since the last pull. Otherwise
+    logs is the full log: get_attendance() cannot start at an offset.
+    """
+    zk = zk_factory(device)
     conn = None
     try:
         conn = zk.connect()
+        record_count = None
+        try:
+            conn.read_sizes()
+            record_count = int(conn.records)
+        except Exception:
+            pass
+        if record_count is not None and record_count == state.get("last_record_count"):
+            return None, record_count
         # Some devices require this for proper timestamp decoding
         try:
             conn.disable_device()
         except Exception:
             pass
         logs = conn.get_attendance() or []
-        return logs
+        return logs, record_count
     finally:
         if conn is not None:
             try:
@@ -136,62 +261,510 @@ def fetch_attendance(config: Config) -> list[Any]:
                 pass
 
 
-def push_events(config: Config, events: list[dict[str, Any]]) -> dict[str, Any]:
-    url = f"{config.api_base}/api/v1/biometric/events/ingest-device"
-    payload = {"external_device_id": config.external_device_id, "events": events}
-    headers = {"X-Biometric-Token": config.biometric_token, "Content-Type": "application/json"}
-    with httpx.Client(timeout=30.0) as client:
-        r = client.post(url, json=payload, headers=headers)
-        r.raise_for_status()
-        return r.json()
-
-
-def main() -> None:
-    config = load_config()
-    state = load_state(config.state_path)
-    sent_ids: set[str] = set(state.get("sent_event_ids") or [])
+def select_new_events(logs: list[Any], state: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Convert only records newer than the watermark minus the dedupe window,
+    skipping IDs already seen inside that window. Returned oldest first.
+    """
+    watermark = state.get("last_seen_ts")
+    floor = watermark - DEDUPE_WINDOW_SECONDS if watermark is not None else None
+    recent = state["recent_event_ids"]
+    fresh = [rec for rec in logs if floor is None or _record_time(rec).timestamp() >= floor]
+    fresh.sort(key=lambda rec: _record_time(rec))
+    events: list[dict[str, Any]] = []
+    for rec in fresh:
+        ev = _attendance_to_event(rec)
+        if ev["external_event_id"] in recent:
+            continue
+        events.append(ev)
+    return events
+
+
+def mark_seen(state: dict[str, Any], events: list[dict[str, Any]]) -> None:
+    """Advance the watermark past spooled events and prune IDs older than the window."""
+    recent: dict[str, float] = state["recent_event_ids"]
+    watermark = state.get("last_seen_ts")
+    for ev in events:
+        ts = datetime.fromisoformat(ev["event_time"]).timestamp()
+        recent[ev["external_event_id"]] = ts
+        watermark = ts if watermark is None else max(watermark, ts)
+    state["last_seen_ts"] = watermark
+    if watermark is not None:
+        floor = watermark - DEDUPE_WINDOW_SECONDS
+        state["recent_event_ids"] = {k: v for k, v in recent.items() if v >= floor}
+
+
+class Spool:
+    """Append-only local queue of converted events (SQLite, survives restarts)."""
+
+    def __init__(self, path: Path, legacy_device_id: str | None = None):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " external_device_id TEXT NOT NULL,"
+            " external_event_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " UNIQUE (external_device_id, external_event_id))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " id INTEGER PRIMARY KEY, external_device_id TEXT, external_event_id TEXT,"
+            " payload TEXT, reason TEXT)"
+        )
+        self._migrate_single_device_spool(legacy_device_id)
+
+    def _migrate_single_device_spool(self, device_id: str | None) -> None:
+        # Earlier single-device agents kept a `spool` table without a device column.
+        legacy = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'spool'"
+        ).fetchone()
+        if not legacy or not device_id:
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO events (external_device_id, external_event_id, payload)"
+                " SELECT ?, external_event_id, payload FROM spool ORDER BY id",
+                (device_id,),
+            )
+            self.conn.execute("DROP TABLE spool")
+
+    def append(self, device_id: str, events: list[dict[str, Any]]) -> None:
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO events (external_device_id, external_event_id, payload)"
+                " VALUES (?, ?, ?)",
+                [
+                    (device_id, ev["external_event_id"], json.dumps(ev, separators=(",", ":")))
+                    for ev in events
+                ],
+            )
+
+    def peek(self, limit: int) -> list[tuple[int, str, dict[str, Any]]]:
+        """Oldest pending events across all devices: (row id, external_device_id, event)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, external_device_id, payload FROM events ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, device_id, json.loads(payload)) for row_id, device_id, payload in rows]
+
+    def ack(self, ids: list[int]) -> None:
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM events WHERE id = ?", [(i,) for i in ids])
+
+    def dead_letter(self, ids: list[int], reason: str) -> None:
+        """Park events the server rejected so they cannot block the queue."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO dead_letter (id, external_device_id, external_event_id, payload, reason)"
+                " SELECT id, external_device_id, external_event_id, payload, ? FROM events WHERE id = ?",
+                [(reason[:500], i) for i in ids],
+            )
+            self.conn.executemany("DELETE FROM events WHERE id = ?", [(i,) for i in ids])
+
+    def pending_by_device(self) -> dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT external_device_id, COUNT(*) FROM events GROUP BY external_device_id"
+            ).fetchall()
+        return dict(rows)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class Uploader:
+    """One keep-alive HTTP client for all uploads; gzip bodies, retry with backoff."""
+
+    def __init__(
+        self,
+        config: Config,
+        client: httpx.Client | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.config = config
+        self.url = f"{config.api_base}/api/v1/biometric/events/ingest-device/batch"
+        self.client = client or httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120.0),
+        )
+        self.sleep = sleep
+
+    def push(self, batches: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+        """Upload events grouped by external_device_id in one call."""
+        payload = {
+            "batches": [
+                {"external_device_id": device_id, "events": events}
+                for device_id, events in batches.items()
+            ]
+        }
+        body = gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        headers = {
+            "X-Biometric-Token": self.config.biometric_token,
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+        }
+        attempt = 0
+        while True:
+            try:
+                r = self.client.post(self.url, content=body, headers=headers)
+                if r.status_code not in RETRYABLE_STATUS:
+                    r.raise_for_status()
+                    return r.json()
+                error: Exception = httpx.HTTPStatusError(
+                    f"retryable status {r.status_code}", request=r.request, response=r
+                )
+            except httpx.TransportError as exc:
+                error = exc
+            if attempt >= self.config.max_retries:
+                raise error
+            self.sleep(min(60.0, 2 ** attempt) + random.uniform(0, 0.5))
+            attempt += 1
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class StreamUnavailable(Exception):
+    """The stream cannot take this batch now; send it over HTTP instead."""
+
+
+class StreamUploader:
+    """
+    Upload over the /events/stream WebSocket, with HTTP batch push as fallback.
+
+    push() has the HTTP uploader's contract: it returns once every device
+    batch is committed or rejected, so drain() acks nothing the server has
+    only queued.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        fallback: Callable[[dict[str, list[dict[str, Any]]]], dict[str, Any]],
+        connect: Callable[[], Any] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config
+        self.url = "ws" + config.api_base.removeprefix("http") + "/api/v1/biometric/events/stream"
+        self.fallback = fallback
+        self.connect = connect or self._connect
+        self.clock = clock
+        self.conn: Any = None
+        self.seq = 0
+        self.disabled_until = 0.0
+
+    def _connect(self) -> Any:
+        from websockets.sync.client import connect  # optional: without it uploads stay on HTTP
+
+        return connect(
+            self.url,
+            additional_headers={"X-Biometric-Token": self.config.biometric_token},
+            open_timeout=10,
+            max_size=None,
+        )
+
+    def push(self, batches: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+        if self.clock() >= self.disabled_until:
+            try:
+                return self._push_stream(batches)
+            except Exception as exc:  # any stream failure: the HTTP path re-sends, the server dedupes
+                print(f"[agent] stream upload unavailable ({exc}), using HTTP for {STREAM_RETRY_SECONDS:.0f}s")
+                self.close()
+                self.disabled_until = self.clock() + STREAM_RETRY_SECONDS
+        return self.fallback(batches)
+
+    def _push_stream(self, batches: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+        if self.conn is None:
+            self.conn = self.connect()
+        pending: dict[int, str] = {}
+        for device_id, events in batches.items():
+            self.seq += 1
+            pending[self.seq] = device_id
+            message = {"seq": self.seq, "external_device_id": device_id, "events": events}
+            self.conn.send(json.dumps(message, separators=(",", ":")))
+
+        results = []
+        deadline = self.clock() + STREAM_ACK_TIMEOUT_SECONDS
+        while pending:
+            reply = json.loads(self.conn.recv(timeout=max(0.0, deadline - self.clock())))
+            device_id = pending.get(reply.get("seq"))
+            status = reply.get("status")
+            if device_id is None or status == "queued":
+                continue  # "queued" is not durable yet; other seqs belong to an abandoned call
+            if status == "committed":
+                results.append({"external_device_id": device_id, "total_received": reply.get("count"), "error": None})
+            elif status in ("failed", "invalid") and reply.get("error") != "processing_error":
+                # Rejected for good (unknown device, bad payload), like an HTTP 4xx
+                results.append({"external_device_id": device_id, "error": reply.get("error") or status})
+            else:
+                raise StreamUnavailable(f"{status}: {reply.get('error') or 'retry later'}")
+            del pending[reply["seq"]]
+        return {"devices": results}
+
+    def close(self) -> None:
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
 
-    print(f"[agent] device={config.device_ip}:{config.device_port} external_device_id={config.external_device_id}")
-    print(f"[agent] api={config.api_base} poll={config.poll_seconds}s batch={config.batch_size}")
 
+@dataclass
+class DeviceStats:
+    """Counters behind the local status endpoint."""
+
+    pulled_total: int = 0
+    uploaded_total: int = 0
+    last_poll_at: float | None = None
+    last_success_at: float | None = None
+    last_error: str | None = None
+    recent_uploads: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def record_upload(self, count: int) -> None:
+        self.uploaded_total += count
+        self.recent_uploads.append((time.time(), count))
+
+    def uploads_last_minute(self) -> int:
+        cutoff = time.time() - 60
+        return sum(count for ts, count in list(self.recent_uploads) if ts >= cutoff)
+
+
+def pull_once(
+    device: DeviceConfig,
+    state: AgentState,
+    spool: Spool,
+    zk_factory: Callable[[DeviceConfig], Any] = _default_zk_factory,
+) -> int:
+    """Device -> spool. Returns number of events spooled."""
+    device_state = state.device(device.external_device_id)
+    logs, record_count = fetch_attendance(device, device_state, zk_factory)
+    if logs is None:
+        return 0
+    events = select_new_events(logs, device_state)
+    # Spool first: once durable locally, the watermark and count may advance.
+    spool.append(device.external_device_id, events)
+    mark_seen(device_state, events)
+    device_state["last_record_count"] = record_count
+    state.save()
+    return len(events)
+
+
+def drain(
+    config: Config,
+    spool: Spool,
+    push: Callable[[dict[str, list[dict[str, Any]]]], dict[str, Any]],
+    stats: dict[str, DeviceStats] | None = None,
+) -> int:
+    """
+    Spool -> server until empty, coalescing all devices into each call.
+    Entries are deleted only once the server accepts them; a device the
+    server reports an error for, or leaves out of its response, is moved to
+    dead_letter.
+    """
+    total_sent = 0
     while True:
+        batch = spool.peek(config.batch_size)
+        if not batch:
+            return total_sent
+        grouped: dict[str, tuple[list[int], list[dict[str, Any]]]] = {}
+        for row_id, device_id, event in batch:
+            ids, events = grouped.setdefault(device_id, ([], []))
+            ids.append(row_id)
+            events.append(event)
+        device_count = len(grouped)
+        try:
+            result = push({device_id: events for device_id, (_, events) in grouped.items()})
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (400, 422):
+                spool.dead_letter([row_id for row_id, _, _ in batch], e.response.text)
+                print(f"[agent] server rejected {len(batch)} events, moved to dead_letter")
+                continue
+            raise
+        for summary in result.get("devices", []):
+            device_id = summary["external_device_id"]
+            ids, _ = grouped.pop(device_id, ([], []))
+            if summary.get("error"):
+                spool.dead_letter(ids, summary["error"])
+                print(f"[agent] {device_id}: {summary['error']}, {len(ids)} events moved to dead_letter")
+                continue
+            spool.ack(ids)
+            total_sent += len(ids)
+            if stats is not None and device_id in stats:
+                stats[device_id].record_upload(len(ids))
+        # A device the response does not mention would be re-peeked and re-sent forever.
+        for device_id, (ids, _) in grouped.items():
+            spool.dead_letter(ids, "missing from server response")
+            print(f"[agent] {device_id}: no result from server, {len(ids)} events moved to dead_letter")
+        print(f"[agent] pushed {len(batch)} events from {device_count} device(s)")
+
+
+def poll_device(
+    config: Config,
+    device: DeviceConfig,
+    state: AgentState,
+    spool: Spool,
+    stats: DeviceStats,
+    wake_uploader: threading.Event,
+    stop: threading.Event,
+    zk_factory: Callable[[DeviceConfig], Any] = _default_zk_factory,
+) -> None:
+    """Per-device thread: pull into the spool every poll_seconds."""
+    while not stop.is_set():
+        stats.last_poll_at = time.time()
+        try:
+            spooled = pull_once(device, state, spool, zk_factory)
+            stats.pulled_total += spooled
+            stats.last_success_at = time.time()
+            stats.last_error = None
+            if spooled:
+                wake_uploader.set()
+        except Exception as e:
+            stats.last_error = str(e)[:200]
+            print(f"[agent] {device.external_device_id} error: {e}")
+        stop.wait(config.poll_seconds)
+
+
+def upload_loop(
+    config: Config,
+    spool: Spool,
+    push: Callable[[dict[str, list[dict[str, Any]]]], dict[str, Any]],
+    stats: dict[str, DeviceStats],
+    wake: threading.Event,
+    stop: threading.Event,
+) -> None:
+    """Uploader thread: drain whenever a poller spooled something (or every poll_seconds)."""
+    while not stop.is_set():
+        wake.clear()
         try:
-            logs = fetch_attendance(config)
-            # Convert and filter out already sent IDs (simple dedupe)
-            events: list[dict[str, Any]] = []
-            for rec in logs:
-                ev = _attendance_to_event(rec, config.device_timezone)
-                if ev["external_event_id"] in sent_ids:
-                    continue
-                events.append(ev)
-
-            # Send in batches
-            total_sent = 0
-            for i in range(0, len(events), config.batch_size):
-                chunk = events[i : i + config.batch_size]
-                if not chunk:
-                    continue
-                result = push_events(config, chunk)
-                total_sent += len(chunk)
-                for ev in chunk:
-                    sent_ids.add(ev["external_event_id"])
-                # keep state bounded
-                if len(sent_ids) > 5000:
-                    sent_ids = set(list(sent_ids)[-3000:])
-                state["sent_event_ids"] = list(sent_ids)
-                save_state(config.state_path, state)
-                print(f"[agent] pushed {len(chunk)} events -> {result}")
-
-            if total_sent == 0:
-                print("[agent] no new events")
+            drain(config, spool, push, stats)
         except httpx.HTTPStatusError as e:
-            print(f"[agent] API error: {e.response.status_code} {e.response.text[:200]}")
+            print(f"[agent] API error: {e.response.status_code} {e.response.text[:200]} (pending={len(spool)})")
         except Exception as e:
-            print(f"[agent] error: {e}")
+            print(f"[agent] upload error: {e} (pending={len(spool)})")
+        wake.wait(config.poll_seconds)
+
+
+def status_snapshot(
+    config: Config,
+    state: AgentState,
+    spool: Spool,
+    stats: dict[str, DeviceStats],
+) -> dict[str, Any]:
+    now = time.time()
+    pending = spool.pending_by_device()
+    devices = []
+    for device in config.devices:
+        device_id = device.external_device_id
+        device_stats = stats[device_id]
+        watermark = state.device(device_id).get("last_seen_ts")
+        devices.append({
+            "external_device_id": device_id,
+            "device_ip": device.device_ip,
+            "lag_seconds": round(now - watermark, 1) if watermark is not None else None,
+            "pending": pending.get(device_id, 0),
+            "pulled_total": device_stats.pulled_total,
+            "uploaded_total": device_stats.uploaded_total,
+            "uploaded_last_minute": device_stats.uploads_last_minute(),
+            "last_poll_at": device_stats.last_poll_at,
+            "last_success_at": device_stats.last_success_at,
+            "last_error": device_stats.last_error,
+        })
+    return {"devices": devices, "pending_total": sum(pending.values())}
+
+
+def start_status_server(port: int, snapshot: Callable[[], dict[str, Any]]) -> ThreadingHTTPServer:
+    """Serve GET /status on localhost only (front-desk PC diagnostics)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 (http.server API)
+            if self.path.rstrip("/") != "/status":
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    config = load_config()
+    device_ids = [d.external_device_id for d in config.devices]
+    state = AgentState(config.state_path, device_ids)
+    spool = Spool(config.spool_path, legacy_device_id=device_ids[0])
+    uploader = Uploader(config)
+    streamer = StreamUploader(config, uploader.push) if config.stream_upload else None
+    push = streamer.push if streamer is not None else uploader.push
+    stats = {device_id: DeviceStats() for device_id in device_ids}
+    wake = threading.Event()
+    stop = threading.Event()
+
+    for device in config.devices:
+        print(f"[agent] device={device.device_ip}:{device.device_port} external_device_id={device.external_device_id}")
+    print(
+        f"[agent] api={config.api_base} poll={config.poll_seconds}s batch={config.batch_size}"
+        f" upload={'stream' if streamer is not None else 'http'}"
+    )
+    print(f"[agent] spool={config.spool_path} pending={len(spool)}")
+
+    threads = [
+        threading.Thread(
+            target=poll_device,
+            args=(config, device, state, spool, stats[device.external_device_id], wake, stop),
+            name=f"poll-{device.external_device_id}",
+            daemon=True,
+        )
+        for device in config.devices
+    ]
+    threads.append(
+        threading.Thread(
+            target=upload_loop,
+            args=(config, spool, push, stats, wake, stop),
+            name="upload",
+            daemon=True,
+        )
+    )
+    server = None
+    if config.status_port:
+        server = start_status_server(config.status_port, lambda: status_snapshot(config, state, spool, stats))
+        print(f"[agent] status=http://127.0.0.1:{config.status_port}/status")
 
-        time.sleep(config.poll_seconds)
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("[agent] stopping")
+    finally:
+        stop.set()
+        wake.set()
+        for thread in threads:
+            thread.join(timeout=config.poll_seconds + 5)
+        if server is not None:
+            server.shutdown()
+        if streamer is not None:
+            streamer.close()
+        uploader.close()
+        spool.close()
 
 
 if __name__ == "__main__":
     main()
-
@@ -36,6 +36,8 @@ from app.models.enums import (
     SubscriptionStatus, BillingCycle, UserRole, Gender,
     MembershipStatus, PaymentMode
 )
+from app.attendance.rollups import rebuild_rollups
+from app.payments.ledger import rebuild_ledger
 
 # Sample data
 INDIAN_FIRST_NAMES = [
@@ -333,6 +335,15 @@ def main():
         
         print(f"   ✅ Created {attendance_count} attendance records")
         
+        # Derived read models (revenue ledger, attendance rollups)
+        db.flush()
+        rebuild_ledger(
+            db, gym_id=gym.id,
+            from_date=date.today() - timedelta(days=366),
+            to_date=date.today() + timedelta(days=366),
+        )
+        rebuild_rollups(db, gym_id=gym.id, from_date=date.today() - timedelta(days=31), to_date=date.today())
+        
         # Commit all
         db.commit()
         
@@ -6,6 +6,7 @@ from decimal import Decimal
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
@@ -14,10 +15,11 @@ if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
 from app.main import app
-from app.core.database import get_db
+from app.core.database import get_async_db, get_async_read_db, get_db, get_read_db
 from app.core.base import Base
 from app.core.security import create_access_token, hash_password
 from app.models import User, Gym, Plan, Member
+from query_budgets import QueryCounter, query_budget
 
 
 # Test database using in-memory SQLite
@@ -75,7 +77,16 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        # Real AsyncSession proxying the test session: async routes see the
+        # same outer transaction as the sync ones and the fixtures.
+        yield AsyncSession(sync_session_class=lambda **kw: db_session)
+    
+    # Replica reads see the test transaction too (tests/test_read_replica.py covers routing)
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     
     with TestClient(app) as test_client:
         yield test_client
@@ -83,6 +94,17 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def query_counter():
+    """
+    query_counter("GET /api/v1/members") -> QueryCounter capped at that route's budget
+    (see tests/query_budgets.py); query_counter() counts without a cap.
+    """
+    def make(route: str | None = None) -> QueryCounter:
+        return query_budget(route) if route else QueryCounter()
+    return make
+
+
 @pytest.fixture
 def test_gym(db_session) -> Gym:
     """Create test gym."""
@@ -0,0 +1,87 @@
+"""
+Query-count budgets for hot routes.
+
+QueryCounter records every statement sent to any engine (SQLAlchemy
+before_cursor_execute) while it is active. With a budget it fails the test
+when more statements were issued, listing them grouped by normalized form
+so a per-row (N+1) query shows up as one line with a large count:
+
+    GET /api/v1/members issued 62 statements (budget 5):
+          1x  SELECT count(*) AS count_1 FROM (SELECT members.id ...
+      +  40x  SELECT memberships.id, ... WHERE memberships.member_id = ?   <- repeated
+      ...
+
+Usage:
+
+    def test_list(client, headers, query_counter):
+        with query_counter("GET /api/v1/members"):
+            client.get("/api/v1/members", headers=headers)
+
+    @query_budget("GET /api/v1/members")       # whole test body, after fixtures
+    def test_list(client, headers): ...
+
+Budgets are per route and must not depend on data size: tests run each
+route at two sizes, so a statement issued once per row fails at the larger
+one. Raise a budget only together with the change that needs the extra
+statement.
+"""
+
+from collections import Counter
+from contextlib import ContextDecorator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.profiling import normalize_statement
+
+# "METHOD /path" -> maximum statements per request, including auth lookups.
+ROUTE_BUDGETS: dict[str, int] = {
+    "GET /api/v1/members": 5,
+    "GET /api/v1/members/expiring": 5,
+    "GET /api/v1/members/with-dues": 5,
+    "GET /api/v1/admin/users": 5,
+    "GET /api/v1/admin/gyms": 6,
+    "GET /api/v1/attendance": 4,
+}
+
+
+class QueryCounter(ContextDecorator):
+    """Count (and optionally cap) the statements issued inside a block."""
+
+    def __init__(self, budget: int | None = None, label: str = "block"):
+        self.budget = budget
+        self.label = label
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        event.remove(Engine, "before_cursor_execute", self._record)
+        if exc_type is None and self.budget is not None and self.count > self.budget:
+            raise AssertionError(self.report())
+        return False
+
+    def report(self) -> str:
+        """Statements grouped by normalized form; '+' marks the ones issued more than once."""
+        grouped = Counter(normalize_statement(statement) for statement in self.statements)
+        budget = f" (budget {self.budget})" if self.budget is not None else ""
+        lines = [f"{self.label} issued {self.count} statements{budget}:"]
+        for statement, times in grouped.most_common():
+            marker = "+" if times > 1 else " "
+            lines.append(f"  {marker} {times:>4}x  {statement[:200]}")
+        return "\n".join(lines)
+
+
+def query_budget(route: str) -> QueryCounter:
+    """QueryCounter capped at ROUTE_BUDGETS[route]; a context manager or a test decorator."""
+    return QueryCounter(budget=ROUTE_BUDGETS[route], label=route)
@@ -77,6 +77,43 @@ class TestAdminGymManagement:
         assert data["page"] == 1
         assert data["page_size"] == 10
 
+    def test_list_gyms_metrics_and_sorting(self, client, super_admin_token, owner_token, test_gym, test_member):
+        """Metrics come back per gym and can drive the sort order."""
+        from datetime import date
+
+        client.post(
+            "/api/v1/payments",
+            json={"member_id": str(test_member.id), "amount": "750.00", "payment_mode": "upi"},
+            headers={"Authorization": f"Bearer {owner_token}"},
+        )
+        headers = {"Authorization": f"Bearer {super_admin_token}"}
+        by_members = client.get(
+            "/api/v1/admin/gyms?sort_by=members_count&order=desc", headers=headers
+        ).json()["items"]
+        top = by_members[0]
+        assert top["id"] == str(test_gym.id)
+        assert top["members_count"] == 1
+        assert top["revenue_this_month"] == 750.0
+        assert top["last_activity"] == date.today().isoformat()
+
+        by_name = client.get("/api/v1/admin/gyms?sort_by=name&order=asc", headers=headers).json()["items"]
+        names = [g["name"] for g in by_name]
+        assert names == sorted(names)
+
+        assert client.get("/api/v1/admin/gyms?sort_by=bogus", headers=headers).status_code == 422
+
+    def test_list_gyms_reads_metrics_per_gym(self, client, super_admin_token, test_gym, query_counter):
+        """No platform-wide GROUP BY: metrics are per-gym lookups for the page's gyms only."""
+        headers = {"Authorization": f"Bearer {super_admin_token}"}
+        with query_counter() as counter:
+            response = client.get("/api/v1/admin/gyms?page_size=5", headers=headers)
+        assert response.status_code == 200
+        gym_statements = [s for s in counter.statements if "FROM gyms" in s]
+        assert gym_statements
+        assert not any("GROUP BY" in statement for statement in gym_statements)
+        metrics = [s for s in gym_statements if "FROM attendance" in s]
+        assert len(metrics) == 1 and " IN " in metrics[0]
+
     def test_get_gym_detail(self, client, super_admin_token, test_gym):
         """Get detailed information about a gym."""
         response = client.get(
@@ -272,3 +309,31 @@ class TestAdminSupportRequests:
             assert "name" in first_req
             assert "gym_name" in first_req
             assert "phone" in first_req
+
+
+class TestPlatformStats:
+    """Aggregated platform stats and daily series."""
+
+    def test_stats_counts_and_series(self, client, super_admin_token, owner_token, test_member):
+        from app.core.cache import cache_clear
+
+        client.post(
+            "/api/v1/payments",
+            json={"member_id": str(test_member.id), "amount": "400.00", "payment_mode": "cash"},
+            headers={"Authorization": f"Bearer {owner_token}"},
+        )
+        cache_clear()
+        response = client.get(
+            "/api/v1/admin/stats?days=7",
+            headers={"Authorization": f"Bearer {super_admin_token}"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["gyms"]["total"] >= 1
+        assert data["members"]["total"] >= 1
+        assert data["users"]["owners"] >= 1
+        assert data["users"]["super_admins"] >= 1
+        assert data["revenue"]["this_month"] >= 400.0
+        assert len(data["daily"]) == 7
+        assert data["daily"][-1]["date"] == datetime.now().date().isoformat()
+        assert data["daily"][-1]["revenue"] >= 400.0
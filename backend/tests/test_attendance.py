@@ -5,7 +5,11 @@ Tests for attendance endpoints and services.
 import uuid
 
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# Test gyms have no timezone setting: rollups use settings.gym_default_timezone
+IST = ZoneInfo("Asia/Kolkata")
 
 
 def _mid(member) -> str:
@@ -48,6 +52,88 @@ class TestAttendanceCheckIn:
         )
         assert response.status_code == 201
 
+    def test_checkin_twice_rejected(self, client, owner_token, test_member):
+        """Second check-in without check-out is refused."""
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        payload = {"member_id": _mid(test_member)}
+        assert client.post("/api/v1/attendance/check-in", json=payload, headers=headers).status_code == 201
+        again = client.post("/api/v1/attendance/check-in", json=payload, headers=headers)
+        assert again.status_code == 400
+        assert "already checked in" in again.json()["detail"]
+
+    def test_open_session_conflict_is_atomic(self, db_session, test_gym, test_member):
+        """The unique open-session index rejects a second open row for today."""
+        from sqlalchemy import func, select
+
+        from app.attendance.service import AttendanceService
+        from app.models import Attendance
+
+        # An open session committed by another writer a moment ago
+        db_session.add(
+            Attendance(
+                gym_id=test_gym.id,
+                member_id=test_member.id,
+                check_in_time=datetime.now(timezone.utc),
+            )
+        )
+        db_session.commit()
+
+        service = AttendanceService(db_session)
+        with pytest.raises(ValueError, match="already checked in"):
+            service.check_in(test_gym.id, test_member.id)
+        batch = service.check_in_batch(test_gym.id, [test_member.id])
+        assert batch.results[0].status == "already_checked_in"
+
+        open_rows = db_session.execute(
+            select(func.count()).where(
+                Attendance.member_id == test_member.id, Attendance.check_out_time.is_(None)
+            )
+        ).scalar()
+        assert open_rows == 1
+
+    def test_session_left_open_yesterday_does_not_block_check_in(self, db_session, test_gym, test_member):
+        """A forgotten session from an earlier local day is auto-closed at check-in."""
+        from app.attendance.service import AttendanceService
+        from app.models import Attendance
+
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        stale = Attendance(gym_id=test_gym.id, member_id=test_member.id, check_in_time=yesterday)
+        db_session.add(stale)
+        db_session.commit()
+
+        attendance = AttendanceService(db_session).check_in(test_gym.id, test_member.id)
+        assert attendance.check_out_time is None
+
+        db_session.refresh(stale)
+        assert stale.auto_closed is True
+        assert stale.check_out_time == stale.check_in_time
+
+    def test_batch_checkin_reports_per_member(self, client, owner_token, test_member):
+        """Batch check-in returns one status per distinct member."""
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        unknown = str(uuid.uuid4())
+        response = client.post(
+            "/api/v1/attendance/check-in/batch",
+            json={"member_ids": [_mid(test_member), unknown, _mid(test_member)]},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["checked_in"] == 1
+        assert [(r["member_id"], r["status"]) for r in data["results"]] == [
+            (_mid(test_member), "checked_in"),
+            (unknown, "not_found"),
+        ]
+
+        again = client.post(
+            "/api/v1/attendance/check-in/batch",
+            json={"member_ids": [_mid(test_member)]},
+            headers=headers,
+        ).json()
+        assert again["results"][0]["status"] == "already_checked_in"
+        current = client.get("/api/v1/attendance/currently-in", headers=headers).json()
+        assert [r["member_id"] for r in current] == [_mid(test_member)]
+
 
 class TestAttendanceCheckOut:
     """Test check-out endpoint."""
@@ -149,3 +235,100 @@ class TestAttendanceReport:
             headers={"Authorization": f"Bearer {owner_token}"},
         )
         assert response.status_code == 200
+
+
+class TestAttendanceRollups:
+    """Hourly rollups behind summaries and the heatmap."""
+
+    def test_check_in_out_updates_rollups(self, client, owner_token, test_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        client.post("/api/v1/attendance/check-in", json={"member_id": _mid(test_member)}, headers=headers)
+        client.post(f"/api/v1/attendance/check-out/{_mid(test_member)}", headers=headers)
+        client.post("/api/v1/attendance/check-in", json={"member_id": _mid(test_member)}, headers=headers)
+
+        today = datetime.now(IST).date().isoformat()
+        summary = client.get(f"/api/v1/attendance/daily-summary?target_date={today}", headers=headers).json()
+        assert summary["total_check_ins"] == 2
+        assert summary["unique_members"] == 1
+        assert summary["avg_session_minutes"] is not None
+
+        heatmap = client.get(
+            f"/api/v1/attendance/heatmap?from_date={today}&to_date={today}", headers=headers
+        ).json()
+        assert heatmap["total_check_ins"] == 2
+        assert len(heatmap["by_hour"]) == 24
+        assert heatmap["peak_hour"] == datetime.now(IST).hour
+
+    def test_rebuild_matches_raw_attendance(self, client, owner_token, db_session, test_gym, test_member):
+        from app.models import Attendance
+
+        day = datetime(2026, 3, 2, tzinfo=IST)
+        for hour, minutes in ((6, 45), (6, None), (18, 30)):
+            check_in = day.replace(hour=hour).astimezone(timezone.utc)  # stored as UTC
+            db_session.add(Attendance(
+                gym_id=test_gym.id,
+                member_id=test_member.id,
+                check_in_time=check_in,
+                check_out_time=check_in + timedelta(minutes=minutes) if minutes else None,
+            ))
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {owner_token}"}
+
+        response = client.post(
+            "/api/v1/attendance/rollups/rebuild?from_date=2026-03-02&to_date=2026-03-02", headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["buckets_written"] == 2
+
+        heatmap = client.get(
+            "/api/v1/attendance/heatmap?from_date=2026-03-01&to_date=2026-03-03", headers=headers
+        ).json()
+        assert heatmap["by_hour"][6] == 2
+        assert heatmap["by_hour"][18] == 1
+        assert heatmap["peak_hour"] == 6
+        assert sum(c["unique_members"] for c in heatmap["cells"]) == 1
+        morning = next(c for c in heatmap["cells"] if c["hour"] == 6)
+        assert morning["avg_session_minutes"] == 45.0
+
+    def test_buckets_use_gym_local_day_and_hour(self, client, owner_token, db_session, test_gym, test_member):
+        """23:50 and 00:10 IST share a UTC day (18:20 / 18:40 UTC) but not a local one."""
+        from app.attendance import rollups
+        from app.models import Attendance
+
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        late = datetime(2026, 3, 2, 23, 50, tzinfo=IST).astimezone(timezone.utc)
+        early = datetime(2026, 3, 3, 0, 10, tzinfo=IST).astimezone(timezone.utc)
+        assert late.date() == early.date()
+        for check_in in (late, early):
+            db_session.add(Attendance(
+                gym_id=test_gym.id,
+                member_id=test_member.id,
+                check_in_time=check_in,
+                check_out_time=check_in + timedelta(minutes=5),
+            ))
+            rollups.record_check_in(
+                db_session, gym_id=test_gym.id, member_id=test_member.id, check_in_time=check_in
+            )
+        db_session.commit()
+
+        def cells():
+            heatmap = client.get(
+                "/api/v1/attendance/heatmap?from_date=2026-03-01&to_date=2026-03-04", headers=headers
+            ).json()
+            return [(c["date"], c["hour"], c["check_ins"], c["unique_members"]) for c in heatmap["cells"]]
+
+        expected = [("2026-03-02", 23, 1, 1), ("2026-03-03", 0, 1, 1)]
+        assert cells() == expected
+        summary = client.get("/api/v1/attendance/daily-summary?target_date=2026-03-03", headers=headers).json()
+        assert summary["unique_members"] == 1
+
+        # A rebuild over the local days agrees with the incremental counts
+        client.post("/api/v1/attendance/rollups/rebuild?from_date=2026-03-02&to_date=2026-03-03", headers=headers)
+        assert cells() == expected
+
+    def test_rebuild_requires_manager(self, client, staff_token):
+        response = client.post(
+            "/api/v1/attendance/rollups/rebuild?from_date=2026-03-02&to_date=2026-03-02",
+            headers={"Authorization": f"Bearer {staff_token}"},
+        )
+        assert response.status_code == 403
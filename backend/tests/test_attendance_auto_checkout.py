@@ -0,0 +1,72 @@
+"""
+Tests for the stale attendance auto-checkout sweeper.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.attendance.auto_checkout import run_attendance_auto_checkout
+from app.attendance.rollups import rebuild_rollups
+from app.models import Attendance, AttendanceHourlyRollup, JobRun, Member
+
+
+def _open_session(db_session, gym_id, member_id, at: datetime) -> Attendance:
+    row = Attendance(gym_id=gym_id, member_id=member_id, check_in_time=at)
+    db_session.add(row)
+    db_session.flush()
+    return row
+
+
+class TestAutoCheckout:
+    def test_closes_only_sessions_past_cutoff(self, db_session, test_gym, test_member):
+        now = datetime(2026, 3, 3, 12, 0, tzinfo=timezone.utc)
+        # One open session per member (idx_attendance_open is unique)
+        other = Member(gym_id=test_gym.id, name="Second Member", phone="9811100033", joined_date=now.date())
+        db_session.add(other)
+        stale = _open_session(db_session, test_gym.id, test_member.id, now - timedelta(hours=20))
+        fresh = _open_session(db_session, test_gym.id, other.id, now - timedelta(hours=2))
+        db_session.commit()
+
+        summary = run_attendance_auto_checkout(db_session, batch_size=1, now=now)
+        assert summary["closed"] == 1
+        assert summary["gyms_affected"] == 1
+
+        db_session.refresh(stale)
+        db_session.refresh(fresh)
+        assert stale.auto_closed is True
+        assert stale.check_out_time.replace(tzinfo=timezone.utc) == now - timedelta(hours=8)
+        assert fresh.check_out_time is None
+
+        run = db_session.execute(select(JobRun).where(JobRun.id == uuid.UUID(summary["run_id"]))).scalar_one()
+        assert run.status == "success"
+
+    def test_per_gym_cutoff_and_opt_out(self, db_session, test_gym, test_member):
+        now = datetime(2026, 3, 3, 12, 0, tzinfo=timezone.utc)
+        row = _open_session(db_session, test_gym.id, test_member.id, now - timedelta(hours=5))
+        test_gym.settings = {"auto_checkout_hours": 4}
+        db_session.commit()
+        assert run_attendance_auto_checkout(db_session, gym_id=test_gym.id, now=now)["closed"] == 1
+
+        db_session.refresh(row)
+        assert row.check_out_time.replace(tzinfo=timezone.utc) == now - timedelta(hours=1)
+
+        _open_session(db_session, test_gym.id, test_member.id, now - timedelta(days=3))
+        test_gym.settings = {"auto_checkout_hours": 0}
+        db_session.commit()
+        assert run_attendance_auto_checkout(db_session, gym_id=test_gym.id, now=now)["closed"] == 0
+
+    def test_auto_closed_sessions_excluded_from_durations(self, db_session, test_gym, test_member):
+        now = datetime(2026, 3, 3, 23, 0, tzinfo=timezone.utc)
+        _open_session(db_session, test_gym.id, test_member.id, now - timedelta(hours=16))
+        db_session.commit()
+        run_attendance_auto_checkout(db_session, now=now)
+
+        day = (now - timedelta(hours=16)).date()
+        rebuild_rollups(db_session, gym_id=test_gym.id, from_date=day, to_date=day)
+        bucket = db_session.execute(
+            select(AttendanceHourlyRollup).where(AttendanceHourlyRollup.gym_id == test_gym.id)
+        ).scalar_one()
+        assert bucket.check_ins == 1
+        assert bucket.sessions_closed == 0
@@ -0,0 +1,28 @@
+"""Smoke test: the benchmark generator and every scenario run at tiny scale."""
+
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app.models import Attendance, BiometricEvent, Gym, Member, Payment
+from benchmarks.generator import generate_dataset
+from benchmarks.scenarios import SCENARIOS, BenchContext
+
+
+def test_generator_and_scenarios(db_session):
+    today = date(2026, 3, 3)
+    gyms = generate_dataset(db_session, gyms=2, members=5, years=1, seed=7, today=today)
+    assert len(gyms) == 2
+    assert db_session.execute(select(func.count(Member.id)).where(Member.gym_id == gyms[0].gym_id)).scalar() == 5
+    assert db_session.execute(select(func.count(Payment.id))).scalar() >= 10
+    assert db_session.execute(select(func.count(Attendance.id))).scalar() > 0
+    assert db_session.execute(select(func.count(BiometricEvent.id))).scalar() > 0
+
+    # Same seed and slugs: the existing gyms are reused.
+    again = generate_dataset(db_session, gyms=2, members=5, years=1, seed=7, today=today)
+    assert [g.gym_id for g in again] == [g.gym_id for g in gyms]
+    assert db_session.execute(select(func.count(Gym.id)).where(Gym.slug.like("bench-7-%"))).scalar() == 2
+
+    ctx = BenchContext(gym=gyms[0], today=today)
+    for scenario in SCENARIOS:
+        scenario.run(db_session, ctx, 0)
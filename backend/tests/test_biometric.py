@@ -0,0 +1,446 @@
+"""
+Tests for biometric device ingest.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.biometric.schemas import BiometricEventIngestItem
+from app.biometric.stream import PunchBatcher
+from app.models import BiometricDevice
+from app.models.enums import DeviceVendor
+
+
+@pytest.fixture
+def test_device(db_session, test_gym) -> BiometricDevice:
+    device = BiometricDevice(
+        gym_id=test_gym.id,
+        name="Front turnstile",
+        vendor=DeviceVendor.ESSL,
+        external_device_id="essl-front-1",
+        timezone="Asia/Kolkata",
+    )
+    db_session.add(device)
+    db_session.commit()
+    db_session.refresh(device)
+    return device
+
+
+@pytest.fixture
+def coded_member(db_session, test_member):
+    test_member.member_code = "42"
+    db_session.commit()
+    return test_member
+
+
+def _punch(event_id: str, person: str, at: datetime, event_type: str = "unknown") -> dict:
+    return {
+        "external_event_id": event_id,
+        "person_identifier": person,
+        "event_time": at.isoformat(),
+        "event_type": event_type,
+    }
+
+
+class TestBiometricIngest:
+    def test_ingest_check_in_and_out_updates_rollups(self, client, owner_token, test_device, coded_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        day = datetime(2026, 3, 2, 6, 10, tzinfo=timezone.utc)
+        response = client.post(
+            "/api/v1/biometric/events/ingest",
+            json={
+                "external_device_id": test_device.external_device_id,
+                "events": [
+                    _punch("e1", "42", day),
+                    _punch("e2", "42", day + timedelta(minutes=50)),
+                    _punch("e3", "999", day + timedelta(minutes=5)),
+                ],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        summary = response.json()
+        assert summary["processed"] == 2
+        assert summary["conflicts"] == 1
+
+        heatmap = client.get(
+            "/api/v1/attendance/heatmap?from_date=2026-03-02&to_date=2026-03-02", headers=headers
+        ).json()
+        assert heatmap["by_hour"][11] == 1  # 06:10 UTC is 11:40 in the gym's timezone (IST)
+        assert heatmap["cells"][0]["avg_session_minutes"] == 50.0
+
+    def test_ingest_duplicate_event_id(self, client, owner_token, test_device, coded_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        payload = {
+            "external_device_id": test_device.external_device_id,
+            "events": [_punch("dup-1", "42", datetime(2026, 3, 2, 7, 0, tzinfo=timezone.utc), "check_in")],
+        }
+        assert client.post("/api/v1/biometric/events/ingest", json=payload, headers=headers).json()["processed"] == 1
+        again = client.post("/api/v1/biometric/events/ingest", json=payload, headers=headers).json()
+        assert again["duplicates"] == 1
+        assert again["processed"] == 0
+
+    def test_explicit_check_in_while_open_is_a_conflict(self, client, owner_token, test_device, coded_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        at = datetime(2026, 3, 2, 7, 0, tzinfo=timezone.utc)
+        payload = {
+            "external_device_id": test_device.external_device_id,
+            "events": [
+                _punch("in-1", "42", at, "check_in"),
+                _punch("in-2", "42", at + timedelta(minutes=30), "check_in"),
+            ],
+        }
+        summary = client.post("/api/v1/biometric/events/ingest", json=payload, headers=headers).json()
+        assert summary["processed"] == 1
+        assert summary["conflicts"] == 1
+
+    def test_check_in_after_session_left_open_yesterday(self, client, owner_token, test_device, coded_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        at = datetime(2026, 3, 2, 7, 0, tzinfo=timezone.utc)
+        payload = {
+            "external_device_id": test_device.external_device_id,
+            "events": [
+                _punch("in-1", "42", at, "check_in"),
+                _punch("in-2", "42", at + timedelta(days=1), "check_in"),
+            ],
+        }
+        summary = client.post("/api/v1/biometric/events/ingest", json=payload, headers=headers).json()
+        assert summary["processed"] == 2
+        assert summary["conflicts"] == 0
+
+    def test_ingest_accepts_gzip_body(self, client, owner_token, test_device, coded_member):
+        import gzip
+        import json
+
+        payload = {
+            "external_device_id": test_device.external_device_id,
+            "events": [_punch("gz-1", "42", datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc), "check_in")],
+        }
+        response = client.post(
+            "/api/v1/biometric/events/ingest",
+            content=gzip.compress(json.dumps(payload).encode()),
+            headers={
+                "Authorization": f"Bearer {owner_token}",
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["processed"] == 1
+
+    def test_device_batch_ingest_coalesces_devices(self, client, owner_token, test_device, coded_member):
+        token = client.post(
+            f"/api/v1/biometric/devices/{test_device.id}/token",
+            headers={"Authorization": f"Bearer {owner_token}"},
+        ).json()["ingest_token"]
+        response = client.post(
+            "/api/v1/biometric/events/ingest-device/batch",
+            json={
+                "batches": [
+                    {
+                        "external_device_id": test_device.external_device_id,
+                        "events": [_punch("b-1", "42", datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc))],
+                    },
+                    {
+                        "external_device_id": "not-registered",
+                        "events": [_punch("b-2", "42", datetime(2026, 3, 2, 9, 1, tzinfo=timezone.utc))],
+                    },
+                ]
+            },
+            headers={"X-Biometric-Token": token},
+        )
+        assert response.status_code == 200
+        known, unknown = response.json()["devices"]
+        assert known["processed"] == 1
+        assert known["error"] is None
+        assert unknown["failed"] == 1
+        assert unknown["error"] == "Device not found or inactive"
+
+
+class TestIdentityResolver:
+    def test_unknown_user_is_cached_until_mapping_upsert(self, db_session, test_gym, test_device, test_member):
+        from sqlalchemy import event
+
+        from app.biometric import resolver
+        from app.biometric.service import BiometricService
+
+        tenant = type("Tenant", (), {"gym_id": test_gym.id})()
+        lookup = dict(gym_id=test_gym.id, device_id=test_device.id, person_identifier="face-7")
+        assert resolver.resolve_member_id(db_session, **lookup) is None
+
+        statements = []
+        engine = db_session.get_bind().engine
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert resolver.resolve_member_id(db_session, **lookup) is None
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert statements == []
+
+        BiometricService(db_session).upsert_device_mapping(
+            tenant, device_id=test_device.id, member_id=test_member.id, device_user_id="face-7"
+        )
+        assert resolver.resolve_member_id(db_session, **lookup) == test_member.id
+
+    def test_deactivation_invalidates_member_code(self, db_session, test_gym, test_device, coded_member):
+        from app.biometric import resolver
+        from app.members.service import MemberService
+
+        lookup = dict(gym_id=test_gym.id, device_id=test_device.id, person_identifier="42")
+        assert resolver.resolve_member_id(db_session, **lookup) == coded_member.id
+        MemberService(db_session).deactivate_member(coded_member)
+        assert resolver.resolve_member_id(db_session, **lookup) is None
+
+    def test_rotated_token_stops_authenticating(self, client, owner_token, test_device, coded_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        old = client.post(f"/api/v1/biometric/devices/{test_device.id}/token", headers=headers).json()["ingest_token"]
+        payload = {
+            "external_device_id": test_device.external_device_id,
+            "events": [_punch("t-1", "42", datetime(2026, 3, 2, 11, 0, tzinfo=timezone.utc))],
+        }
+        url = "/api/v1/biometric/events/ingest-device"
+        assert client.post(url, json=payload, headers={"X-Biometric-Token": old}).status_code == 200
+
+        client.post(f"/api/v1/biometric/devices/{test_device.id}/token", headers=headers)
+        assert client.post(url, json=payload, headers={"X-Biometric-Token": old}).status_code == 401
+
+    def test_auth_cache_expires_within_seconds(self, client, owner_token, db_session, test_device, monkeypatch):
+        from types import SimpleNamespace
+
+        from app.biometric import resolver
+        from app.core.config import settings
+
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        token = client.post(f"/api/v1/biometric/devices/{test_device.id}/token", headers=headers).json()["ingest_token"]
+        payload = {
+            "external_device_id": test_device.external_device_id,
+            "events": [_punch("w-1", "42", datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc))],
+        }
+        url = "/api/v1/biometric/events/ingest-device"
+        clock = [1000.0]
+        monkeypatch.setattr(resolver, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+        assert client.post(url, json=payload, headers={"X-Biometric-Token": token}).status_code == 200
+
+        # Deactivated by another worker: this process's invalidate_* never runs.
+        test_device.is_active = False
+        db_session.commit()
+        clock[0] += settings.biometric_auth_cache_ttl_seconds + 1
+        assert client.post(url, json=payload, headers={"X-Biometric-Token": token}).status_code == 401
+
+
+class TestFaceIndex:
+    @pytest.fixture(autouse=True)
+    def index_dir(self, tmp_path, monkeypatch):
+        from app.biometric.face_index import face_indexes
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "face_index_dir", str(tmp_path))
+        face_indexes.clear()
+        yield tmp_path
+        face_indexes.clear()
+
+    @staticmethod
+    def _template(seed: int, noise: float = 0.0) -> str:
+        import base64
+
+        import numpy as np
+
+        vector = np.random.default_rng(seed).standard_normal(512).astype("<f4")
+        if noise:
+            vector += np.random.default_rng(seed + 1000).standard_normal(512).astype("<f4") * noise
+        return base64.b64encode(vector.tobytes()).decode()
+
+    def test_enroll_then_identify(self, client, owner_token, db_session, test_gym, test_member, index_dir):
+        from datetime import date
+
+        from app.models import Member
+
+        other = Member(
+            gym_id=test_gym.id, name="Other Member", phone="9999999955", joined_date=date.today(), is_active=True
+        )
+        db_session.add(other)
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        for member_id, seed in ((test_member.id, 1), (other.id, 2)):
+            response = client.post(
+                "/api/v1/biometric/faces",
+                json={"member_id": str(member_id), "template_b64": self._template(seed), "enrollment_quality": 0.9},
+                headers=headers,
+            )
+            assert response.status_code == 201
+
+        result = client.post(
+            "/api/v1/biometric/faces/identify",
+            json={"template_b64": self._template(2, noise=0.3)},
+            headers=headers,
+        ).json()
+        assert result["templates_searched"] == 2
+        assert [m["member_id"] for m in result["matches"]] == [str(other.id)]
+        assert (index_dir / f"{test_gym.id}.npy").exists()
+
+        stranger = client.post(
+            "/api/v1/biometric/faces/identify",
+            json={"template_b64": self._template(3)},
+            headers=headers,
+        ).json()
+        assert stranger["matches"] == []
+
+    def test_replacing_template_updates_loaded_index(self, client, owner_token, test_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        enroll = {"member_id": str(test_member.id), "template_b64": self._template(5)}
+        client.post("/api/v1/biometric/faces", json=enroll, headers=headers)
+        identify = lambda seed: client.post(  # noqa: E731
+            "/api/v1/biometric/faces/identify", json={"template_b64": self._template(seed)}, headers=headers
+        ).json()
+        assert len(identify(5)["matches"]) == 1
+
+        replaced = client.post(
+            "/api/v1/biometric/faces", json={**enroll, "template_b64": self._template(6)}, headers=headers
+        ).json()
+        assert replaced["replaced"] == 1
+        result = identify(5)
+        assert result["templates_searched"] == 1
+        assert result["matches"] == []
+        assert len(identify(6)["matches"]) == 1
+
+    def test_concurrent_applies_keep_both_rows(self, monkeypatch):
+        import base64
+        import threading
+
+        import numpy as np
+
+        from app.biometric import face_index
+        from app.models import BiometricFaceEncoding
+
+        gym_id = uuid.uuid4()
+        registry = face_index.FaceIndexRegistry()
+        registry._put(
+            face_index.GymFaceIndex(
+                gym_id, np.empty((0, 512), dtype=np.float32), [], [], np.empty(0, dtype=np.float32), ""
+            )
+        )
+        encodings = [
+            BiometricFaceEncoding(
+                id=uuid.uuid4(),
+                member_id=uuid.uuid4(),
+                face_template=base64.b64decode(self._template(seed)),
+                face_template_format="float32",
+                is_primary=True,
+            )
+            for seed in (7, 8)
+        ]
+
+        first_inside, second_done = threading.Event(), threading.Event()
+
+        def fingerprint(db, gym):
+            # The first apply pauses mid read-modify-write; the second runs meanwhile if it can
+            if not first_inside.is_set():
+                first_inside.set()
+                second_done.wait(timeout=0.5)
+            return "fp"
+
+        monkeypatch.setattr(face_index, "_fingerprint", fingerprint)
+        first, second = (
+            threading.Thread(target=registry.apply, args=(None, gym_id), kwargs={"remove": set(), "add": [encoding]})
+            for encoding in encodings
+        )
+        first.start()
+        first_inside.wait()
+        second.start()
+        second.join(timeout=0.2)
+        if not second.is_alive():
+            second_done.set()
+        first.join()
+        second.join()
+
+        index = registry._indexes[gym_id]
+        assert sorted(map(str, index.encoding_ids)) == sorted(str(e.id) for e in encodings)
+
+    def test_rejects_non_vector_template(self, client, owner_token, test_member):
+        import base64
+
+        response = client.post(
+            "/api/v1/biometric/faces",
+            json={"member_id": str(test_member.id), "template_b64": base64.b64encode(b"jp2").decode()},
+            headers={"Authorization": f"Bearer {owner_token}"},
+        )
+        assert response.status_code == 400
+
+    def test_search_thresholds_follow_enrollment_quality(self):
+        import numpy as np
+
+        from app.biometric.face_index import GymFaceIndex, match_threshold
+
+        rows = np.eye(2, 512, dtype=np.float32)
+        probe = np.zeros(512, dtype=np.float32)
+        probe[:3] = [0.65, 0.65, np.sqrt(1 - 2 * 0.65**2)]  # similarity 0.65 to both rows
+        members = [uuid.uuid4(), uuid.uuid4()]
+        index = GymFaceIndex(
+            uuid.uuid4(),
+            rows,
+            [uuid.uuid4(), uuid.uuid4()],
+            members,
+            np.array([match_threshold(1.0), match_threshold(0.0)], dtype=np.float32),
+            "",
+        )
+        assert match_threshold(0.0) > 0.65 > match_threshold(1.0)
+        assert [m.member_id for m in index.search(probe, k=2)] == [members[0]]
+
+
+class TestBiometricStream:
+    @pytest.fixture
+    def stream_token(self, client, owner_token, test_device, db_session, monkeypatch):
+        from sqlalchemy.orm import sessionmaker
+
+        from app.biometric.stream import punch_batcher
+
+        monkeypatch.setattr(punch_batcher, "session_factory", sessionmaker(bind=db_session.connection()))
+        return client.post(
+            f"/api/v1/biometric/devices/{test_device.id}/token",
+            headers={"Authorization": f"Bearer {owner_token}"},
+        ).json()["ingest_token"]
+
+    def test_stream_queues_then_commits(self, client, owner_token, stream_token, test_device, coded_member):
+        # The handler closes its (here: the shared test) session once authenticated
+        external_device_id = test_device.external_device_id
+        with client.websocket_connect(
+            "/api/v1/biometric/events/stream", headers={"X-Biometric-Token": stream_token}
+        ) as ws:
+            ws.send_json({
+                "seq": 1,
+                "external_device_id": external_device_id,
+                "events": [_punch("ws-1", "42", datetime(2026, 3, 2, 10, 0, tzinfo=timezone.utc), "check_in")],
+            })
+            assert ws.receive_json() == {"seq": 1, "status": "queued", "count": 1}
+            assert ws.receive_json() == {"seq": 1, "status": "committed", "count": 1}
+
+            ws.send_json({"seq": 2, "external_device_id": external_device_id, "events": []})
+            assert ws.receive_json()["status"] == "invalid"
+
+        heatmap = client.get(
+            "/api/v1/attendance/heatmap?from_date=2026-03-02&to_date=2026-03-02",
+            headers={"Authorization": f"Bearer {owner_token}"},
+        ).json()
+        assert heatmap["by_hour"][15] == 1  # 10:00 UTC, 15:30 IST
+
+    def test_stream_rejects_bad_token(self, client, stream_token):
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect(
+                "/api/v1/biometric/events/stream", headers={"X-Biometric-Token": "wrong"}
+            ) as ws:
+                ws.receive_json()
+
+    def test_full_queue_refuses_submission(self):
+        batcher = PunchBatcher(max_queue=1)
+        events = [
+            BiometricEventIngestItem.model_validate(
+                _punch("q-1", "42", datetime(2026, 3, 2, 10, 0, tzinfo=timezone.utc))
+            )
+        ]
+        assert batcher.submit(uuid.uuid4(), "dev", events) is True
+        assert batcher.submit(uuid.uuid4(), "dev", events) is False
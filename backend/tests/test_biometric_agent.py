@@ -0,0 +1,444 @@
+"""
+Tests for the gym-PC biometric agent (scripts/biometric_agent.py) against a fake ZK device.
+"""
+
+import gzip
+import importlib.util
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+_AGENT_PATH = Path(__file__).resolve().parents[1] / "scripts" / "biometric_agent.py"
+_spec = importlib.util.spec_from_file_location("biometric_agent", _AGENT_PATH)
+agent = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = agent  # dataclasses resolve annotations via sys.modules
+_spec.loader.exec_module(agent)
+
+
+class FakeZK:
+    """Minimal stand-in for pyzk's ZK/connection objects."""
+
+    def __init__(self):
+        self.logs: list[SimpleNamespace] = []
+        self.records = 0
+        self.downloads = 0
+        self.downloaded_records = 0
+
+    def punch(self, user_id: str, at: datetime) -> None:
+        self.logs.append(SimpleNamespace(user_id=user_id, timestamp=at, punch=0, status=1))
+
+    def connect(self):
+        return self
+
+    def read_sizes(self):
+        self.records = len(self.logs)
+
+    def get_attendance(self):
+        self.downloads += 1
+        self.downloaded_records += len(self.logs)
+        return list(self.logs)
+
+    def disable_device(self):
+        pass
+
+    def enable_device(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+class FakeServer:
+    """Records coalesced uploads and answers like /events/ingest-device/batch."""
+
+    def __init__(self):
+        self.calls: list[dict[str, list[dict]]] = []
+
+    def __call__(self, batches):
+        self.calls.append(batches)
+        return {
+            "devices": [
+                {"external_device_id": device_id, "total_received": len(events), "error": None}
+                for device_id, events in batches.items()
+            ]
+        }
+
+    def events(self, device_id: str) -> list[dict]:
+        return [ev for call in self.calls for ev in call.get(device_id, [])]
+
+
+class AgentHarness:
+    def __init__(self, tmp_path, device_ids=("essl-front-1",)):
+        self.config = agent.Config(
+            devices=[agent.DeviceConfig(device_ip="127.0.0.1", external_device_id=d) for d in device_ids],
+            api_base="http://test",
+            biometric_token="t",
+            batch_size=2,
+            state_path=tmp_path / "state.json",
+            spool_path=tmp_path / "spool.db",
+            status_port=0,
+        )
+        self.devices = {d: FakeZK() for d in device_ids}
+        self.state = self.load_state()
+        self.spool = agent.Spool(self.config.spool_path)
+        self.server = FakeServer()
+
+    def load_state(self):
+        return agent.AgentState(self.config.state_path, list(self.devices))
+
+    def pull(self, device_id="essl-front-1", state=None):
+        device = next(d for d in self.config.devices if d.external_device_id == device_id)
+        return agent.pull_once(device, state or self.state, self.spool, zk_factory=lambda _d: self.devices[device_id])
+
+    def drain(self, push=None, stats=None):
+        return agent.drain(self.config, self.spool, push or self.server, stats)
+
+
+@pytest.fixture
+def harness(tmp_path):
+    h = AgentHarness(tmp_path)
+    yield h
+    h.spool.close()
+
+
+START = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+
+
+class TestIncrementalSync:
+    def test_steady_state_only_ships_new_punches(self, harness):
+        device = harness.devices["essl-front-1"]
+        for i in range(5):
+            device.punch(str(i), START + timedelta(minutes=i))
+
+        assert harness.pull() == 5
+        assert harness.drain() == 5
+        assert [len(call["essl-front-1"]) for call in harness.server.calls] == [2, 2, 1]
+
+        # No new records: the log is not downloaded at all.
+        assert harness.pull() == 0
+        assert device.downloads == 1
+
+        device.punch("9", START + timedelta(hours=1))
+        harness.server.calls.clear()
+        assert harness.pull() == 1
+        harness.drain()
+        assert harness.server.events("essl-front-1")[0]["person_identifier"] == "9"
+        # One new punch still downloads the whole log (no ranged read in pyzk);
+        # only conversion and upload are incremental.
+        assert device.downloads == 2
+        assert device.downloaded_records == 5 + 6
+
+    def test_state_survives_restart_and_window_is_bounded(self, harness):
+        device = harness.devices["essl-front-1"]
+        device.punch("1", START)
+        device.punch("2", START + timedelta(hours=2))
+        harness.pull()
+
+        restarted = harness.load_state().device("essl-front-1")
+        assert restarted["last_seen_ts"] == (START + timedelta(hours=2)).timestamp()
+        # The 06:00 punch is outside the dedupe window and no longer tracked.
+        assert len(restarted["recent_event_ids"]) == 1
+
+        # A late-arriving punch inside the window still ships; the old one does not.
+        device.punch("3", START + timedelta(hours=2, minutes=-5))
+        assert harness.pull(state=harness.load_state()) == 1
+
+    def test_legacy_single_device_state_is_adopted(self, harness):
+        harness.config.state_path.write_text(json.dumps({
+            "last_seen_ts": 1000.0, "last_record_count": 7, "sent_event_ids": ["a", "b"],
+        }))
+        state = harness.load_state().device("essl-front-1")
+        assert state["last_seen_ts"] == 1000.0
+        assert state["last_record_count"] == 7
+
+
+class TestSpoolAndUpload:
+    def test_spooled_events_survive_failed_upload(self, harness):
+        device = harness.devices["essl-front-1"]
+        for i in range(3):
+            device.punch(str(i), START + timedelta(minutes=i))
+        harness.pull()
+
+        def failing_push(_batches):
+            raise httpx.ConnectError("offline")
+
+        with pytest.raises(httpx.ConnectError):
+            harness.drain(push=failing_push)
+
+        # Restarted agent: nothing new on the device, backlog drains from the spool.
+        harness.spool.close()
+        harness.spool = agent.Spool(harness.config.spool_path)
+        assert len(harness.spool) == 3
+        assert harness.pull(state=harness.load_state()) == 0
+        assert harness.drain() == 3
+        assert device.downloads == 1
+
+    def test_invalid_batch_is_dead_lettered(self, harness):
+        harness.devices["essl-front-1"].punch("1", START)
+        harness.pull()
+
+        def rejecting_push(_batches):
+            request = httpx.Request("POST", "http://test")
+            raise httpx.HTTPStatusError("bad", request=request, response=httpx.Response(422, request=request))
+
+        assert harness.drain(push=rejecting_push) == 0
+        assert len(harness.spool) == 0
+        assert harness.spool.conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0] == 1
+
+    def test_uploader_gzips_and_retries(self, harness):
+        bodies: list[dict] = []
+        statuses = iter([503, 200])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path.endswith("/events/ingest-device/batch")
+            assert request.headers["Content-Encoding"] == "gzip"
+            assert request.headers["X-Biometric-Token"] == "t"
+            bodies.append(json.loads(gzip.decompress(request.content)))
+            return httpx.Response(next(statuses), json={"devices": []})
+
+        delays: list[float] = []
+        uploader = agent.Uploader(
+            harness.config, client=httpx.Client(transport=httpx.MockTransport(handler)), sleep=delays.append
+        )
+        event = agent._attendance_to_event(SimpleNamespace(user_id="7", timestamp=START, punch=0, status=1))
+        assert uploader.push({"essl-front-1": [event]}) == {"devices": []}
+        assert len(bodies) == 2
+        assert len(delays) == 1
+        assert bodies[0]["batches"][0]["events"][0]["person_identifier"] == "7"
+        uploader.close()
+
+
+class FakeStream:
+    """WebSocket connection to /events/stream; reply(message) returns the server's frames."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.sent: list[dict] = []
+        self.inbox: list[str] = []
+        self.closed = False
+
+    def send(self, text: str) -> None:
+        message = json.loads(text)
+        self.sent.append(message)
+        self.inbox.extend(json.dumps(frame) for frame in self.reply(message))
+
+    def recv(self, timeout: float) -> str:
+        if not self.inbox:
+            raise TimeoutError("no frame")
+        return self.inbox.pop(0)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _committed(message):
+    count = len(message["events"])
+    return [{"seq": message["seq"], "status": "queued", "count": count},
+            {"seq": message["seq"], "status": "committed", "count": count}]
+
+
+class TestStreamUpload:
+    def test_spool_is_acked_after_commit(self, harness):
+        for i in range(3):
+            harness.devices["essl-front-1"].punch(str(i), START + timedelta(minutes=i))
+        harness.pull()
+        stream = FakeStream(_committed)
+        uploader = agent.StreamUploader(harness.config, fallback=harness.server, connect=lambda: stream)
+
+        assert harness.drain(push=uploader.push) == 3
+        assert [len(m["events"]) for m in stream.sent] == [2, 1]
+        assert harness.server.calls == []
+        assert len(harness.spool) == 0
+
+    def test_queued_without_commit_falls_back_to_http(self, harness):
+        harness.devices["essl-front-1"].punch("1", START)
+        harness.pull()
+        stream = FakeStream(lambda m: [{"seq": m["seq"], "status": "queued", "count": 1}])
+        clock = [0.0]
+        uploader = agent.StreamUploader(
+            harness.config, fallback=harness.server, connect=lambda: stream, clock=lambda: clock[0]
+        )
+
+        assert harness.drain(push=uploader.push) == 1
+        assert len(harness.server.events("essl-front-1")) == 1
+        assert stream.closed
+
+        # Busy server: HTTP until the retry interval has passed, then the stream again
+        harness.devices["essl-front-1"].punch("2", START + timedelta(minutes=1))
+        harness.pull()
+        stream = FakeStream(_committed)
+        assert harness.drain(push=uploader.push) == 1
+        assert stream.sent == []
+        clock[0] += agent.STREAM_RETRY_SECONDS
+        harness.devices["essl-front-1"].punch("3", START + timedelta(minutes=2))
+        harness.pull()
+        assert harness.drain(push=uploader.push) == 1
+        assert len(stream.sent) == 1
+
+    def test_rejected_device_is_dead_lettered(self, harness):
+        harness.devices["essl-front-1"].punch("1", START)
+        harness.pull()
+        stream = FakeStream(
+            lambda m: [{"seq": m["seq"], "status": "failed", "error": "Device not found or inactive", "count": 1}]
+        )
+        uploader = agent.StreamUploader(harness.config, fallback=harness.server, connect=lambda: stream)
+
+        assert harness.drain(push=uploader.push) == 0
+        assert harness.server.calls == []
+        assert harness.spool.conn.execute("SELECT reason FROM dead_letter").fetchall() == [
+            ("Device not found or inactive",)
+        ]
+
+    def test_uploads_through_the_stream_endpoint(
+        self, harness, client, owner_token, db_session, test_gym, test_member, monkeypatch
+    ):
+        from sqlalchemy import select
+        from sqlalchemy.orm import sessionmaker
+
+        from app.biometric.stream import punch_batcher
+        from app.models import Attendance, BiometricDevice
+        from app.models.enums import DeviceVendor
+
+        device = BiometricDevice(
+            gym_id=test_gym.id, name="Front", vendor=DeviceVendor.ESSL, external_device_id="essl-front-1"
+        )
+        db_session.add(device)
+        test_member.member_code = "42"
+        db_session.commit()
+        # The stream handler closes its (here: the shared test) session once authenticated
+        device_id, member_id = device.id, test_member.id
+        token = client.post(
+            f"/api/v1/biometric/devices/{device_id}/token", headers={"Authorization": f"Bearer {owner_token}"}
+        ).json()["ingest_token"]
+        monkeypatch.setattr(punch_batcher, "session_factory", sessionmaker(bind=db_session.connection()))
+
+        class Connection:
+            """websockets' sync client API over the test client's WebSocket session."""
+
+            def __init__(self):
+                self.context = client.websocket_connect(
+                    "/api/v1/biometric/events/stream", headers={"X-Biometric-Token": token}
+                )
+                self.ws = self.context.__enter__()
+
+            def send(self, text):
+                self.ws.send_text(text)
+
+            def recv(self, timeout):
+                return self.ws.receive_text()
+
+            def close(self):
+                self.context.__exit__(None, None, None)
+
+        harness.devices["essl-front-1"].punch("42", START)
+        harness.pull()
+        uploader = agent.StreamUploader(harness.config, fallback=harness.server, connect=Connection)
+        try:
+            assert harness.drain(push=uploader.push) == 1
+        finally:
+            uploader.close()
+
+        assert harness.server.calls == []
+        assert db_session.execute(select(Attendance.member_id)).scalars().all() == [member_id]
+
+
+class TestMultiDevice:
+    @pytest.fixture
+    def multi(self, tmp_path):
+        h = AgentHarness(tmp_path, device_ids=("front-1", "front-2"))
+        h.config.batch_size = 10
+        yield h
+        h.spool.close()
+
+    def test_devices_are_coalesced_into_one_call(self, multi):
+        multi.devices["front-1"].punch("1", START)
+        multi.devices["front-2"].punch("1", START)  # same user/second on another device
+        multi.devices["front-2"].punch("2", START + timedelta(minutes=1))
+        multi.pull("front-1")
+        multi.pull("front-2")
+
+        stats = {d: agent.DeviceStats() for d in multi.devices}
+        assert multi.drain(stats=stats) == 3
+        assert len(multi.server.calls) == 1
+        assert {d: len(evs) for d, evs in multi.server.calls[0].items()} == {"front-1": 1, "front-2": 2}
+        assert stats["front-2"].uploads_last_minute() == 2
+
+    def test_unknown_device_only_dead_letters_its_events(self, multi):
+        multi.devices["front-1"].punch("1", START)
+        multi.devices["front-2"].punch("2", START)
+        multi.pull("front-1")
+        multi.pull("front-2")
+
+        def push(batches):
+            return {"devices": [
+                {"external_device_id": "front-1", "error": None},
+                {"external_device_id": "front-2", "error": "Device not found or inactive"},
+            ]}
+
+        assert multi.drain(push=push) == 1
+        assert len(multi.spool) == 0
+        assert multi.spool.conn.execute(
+            "SELECT external_device_id FROM dead_letter"
+        ).fetchall() == [("front-2",)]
+
+    def test_device_missing_from_response_is_dead_lettered(self, multi):
+        multi.devices["front-1"].punch("1", START)
+        multi.devices["front-2"].punch("2", START)
+        multi.pull("front-1")
+        multi.pull("front-2")
+        calls = []
+
+        def push(batches):
+            calls.append(batches)
+            return {"devices": [{"external_device_id": "front-1", "error": None}]}
+
+        assert multi.drain(push=push) == 1
+        assert len(calls) == 1  # not re-sent in a loop
+        assert len(multi.spool) == 0
+        assert multi.spool.conn.execute(
+            "SELECT external_device_id, reason FROM dead_letter"
+        ).fetchall() == [("front-2", "missing from server response")]
+
+    def test_pollers_run_concurrently_and_status_endpoint_reports(self, multi):
+        import threading
+
+        for device_id in multi.devices:
+            multi.devices[device_id].punch("1", START)
+        stats = {d: agent.DeviceStats() for d in multi.devices}
+        wake, stop = threading.Event(), threading.Event()
+        threads = [
+            threading.Thread(
+                target=agent.poll_device,
+                args=(multi.config, device, multi.state, multi.spool, stats[device.external_device_id], wake, stop),
+                kwargs={"zk_factory": lambda d: multi.devices[d.external_device_id]},
+            )
+            for device in multi.config.devices
+        ]
+        for t in threads:
+            t.start()
+        assert wake.wait(5)
+        for _ in range(100):
+            if all(s.last_success_at for s in stats.values()):
+                break
+            stop.wait(0.01)
+        stop.set()
+        for t in threads:
+            t.join(5)
+        assert len(multi.spool) == 2
+
+        server = agent.start_status_server(
+            0, lambda: agent.status_snapshot(multi.config, multi.state, multi.spool, stats)
+        )
+        try:
+            port = server.server_address[1]
+            data = httpx.get(f"http://127.0.0.1:{port}/status").json()
+        finally:
+            server.shutdown()
+        assert data["pending_total"] == 2
+        assert [d["pulled_total"] for d in data["devices"]] == [1, 1]
+        assert all(d["lag_seconds"] is not None for d in data["devices"])
@@ -9,3 +9,55 @@ def test_cache_ttl():
     assert cache_get("k") == {"a": 1}
     cache_clear()
     assert cache_get("k") is None
+
+
+def test_get_or_load_serves_stale_while_refreshing():
+    import time
+
+    from app.core.cache import cache_get_or_load
+
+    cache_clear()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert cache_get_or_load("swr", loader, ttl_seconds=0, stale_seconds=60) == 1
+    # Expired but inside the stale window: old value now, refresh in background.
+    assert cache_get_or_load("swr", loader, ttl_seconds=0, stale_seconds=60) == 1
+    for _ in range(50):
+        if len(calls) == 2:
+            break
+        time.sleep(0.01)
+    assert len(calls) == 2
+    cache_clear()
+
+
+def test_dashboard_hit_returns_cached_bytes(client, owner_token, test_gym, query_counter):
+    cache_clear()
+    headers = {"Authorization": f"Bearer {owner_token}"}
+    first = client.get("/api/v1/reports/dashboard", headers=headers)
+    assert first.status_code == 200
+    assert cache_get(f"dashboard:{test_gym.id}:{first.headers['etag']}") == first.content
+
+    with query_counter() as counter:
+        second = client.get("/api/v1/reports/dashboard", headers=headers)
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+    # Auth only; the stats come from the cache
+    assert not any("FROM memberships" in statement for statement in counter.statements)
+    cache_clear()
+
+
+def test_json_bytes_encodes_like_jsonable_encoder():
+    import uuid
+    from datetime import date
+    from decimal import Decimal
+
+    from app.core.responses import json_bytes
+
+    member_id = uuid.uuid4()
+    assert json_bytes(
+        {"id": member_id, "day": date(2024, 1, 31), "whole": Decimal("1500"), "part": Decimal("12.50")}
+    ) == f'{{"id":"{member_id}","day":"2024-01-31","whole":1500,"part":12.5}}'.encode()
@@ -0,0 +1,147 @@
+"""
+Response compression (app.core.compression) on a small app of its own.
+"""
+
+import asyncio
+import gzip
+import zlib
+
+import brotli
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionLevels, CompressionMiddleware, choose_encoding
+
+ROWS = [{"id": n, "name": f"Member {n:04d}", "phone": f"98{n:08d}"} for n in range(200)]
+
+
+def _app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/members")
+    def members():
+        return ROWS
+
+    @app.get("/small")
+    def small():
+        return {"status": "ok"}
+
+    @app.get("/photo")
+    def photo():
+        return Response(b"\xff\xd8" + b"\x00" * 4000, media_type="image/jpeg")
+
+    @app.get("/tagged")
+    def tagged():
+        return Response(b"x" * 4000, media_type="text/plain", headers={"ETag": '"abc"'})
+
+    @app.get("/export")
+    def export():
+        def lines():
+            for n in range(50):
+                yield f"{n},Member {n:04d},98{n:08d}\n".encode() * 20
+        return StreamingResponse(lines(), media_type="text/csv")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, **options)
+    return app
+
+
+@pytest.fixture
+def client():
+    # Raw bodies: httpx would otherwise decode them
+    with TestClient(_app(), headers={"Accept-Encoding": "identity"}) as client:
+        yield client
+
+
+def _get(client, path: str, accept: str):
+    return client.get(path, headers={"Accept-Encoding": accept})
+
+
+class TestCompressionMiddleware:
+    def test_gzip_json_over_threshold(self, client):
+        response = client.get("/members", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json() == ROWS
+
+    def test_prefers_brotli(self, client):
+        with client.stream("GET", "/members", headers={"Accept-Encoding": "gzip, br"}) as response:
+            raw = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == "br"
+        assert int(response.headers["content-length"]) == len(raw)
+        assert brotli.decompress(raw).startswith(b'[{"id":0')
+
+    def test_small_and_binary_bodies_pass_through(self, client):
+        assert "content-encoding" not in _get(client, "/small", "gzip, br").headers
+        photo = _get(client, "/photo", "gzip, br")
+        assert "content-encoding" not in photo.headers
+        assert len(photo.content) == 4002
+
+    def test_identity_only_client(self, client):
+        response = _get(client, "/members", "identity")
+        assert "content-encoding" not in response.headers
+
+    def test_strong_etag_becomes_weak(self, client):
+        assert _get(client, "/tagged", "gzip").headers["etag"] == 'W/"abc"'
+
+    def test_streaming_is_compressed_per_chunk(self):
+        app = _app()
+        messages = []
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/export",
+            "raw_path": b"/export",
+            "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+        }
+
+        requested = []
+
+        async def receive():
+            if requested:
+                await asyncio.Event().wait()  # the client never disconnects
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(app(scope, receive, send))
+
+        start, *bodies = messages
+        headers = dict(start["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        # Flushed as it goes: each chunk decodes on its own, in order
+        assert len([body for body in bodies if body["body"]]) > 1
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first = decoder.decompress(bodies[0]["body"])
+        assert first.startswith(b"0,Member 0000")
+        text = first + b"".join(decoder.decompress(body["body"]) for body in bodies[1:])
+        assert text.count(b"\n") == 50 * 20
+
+    def test_route_level(self):
+        levels = {"GET /members": CompressionLevels(gzip=1, brotli=1)}
+        with TestClient(_app(route_levels=levels), headers={"Accept-Encoding": "identity"}) as fast:
+            with fast.stream("GET", "/members", headers={"Accept-Encoding": "gzip"}) as response:
+                raw = b"".join(response.iter_raw())
+        assert raw[:2] == b"\x1f\x8b"
+        assert len(raw) > len(gzip.compress(response_body := gzip.decompress(raw), compresslevel=9))
+        assert response_body.startswith(b'[{"id":0')
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0, identity", None),
+        ("", None),
+    ],
+)
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
@@ -0,0 +1,151 @@
+"""
+Conditional GETs (ETag / Last-Modified / 304) driven by per-gym change counters.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_clear
+from app.core.change_counters import gym_versions, mark_changed
+from app.member_portal.service import create_member_access_token
+from app.models import GymChangeCounter, Member, Membership
+from app.models.enums import MembershipStatus
+
+
+def _auth(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestChangeCounters:
+    def test_commit_bumps_written_scopes(self, db_session, test_gym, test_member):
+        before = gym_versions(db_session, test_gym.id, ("members", "memberships"))
+        test_member.name = "Renamed Member"
+        db_session.commit()
+
+        after = gym_versions(db_session, test_gym.id, ("members", "memberships"))
+        assert after["members"][0] == before["members"][0] + 1
+        assert "memberships" not in after
+
+    def test_rollback_discards_pending_bumps(self, db_session, test_gym, test_member):
+        before = gym_versions(db_session, test_gym.id, ("members",))
+        # Savepoint-joined session: its rollback leaves the fixtures in place
+        with Session(bind=db_session.connection(), join_transaction_mode="create_savepoint") as other:
+            other.get(Member, test_member.id).name = "Never Saved"
+            other.flush()
+            other.rollback()
+            other.commit()
+
+        assert gym_versions(db_session, test_gym.id, ("members",)) == before
+
+    def test_mark_changed_for_bulk_statements(self, db_session, test_gym):
+        mark_changed(db_session, test_gym.id, "attendance")
+        db_session.commit()
+
+        row = db_session.execute(
+            select(GymChangeCounter).where(
+                GymChangeCounter.gym_id == test_gym.id, GymChangeCounter.scope == "attendance"
+            )
+        ).scalar_one()
+        assert row.version == 1
+
+
+class TestConditionalGet:
+    def test_dashboard_304_until_a_write(self, client, owner_token, test_gym, query_counter):
+        cache_clear()
+        first = client.get("/api/v1/reports/dashboard", headers=_auth(owner_token))
+        assert first.status_code == 200
+        members_before = first.json()["total_members"]
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+        assert "last-modified" in first.headers
+
+        with query_counter() as counter:
+            again = client.get(
+                "/api/v1/reports/dashboard", headers={**_auth(owner_token), "If-None-Match": etag}
+            )
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        assert not any("FROM memberships" in statement for statement in counter.statements)
+
+        created = client.post(
+            "/api/v1/members", json={"name": "New Joiner", "phone": "9811100011"}, headers=_auth(owner_token)
+        )
+        assert created.status_code == 201
+        changed = client.get(
+            "/api/v1/reports/dashboard", headers={**_auth(owner_token), "If-None-Match": etag}
+        )
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        # Fresh stats under the new ETag, not the 60 s cached body
+        assert changed.json()["total_members"] == members_before + 1
+        cache_clear()
+
+    def test_attendance_today_changes_on_check_in(self, client, owner_token, test_member):
+        first = client.get("/api/v1/attendance/today", headers=_auth(owner_token))
+        etag = first.headers["etag"]
+        not_modified = client.get(
+            "/api/v1/attendance/today", headers={**_auth(owner_token), "If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+
+        client.post(
+            "/api/v1/attendance/check-in", json={"member_id": str(test_member.id)}, headers=_auth(owner_token)
+        )
+        after = client.get("/api/v1/attendance/today", headers={**_auth(owner_token), "If-None-Match": etag})
+        assert after.status_code == 200
+        assert after.json()["total_check_ins"] == 1
+
+    def test_plans_etag_varies_by_query_and_plan_writes(self, client, owner_token, test_plan):
+        active = client.get("/api/v1/plans", headers=_auth(owner_token))
+        assert active.headers["cache-control"] == "private, max-age=60"
+        assert "Authorization" in active.headers["vary"]
+        everything = client.get("/api/v1/plans?include_inactive=true", headers=_auth(owner_token))
+        assert everything.headers["etag"] != active.headers["etag"]
+
+        client.put(f"/api/v1/plans/{test_plan.id}", json={"price": "1999"}, headers=_auth(owner_token))
+        after = client.get(
+            "/api/v1/plans", headers={**_auth(owner_token), "If-None-Match": active.headers["etag"]}
+        )
+        assert after.status_code == 200
+        assert after.json()[0]["price"] == "1999.00"
+
+    def test_if_modified_since(self, client, owner_token, test_plan):
+        first = client.get("/api/v1/plans/active", headers=_auth(owner_token))
+        response = client.get(
+            "/api/v1/plans/active",
+            headers={**_auth(owner_token), "If-Modified-Since": first.headers["last-modified"]},
+        )
+        assert response.status_code == 304
+
+    def test_member_portal_plan_is_per_member(self, client, db_session, test_gym, test_plan, test_member):
+        today = date.today()
+        db_session.add(
+            Membership(
+                gym_id=test_gym.id,
+                member_id=test_member.id,
+                plan_id=test_plan.id,
+                start_date=today,
+                end_date=today + timedelta(days=29),
+                amount_total=Decimal("1000"),
+                amount_paid=Decimal("1000"),
+                status=MembershipStatus.ACTIVE,
+            )
+        )
+        other = Member(gym_id=test_gym.id, name="Other Member", phone="9811100022", joined_date=today)
+        db_session.add(other)
+        db_session.commit()
+
+        token, _ = create_member_access_token(test_member)
+        mine = client.get("/api/m/me/plan", headers=_auth(token))
+        assert mine.status_code == 200
+        assert client.get(
+            "/api/m/me/plan", headers={**_auth(token), "If-None-Match": mine.headers["etag"]}
+        ).status_code == 304
+
+        other_token, _ = create_member_access_token(other)
+        theirs = client.get("/api/m/me/plan", headers={**_auth(other_token), "If-None-Match": mine.headers["etag"]})
+        assert theirs.status_code == 200
@@ -0,0 +1,80 @@
+"""
+Member portal data endpoints (/api/m/me/*) — served from the async session.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.member_portal.service import create_member_access_token
+from app.models import Attendance, Membership, Payment
+from app.models.enums import MembershipStatus, PaymentMode
+
+
+def _member_headers(member) -> dict[str, str]:
+    token, _ = create_member_access_token(member)
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestMemberPortal:
+    def test_me_requires_member_token(self, client, owner_token):
+        assert client.get("/api/m/me").status_code == 401
+        response = client.get("/api/m/me", headers={"Authorization": f"Bearer {owner_token}"})
+        assert response.status_code == 401
+
+    def test_me_plan_attendance_payments(self, client, db_session, test_gym, test_plan, test_member):
+        today = date.today()
+        membership = Membership(
+            gym_id=test_gym.id,
+            member_id=test_member.id,
+            plan_id=test_plan.id,
+            start_date=today - timedelta(days=10),
+            end_date=today + timedelta(days=19),
+            amount_total=Decimal("1000"),
+            amount_paid=Decimal("600"),
+            status=MembershipStatus.ACTIVE,
+        )
+        db_session.add(membership)
+        db_session.flush()
+        db_session.add(
+            Payment(
+                gym_id=test_gym.id,
+                member_id=test_member.id,
+                membership_id=membership.id,
+                amount=Decimal("600"),
+                payment_mode=PaymentMode.UPI,
+                payment_date=today - timedelta(days=10),
+            )
+        )
+        check_in = datetime.now(timezone.utc) - timedelta(days=1)
+        db_session.add(
+            Attendance(
+                gym_id=test_gym.id,
+                member_id=test_member.id,
+                check_in_time=check_in,
+                check_out_time=check_in + timedelta(minutes=75),
+            )
+        )
+        db_session.commit()
+        headers = _member_headers(test_member)
+
+        me = client.get("/api/m/me", headers=headers)
+        assert me.status_code == 200
+        assert me.json()["gym_name"] == test_gym.name
+
+        plan = client.get("/api/m/me/plan", headers=headers).json()
+        assert plan["plan_name"] == "Monthly"
+        assert plan["days_remaining"] == 19
+        assert Decimal(str(plan["amount_due"])) == Decimal("400")
+
+        attendance = client.get("/api/m/me/attendance", headers=headers).json()
+        assert [row["duration_minutes"] for row in attendance] == [75]
+
+        payments = client.get("/api/m/me/payments", headers=headers).json()
+        assert len(payments) == 1
+        assert payments[0]["payment_mode"] == PaymentMode.UPI.value
+
+    def test_inactive_member_is_rejected(self, client, db_session, test_member):
+        headers = _member_headers(test_member)
+        test_member.is_active = False
+        db_session.commit()
+        assert client.get("/api/m/me/plan", headers=headers).status_code == 403
@@ -41,6 +41,134 @@ class TestMembersList:
         assert response.status_code in (401, 403)
 
 
+
+class TestMemberSearch:
+    """Ranked search and typeahead (app.members.search)."""
+
+    @pytest.fixture
+    def search_members(self, db_session, test_gym):
+        from datetime import date
+
+        from app.models import Member
+
+        rows = [
+            ("Ravi Kumar", "+91 98765-43210", "R100"),
+            ("Kumar Sanjay", "9123456789", None),
+            ("Priya Raviraj", "9000011111", None),
+        ]
+        for name, phone, code in rows:
+            db_session.add(
+                Member(gym_id=test_gym.id, name=name, phone=phone, member_code=code, joined_date=date.today())
+            )
+        db_session.commit()
+
+    def test_list_ranks_prefix_before_substring(self, client, owner_token, search_members):
+        response = client.get("/api/v1/members?query=ravi", headers={"Authorization": f"Bearer {owner_token}"})
+        assert [m["name"] for m in response.json()["items"]] == ["Ravi Kumar", "Priya Raviraj"]
+
+    def test_phone_search_ignores_formatting(self, client, owner_token, search_members):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        for term in ("98765 43210", "+919876543210", "4321"):
+            items = client.get("/api/v1/members", params={"query": term}, headers=headers).json()["items"]
+            assert [m["name"] for m in items] == ["Ravi Kumar"], term
+
+    def test_phone_stored_with_country_code_matches_exactly(
+        self, client, owner_token, db_session, test_gym, search_members
+    ):
+        from datetime import date
+
+        from sqlalchemy import select
+
+        from app.models import Member
+
+        # Starts with the query digits (prefix tier); Ravi's "+91 98765-43210" is an exact match.
+        db_session.add(Member(gym_id=test_gym.id, name="Aarav Shah", phone="98765432109", joined_date=date.today()))
+        db_session.commit()
+        stored = db_session.execute(select(Member.phone_digits).where(Member.name == "Ravi Kumar")).scalar_one()
+        assert stored == "9876543210"
+
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        items = client.get("/api/v1/members", params={"query": "9876543210"}, headers=headers).json()["items"]
+        assert [m["name"] for m in items] == ["Ravi Kumar", "Aarav Shah"]
+        typeahead = client.get("/api/v1/members/typeahead", params={"q": "9876543210"}, headers=headers).json()
+        assert [m["name"] for m in typeahead] == ["Ravi Kumar", "Aarav Shah"]
+
+    def test_typeahead_returns_light_rows(self, client, owner_token, search_members):
+        response = client.get(
+            "/api/v1/members/typeahead?q=kumar&limit=5", headers={"Authorization": f"Bearer {owner_token}"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [m["name"] for m in data] == ["Kumar Sanjay", "Ravi Kumar"]
+        assert set(data[0]) == {"id", "name", "phone", "photo_url"}
+
+    def test_typeahead_tolerates_typos_and_codes(self, client, owner_token, search_members):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        fuzzy = client.get("/api/v1/members/typeahead?q=priyaa", headers=headers).json()
+        assert [m["name"] for m in fuzzy] == ["Priya Raviraj"]
+        by_code = client.get("/api/v1/members/typeahead?q=r100", headers=headers).json()
+        assert by_code[0]["name"] == "Ravi Kumar"
+
+
+class TestTypeaheadIndex:
+    """In-process per-gym prefix index behind /members/typeahead."""
+
+    def test_index_follows_member_changes(self, client, owner_token, db_session, test_gym, test_member):
+        from app.members.typeahead_index import typeahead_indexes
+
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        lookup = lambda q: [m["name"] for m in client.get(  # noqa: E731
+            "/api/v1/members/typeahead", params={"q": q}, headers=headers
+        ).json()]
+        assert lookup("test") == ["Test Member"]
+        index = typeahead_indexes.get(db_session, test_gym.id)
+
+        created = client.post(
+            "/api/v1/members", json={"name": "Anita Desai", "phone": "9811122233"}, headers=headers
+        ).json()
+        assert lookup("ani") == ["Anita Desai"]
+        assert lookup("2233") == ["Anita Desai"]
+
+        client.put(f"/api/v1/members/{created['id']}", json={"name": "Anita Rao"}, headers=headers)
+        assert lookup("rao") == ["Anita Rao"]
+
+        client.delete(f"/api/v1/members/{created['id']}", headers=headers)
+        assert lookup("anita") == []
+        assert typeahead_indexes.get(db_session, test_gym.id) is index
+
+    def test_lookup_ranks_and_matches_all_words(self):
+        from app.members.typeahead_index import GymTypeaheadIndex, TypeaheadEntry
+
+        def entry(name, digits, code=None):
+            return TypeaheadEntry(uuid.uuid4(), name, digits, None, digits, code)
+
+        index = GymTypeaheadIndex(
+            uuid.uuid4(),
+            [
+                entry("Ravi Kumar", "9876543210", "R100"),
+                entry("Kumar Sanjay", "9123456789"),
+                entry("Ravindra Singh", "9000011111"),
+            ],
+        )
+        assert [m["name"] for m in index.lookup("kumar")] == ["Kumar Sanjay", "Ravi Kumar"]
+        assert [m["name"] for m in index.lookup("kumar ravi")] == ["Ravi Kumar"]
+        assert [m["name"] for m in index.lookup("ravind")] == ["Ravindra Singh"]
+        assert [m["name"] for m in index.lookup("+91 98765")] == ["Ravi Kumar"]
+        assert [m["name"] for m in index.lookup("r10")] == ["Ravi Kumar"]
+
+    def test_registry_evicts_least_recently_used_gym(self, db_session, monkeypatch):
+        from app.core.config import settings
+        from app.members.typeahead_index import TypeaheadIndexRegistry
+
+        monkeypatch.setattr(settings, "member_typeahead_max_gyms", 2)
+        registry = TypeaheadIndexRegistry()
+        first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        for gym_id in (first, second, first, third):
+            registry.get(db_session, gym_id)
+        assert registry._loaded(first) is not None
+        assert registry._loaded(second) is None
+
+
 class TestMemberCreate:
     """Test create member endpoint."""
 
@@ -0,0 +1,133 @@
+"""
+Tests for the platform-wide membership expiry job.
+"""
+
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.core.cache import cache_clear, cache_get, cache_set
+from app.memberships import expiry_job
+from app.memberships.expiry_job import (
+    add_expiry_listener,
+    remove_expiry_listener,
+    run_membership_expiry,
+)
+from app.memberships.service import MembershipService
+from app.models import Gym, JobRun, Member, Membership, Plan
+from app.models.enums import MembershipStatus
+
+
+def _make_gym_with_memberships(db_session, *, overdue: int, current: int) -> Gym:
+    suffix = uuid.uuid4().hex[:8]
+    gym = Gym(
+        name="Expiry Gym",
+        slug=f"expiry-gym-{suffix}",
+        owner_name="Owner",
+        email=f"expiry-{suffix}@test.com",
+        phone="9000000000",
+        address="1 Test St",
+        city="Test City",
+        state="Test State",
+        pincode="123456",
+        is_active=True,
+    )
+    db_session.add(gym)
+    db_session.flush()
+    plan = Plan(gym_id=gym.id, name="Monthly", duration_days=30, price=Decimal("1000"), is_active=True)
+    db_session.add(plan)
+    db_session.flush()
+    today = date.today()
+    for i in range(overdue + current):
+        member = Member(gym_id=gym.id, name=f"M{i}", phone=f"90000{i:05d}", joined_date=today, is_active=True)
+        db_session.add(member)
+        db_session.flush()
+        end = today - timedelta(days=1) if i < overdue else today + timedelta(days=10)
+        db_session.add(Membership(
+            gym_id=gym.id,
+            member_id=member.id,
+            plan_id=plan.id,
+            start_date=end - timedelta(days=30),
+            end_date=end,
+            amount_total=Decimal("1000"),
+            amount_paid=Decimal("1000"),
+            status=MembershipStatus.ACTIVE,
+        ))
+    db_session.commit()
+    return gym
+
+
+def _statuses(db_session, gym_id):
+    return sorted(
+        s.value for s in db_session.execute(
+            select(Membership.status).where(Membership.gym_id == gym_id)
+        ).scalars()
+    )
+
+
+class TestMembershipExpiryJob:
+    def test_expires_across_gyms_in_batches(self, db_session):
+        gym_a = _make_gym_with_memberships(db_session, overdue=3, current=1)
+        gym_b = _make_gym_with_memberships(db_session, overdue=2, current=2)
+
+        summary = run_membership_expiry(db_session, batch_size=2)
+
+        assert summary["expired"] == 5
+        assert summary["batches"] == 3
+        assert summary["gyms_affected"] == 2
+        assert _statuses(db_session, gym_a.id) == ["active", "expired", "expired", "expired"]
+        assert _statuses(db_session, gym_b.id) == ["active", "active", "expired", "expired"]
+
+        run = db_session.execute(select(JobRun).where(JobRun.job_name == "membership_expiry")).scalar_one()
+        assert run.status == "success"
+        assert run.stats["expired"] == 5
+        assert run.duration_ms is not None
+
+    def test_emits_ids_and_invalidates_dashboard_cache(self, db_session):
+        gym = _make_gym_with_memberships(db_session, overdue=2, current=0)
+        cache_clear()
+        cache_set(f"dashboard:{gym.id}", {"total_members": 2})
+        seen: dict = {}
+
+        def listener(gym_id, membership_ids):
+            seen.setdefault(gym_id, []).extend(membership_ids)
+
+        add_expiry_listener(listener)
+        try:
+            run_membership_expiry(db_session)
+        finally:
+            remove_expiry_listener(listener)
+
+        assert len(seen[gym.id]) == 2
+        assert cache_get(f"dashboard:{gym.id}") is None
+
+    def test_service_wrapper_scopes_to_gym(self, db_session):
+        gym_a = _make_gym_with_memberships(db_session, overdue=2, current=0)
+        gym_b = _make_gym_with_memberships(db_session, overdue=1, current=0)
+
+        assert MembershipService(db_session).expire_memberships(gym_a.id) == 2
+        assert _statuses(db_session, gym_b.id) == ["active"]
+
+    def test_failed_batch_is_recorded(self, db_session, monkeypatch):
+        gym = _make_gym_with_memberships(db_session, overdue=3, current=0)
+        expire_batch = expiry_job._expire_batch
+        calls = []
+
+        def flaky(db, **kwargs):
+            calls.append(kwargs)
+            if len(calls) > 1:
+                raise RuntimeError("lock timeout")
+            return expire_batch(db, **kwargs)
+
+        monkeypatch.setattr(expiry_job, "_expire_batch", flaky)
+        with pytest.raises(RuntimeError):
+            run_membership_expiry(db_session, batch_size=2, gym_id=gym.id)
+
+        run = db_session.execute(select(JobRun).where(JobRun.job_name == "membership_expiry")).scalar_one()
+        assert run.status == "failed"
+        assert run.error == "lock timeout"
+        assert run.stats == {"gym_id": str(gym.id), "expired": 2, "batches": 1, "gyms_affected": 1}
+        assert run.finished_at is not None
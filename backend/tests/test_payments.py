@@ -139,3 +139,69 @@ class TestDailyCollection:
         data = response.json()
         assert "total_amount" in data
         assert "by_mode" in data
+
+
+class TestRevenueLedger:
+    """Daily revenue ledger maintained on payment writes."""
+
+    def _pay(self, client, token, member, amount, mode, day):
+        response = client.post(
+            "/api/v1/payments",
+            json={
+                "member_id": str(member.id),
+                "amount": amount,
+                "tax_amount": "10.00",
+                "payment_mode": mode,
+                "payment_date": day,
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 201
+
+    def test_collection_reads_from_ledger(self, client, owner_token, test_member):
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        self._pay(client, owner_token, test_member, "500.00", "cash", "2026-02-02")
+        self._pay(client, owner_token, test_member, "300.00", "cash", "2026-02-02")
+        self._pay(client, owner_token, test_member, "200.00", "upi", "2026-02-03")
+
+        daily = client.get("/api/v1/payments/daily?target_date=2026-02-02", headers=headers).json()
+        assert float(daily["total_amount"]) == 800.0
+        assert daily["payment_count"] == 2
+        assert float(daily["by_mode"]["cash"]) == 800.0
+
+        report = client.get(
+            "/api/v1/reports/collection?from_date=2026-02-01&to_date=2026-02-28", headers=headers
+        ).json()
+        assert float(report["total_amount"]) == 1000.0
+        assert report["total_transactions"] == 3
+        assert float(report["by_mode"]["upi"]) == 200.0
+        assert [d["date"] for d in report["daily_breakdown"]] == ["2026-02-02", "2026-02-03"]
+
+        days = client.get(
+            "/api/v1/payments/collection-range?from_date=2026-02-01&to_date=2026-02-03", headers=headers
+        ).json()
+        assert [d["payment_count"] for d in days] == [0, 2, 1]
+
+    def test_rebuild_matches_incremental(self, client, owner_token, db_session, test_gym, test_member):
+        from app.models import RevenueDailyLedger
+
+        headers = {"Authorization": f"Bearer {owner_token}"}
+        self._pay(client, owner_token, test_member, "500.00", "cash", "2026-02-02")
+        self._pay(client, owner_token, test_member, "250.00", "card", "2026-02-02")
+        before = {
+            (r.day, r.payment_mode): (r.amount, r.tax_amount, r.payment_count)
+            for r in db_session.query(RevenueDailyLedger).filter_by(gym_id=test_gym.id)
+        }
+
+        response = client.post(
+            "/api/v1/payments/ledger/rebuild?from_date=2026-02-01&to_date=2026-02-28", headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["rows_written"] == 2
+
+        db_session.expire_all()
+        after = {
+            (r.day, r.payment_mode): (r.amount, r.tax_amount, r.payment_count)
+            for r in db_session.query(RevenueDailyLedger).filter_by(gym_id=test_gym.id)
+        }
+        assert after == before
@@ -0,0 +1,59 @@
+"""Tests for the per-request query profiler."""
+
+from app.core.cache import cache_get
+from app.core.config import settings
+from app.core.profiling import _route_template, normalize_statement, route_stats
+
+
+def test_normalize_statement_strips_literals_and_collapses_lists():
+    sql = "SELECT *\n  FROM members WHERE gym_id = ? AND name = 'Ravi' AND id IN (?, ?, ?) LIMIT 20"
+    assert normalize_statement(sql) == "SELECT * FROM members WHERE gym_id = ? AND name = ? AND id IN (?...) LIMIT ?"
+    assert normalize_statement("SELECT * FROM t WHERE a = %(a_1)s") == "SELECT * FROM t WHERE a = ?"
+
+
+class TestProfilerMiddleware:
+    def test_headers_report_queries(self, client, owner_token, test_member):
+        response = client.get("/api/v1/members", headers={"Authorization": f"Bearer {owner_token}"})
+        assert response.status_code == 200
+        assert int(response.headers["x-db-queries"]) > 0
+        assert float(response.headers["x-db-time-ms"]) >= 0
+        assert "x-response-time-ms" in response.headers
+        assert "x-profile-flags" not in response.headers
+
+    def test_over_budget_is_flagged_and_aggregated(self, client, owner_token, monkeypatch):
+        monkeypatch.setattr(settings, "profiler_query_budget", 0)
+        monkeypatch.setattr(settings, "cron_secret", "s3cret")
+        route_stats.clear()
+
+        response = client.get("/api/v1/members", headers={"Authorization": f"Bearer {owner_token}"})
+        assert response.headers["x-profile-flags"] == "queries"
+
+        assert client.get("/metrics/routes", params={"secret": "wrong"}).status_code == 403
+        body = client.get("/metrics/routes", params={"secret": "s3cret"}).json()
+        [row] = [r for r in body["routes"] if r["route"] == "/api/v1/members" and r["method"] == "GET"]
+        assert row["count"] == 1
+        assert row["flagged"] == 1
+        assert row["queries_max"] > 0
+        assert row["latency_histogram_ms"]["+Inf"] == 1
+        route_stats.clear()
+
+
+def test_route_template_restores_path_params():
+    scope = {"path": "/api/v1/members/abc-1/photo", "endpoint": object(), "path_params": {"member_id": "abc-1"}}
+    assert _route_template(scope) == "/api/v1/members/{member_id}/photo"
+    assert _route_template({"path": "/wp-login.php"}) == "<unmatched>"
+
+
+def test_prometheus_metrics_endpoint(client, owner_token, monkeypatch):
+    monkeypatch.setattr(settings, "cron_secret", "s3cret")
+    client.get("/api/v1/members", headers={"Authorization": f"Bearer {owner_token}"})
+    cache_get("metricstest:missing")
+
+    assert client.get("/metrics", params={"secret": "wrong"}).status_code == 403
+    response = client.get("/metrics", params={"secret": "s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'activehq_http_requests_total{method="GET",route="/api/v1/members",status="200"}' in body
+    assert 'activehq_cache_requests_total{cache="metricstest",result="miss"}' in body
+    assert "activehq_db_pool_wait_seconds_bucket" in body
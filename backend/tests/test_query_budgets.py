@@ -0,0 +1,148 @@
+"""
+Query-count budgets for list routes (see tests/query_budgets.py).
+
+Each route runs at two data sizes against the same budget, so a statement
+issued per row fails the larger run.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.automation.cron_runner import run_renewal_and_payment_automation
+from app.models import Attendance, Member, Membership, User
+from app.models.enums import MembershipStatus, UserRole
+from query_budgets import QueryCounter, query_budget
+
+
+def _seed_members(db_session, gym, plan, count: int, start: int = 0) -> None:
+    today = date.today()
+    for n in range(start, start + count):
+        member = Member(
+            gym_id=gym.id,
+            name=f"Budget Member {n:03d}",
+            phone=f"70000{n:05d}",
+            joined_date=today,
+            is_active=True,
+        )
+        db_session.add(member)
+        db_session.flush()
+        # Two memberships each: the latest one expires this week with an amount due
+        for starts_on, paid in ((today - timedelta(days=60), plan.price), (today - timedelta(days=25), Decimal("0"))):
+            db_session.add(
+                Membership(
+                    gym_id=gym.id,
+                    member_id=member.id,
+                    plan_id=plan.id,
+                    start_date=starts_on,
+                    end_date=starts_on + timedelta(days=plan.duration_days - 1),
+                    amount_total=plan.price,
+                    amount_paid=paid,
+                    status=MembershipStatus.ACTIVE,
+                )
+            )
+    db_session.commit()
+
+
+class TestMemberRouteBudgets:
+    @pytest.mark.parametrize("members", [3, 100])
+    @pytest.mark.parametrize(
+        "route,path",
+        [
+            ("GET /api/v1/members", "/api/v1/members?page_size=100"),
+            ("GET /api/v1/members/expiring", "/api/v1/members/expiring"),
+            ("GET /api/v1/members/with-dues", "/api/v1/members/with-dues"),
+        ],
+    )
+    def test_within_budget(self, client, owner_token, db_session, test_gym, test_plan, query_counter, members, route, path):
+        _seed_members(db_session, test_gym, test_plan, members)
+
+        with query_counter(route):
+            response = client.get(path, headers={"Authorization": f"Bearer {owner_token}"})
+
+        assert response.status_code == 200
+        body = response.json()
+        items = body["items"] if isinstance(body, dict) else body
+        assert len(items) == members
+        assert all(item["current_plan_name"] == "Monthly" for item in items)
+        assert all(item["current_membership_end"] == str(date.today() + timedelta(days=4)) for item in items)
+
+
+class TestAttendanceRouteBudgets:
+    @pytest.mark.parametrize("members", [3, 60])
+    def test_list_within_budget(self, client, owner_token, db_session, test_gym, test_plan, query_counter, members):
+        _seed_members(db_session, test_gym, test_plan, members)
+        now = datetime.now(timezone.utc)
+        for member_id in db_session.query(Member.id).filter(Member.gym_id == test_gym.id):
+            db_session.add(Attendance(gym_id=test_gym.id, member_id=member_id[0], check_in_time=now))
+        db_session.commit()
+
+        with query_counter("GET /api/v1/attendance"):
+            response = client.get("/api/v1/attendance?page_size=100", headers={"Authorization": f"Bearer {owner_token}"})
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == members
+        assert all(item["member_name"].startswith("Budget Member") for item in items)
+
+
+class TestAdminRouteBudgets:
+    @pytest.mark.parametrize("users", [1, 30])
+    def test_list_users_within_budget(self, client, super_admin_token, db_session, test_gym, query_counter, users):
+        for n in range(users):
+            db_session.add(
+                User(
+                    gym_id=test_gym.id,
+                    email=f"budget{n}@test.com",
+                    password_hash="x",
+                    name=f"Budget Staff {n}",
+                    role=UserRole.STAFF,
+                    is_active=True,
+                )
+            )
+        db_session.commit()
+
+        with query_counter("GET /api/v1/admin/users"):
+            response = client.get(
+                "/api/v1/admin/users?page_size=100",
+                headers={"Authorization": f"Bearer {super_admin_token}"},
+            )
+
+        assert response.status_code == 200
+        assert {item["gym_name"] for item in response.json()["items"]} == {test_gym.name}
+
+    def test_list_gyms_within_budget(self, client, super_admin_token, query_counter):
+        with query_counter("GET /api/v1/admin/gyms"):
+            response = client.get("/api/v1/admin/gyms", headers={"Authorization": f"Bearer {super_admin_token}"})
+        assert response.status_code == 200
+
+
+class TestCronQueries:
+    def test_renewal_run_does_not_query_per_member(self, db_session, test_gym, test_plan):
+        run_renewal_and_payment_automation(db_session)  # creates the default campaigns
+        counts = []
+        for start, members in ((0, 3), (3, 27)):
+            _seed_members(db_session, test_gym, test_plan, members, start=start)
+            with QueryCounter() as counter:
+                run_renewal_and_payment_automation(db_session)
+            counts.append(counter.count)
+        assert counts[0] == counts[1], counter.report()
+
+
+class TestQueryCounter:
+    def test_over_budget_lists_repeated_statements(self, db_session, test_gym):
+        counter = QueryCounter(budget=2, label="loop")
+        with pytest.raises(AssertionError) as excinfo:
+            with counter:
+                for _ in range(3):
+                    db_session.get(Member, test_gym.id)
+                    db_session.expunge_all()
+
+        assert "loop issued 3 statements (budget 2)" in str(excinfo.value)
+        assert "+    3x  SELECT members." in str(excinfo.value)
+
+    @query_budget("GET /api/v1/members")
+    def test_decorator_form(self, client, owner_token):
+        response = client.get("/api/v1/members", headers={"Authorization": f"Bearer {owner_token}"})
+        assert response.status_code == 200
@@ -0,0 +1,122 @@
+"""
+Read-replica routing (app.core.database): two local SQLite databases stand in
+for primary and replica, each holding a marker row naming itself.
+"""
+
+import subprocess
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth.dependencies import DbDep, ReadDbDep
+from app.core import database
+from app.core.security import create_access_token
+
+metadata = MetaData()
+marker = Table("marker", metadata, Column("name", String(20)))
+
+
+def _database(name: str):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(marker).values(name=name))
+    return engine
+
+
+def _app() -> FastAPI:
+    """One app instance per "worker"; they share nothing but the databases."""
+    app = FastAPI()
+
+    @app.post("/write")
+    def write(db: DbDep):
+        db.execute(insert(marker).values(name="written"))
+        db.commit()
+
+    @app.get("/read")
+    def read(db: ReadDbDep):
+        return {"database": db.execute(select(marker.c.name)).scalars().first()}
+
+    app.add_middleware(database.PrimaryPinMiddleware)
+    return app
+
+
+@pytest.fixture
+def routed_client(monkeypatch):
+    primary, replica = _database("primary"), _database("replica")
+    monkeypatch.setattr(database, "engine", primary)
+    monkeypatch.setattr(database, "replica_engine", replica)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=primary, autoflush=False))
+    monkeypatch.setattr(database, "ReplicaSessionLocal", sessionmaker(bind=replica, autoflush=False))
+
+    with TestClient(_app()) as client:
+        yield client
+    primary.dispose()
+    replica.dispose()
+
+
+def _headers(subject: str) -> dict[str, str]:
+    token = create_access_token(data={"sub": subject}, expires_delta=timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestReadReplicaRouting:
+    def test_reads_go_to_replica(self, routed_client):
+        assert routed_client.get("/read").json() == {"database": "replica"}
+        assert routed_client.get("/read", headers=_headers("user-a")).json() == {"database": "replica"}
+
+    def test_writer_is_pinned_to_primary(self, routed_client):
+        pin = routed_client.post("/write", headers=_headers("user-a")).headers["x-primary-pin"]
+
+        pinned = {**_headers("user-a"), "X-Primary-Pin": pin}
+        assert routed_client.get("/read", headers=pinned).json() == {"database": "primary"}
+        # The pin is bound to its writer; other users keep reading from the replica
+        stolen = {**_headers("user-b"), "X-Primary-Pin": pin}
+        assert routed_client.get("/read", headers=stolen).json() == {"database": "replica"}
+
+    def test_pin_holds_on_another_worker(self, routed_client):
+        pin = routed_client.post("/write", headers=_headers("user-a")).headers["x-primary-pin"]
+
+        with TestClient(_app()) as other_worker:
+            response = other_worker.get("/read", headers={**_headers("user-a"), "X-Primary-Pin": pin})
+        assert response.json() == {"database": "primary"}
+
+        # And in a separate interpreter, which shares only the signing secret
+        check = (
+            "import sys; from app.core.database import primary_pin_subject; "
+            "print(primary_pin_subject(sys.argv[1]))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", check, pin],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.splitlines()[-1] == "user-a"
+
+    def test_pin_expires(self, routed_client, monkeypatch):
+        monkeypatch.setattr(database.settings, "database_replica_pin_seconds", 0)
+        pin = routed_client.post("/write", headers=_headers("user-a")).headers["x-primary-pin"]
+        pinned = {**_headers("user-a"), "X-Primary-Pin": pin}
+        assert routed_client.get("/read", headers=pinned).json() == {"database": "replica"}
+
+    def test_forged_pin_is_ignored(self, routed_client):
+        forged = {**_headers("user-a"), "X-Primary-Pin": _headers("user-a")["Authorization"][7:]}
+        assert routed_client.get("/read", headers=forged).json() == {"database": "replica"}
+
+    def test_no_pin_without_replica(self, routed_client, monkeypatch):
+        monkeypatch.setattr(database, "replica_engine", database.engine)
+        response = routed_client.post("/write", headers=_headers("user-a"))
+        assert "x-primary-pin" not in response.headers
+
+    def test_malformed_token_reads_replica(self, routed_client):
+        headers = {"Authorization": "Bearer not-a-jwt"}
+        assert routed_client.get("/read", headers=headers).json() == {"database": "replica"}
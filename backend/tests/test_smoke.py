@@ -1,6 +1,9 @@
 from unittest.mock import patch
 
+import pytest
+
 import app.main as main_module
+from app.core import database
 
 
 def test_root_endpoint(client):
@@ -20,6 +23,29 @@ def test_health_endpoints(client, db_engine):
         detailed = client.get("/health/detailed")
     assert detailed.status_code == 200
     assert detailed.json()["services"]["api"] == "healthy"
+    pools = detailed.json()["pools"]
+    assert set(pools["primary"]) == {"size", "checked_out", "checked_in", "overflow"}
+    assert "primary_async" in pools
+
+
+def test_pool_options_per_role(monkeypatch):
+    monkeypatch.setattr(database.settings, "db_pool_size_cron", 1)
+    monkeypatch.setattr(database.settings, "db_max_overflow_cron", 0)
+    options = database.pool_options("cron")
+    assert options["pool_size"] == 1
+    assert options["max_overflow"] == 0
+    assert options["pool_recycle"] == database.settings.db_pool_recycle_seconds
+    assert options["pool_pre_ping"] is False
+    with pytest.raises(ValueError):
+        database.pool_options("scheduler")
+
+
+def test_pgbouncer_mode_disables_prepared_statements(monkeypatch):
+    url = "postgresql+psycopg://u:p@pgbouncer:6432/activehq"
+    assert database.connect_args(url) == {}
+    monkeypatch.setattr(database.settings, "db_pgbouncer_transaction_mode", True)
+    assert database.connect_args(url) == {"prepare_threshold": None}
+    assert database.connect_args("sqlite:///bench.db") == {}
 
 
 def test_setup_database_requires_key(client):
@@ -1,6 +1,7 @@
 import axios, { AxiosError, InternalAxiosRequestConfig } from 'axios'
 import { useAuthStore } from '@/store/authStore'
 import { API_CONSTANTS } from '@/constants'
+import { trackPrimaryPin } from '@/lib/primaryPin'
 
 const API_BASE_URL = API_CONSTANTS.BASE_URL
 const TIMEOUT_MS = API_CONSTANTS.TIMEOUT
@@ -25,6 +26,7 @@ export const publicApi = createBaseClient()
  * Authenticated app API: attaches Bearer token and refreshes on 401 when appropriate.
  */
 export const api = createBaseClient()
+trackPrimaryPin(api)
 
 function shouldSkipTokenRefresh(config: InternalAxiosRequestConfig | undefined): boolean {
   if (!config?.url) return false
@@ -6,6 +6,7 @@
  */
 
 import axios from 'axios'
+import { trackPrimaryPin } from '@/lib/primaryPin'
 import { useMemberAuthStore } from '@/store/memberAuthStore'
 import { getErrorMessage } from '@/lib/api'
 
@@ -30,6 +31,7 @@ export const memberApi = axios.create({
   timeout: 30000,
   headers: { 'Content-Type': 'application/json' },
 })
+trackPrimaryPin(memberApi)
 
 memberApi.interceptors.request.use((config) => {
   const token = useMemberAuthStore.getState().accessToken
@@ -0,0 +1,28 @@
+import type { AxiosInstance } from 'axios'
+
+const PRIMARY_PIN_HEADER = 'X-Primary-Pin'
+
+/**
+ * Read-your-writes for replica-backed reads: after a write the API returns a
+ * short-lived signed X-Primary-Pin header; sending it back makes the next few
+ * seconds of reads go to the primary database, whichever server handles them.
+ * Expired pins are ignored by the API, so the last one is simply kept.
+ */
+export function trackPrimaryPin(client: AxiosInstance): void {
+  let pin: string | null = null
+
+  client.interceptors.request.use((config) => {
+    if (pin) {
+      config.headers[PRIMARY_PIN_HEADER] = pin
+    }
+    return config
+  })
+
+  client.interceptors.response.use((response) => {
+    const value = response.headers[PRIMARY_PIN_HEADER.toLowerCase()]
+    if (typeof value === 'string' && value) {
+      pin = value
+    }
+    return response
+  })
+}